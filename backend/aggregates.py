@@ -0,0 +1,64 @@
+"""Running spending totals.
+
+Totals per month, per store and per category are updated as purchases are
+recorded, so the budget and spending endpoints read them in constant time
+instead of summing the whole purchase history. Months are keyed "YYYY-MM":
+when the calendar rolls over, the current month simply starts from an empty
+bucket while earlier months stay available for trends.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+UNCATEGORIZED = "uncategorized"
+
+
+def month_key(when: datetime) -> str:
+    return f"{when.year:04d}-{when.month:02d}"
+
+
+def _totals() -> Dict[str, float]:
+    return {"total": 0.0, "items": 0}
+
+
+class SpendingAggregates:
+    def __init__(self):
+        self._months: Dict[str, Dict[str, float]] = defaultdict(_totals)
+        self._month_stores: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(lambda: defaultdict(_totals))
+        self._month_categories: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(lambda: defaultdict(_totals))
+        self._stores: Dict[str, Dict[str, float]] = defaultdict(_totals)
+        self._categories: Dict[str, Dict[str, float]] = defaultdict(_totals)
+        self.purchases = 0
+
+    def add(self, month: str, store: str, category: Optional[str], amount: float, items: int, purchases: int = 1):
+        """Fold one purchase (or a pre-summed group of `purchases`) into every total"""
+        category = category or UNCATEGORIZED
+        for totals in (
+            self._months[month],
+            self._month_stores[month][store],
+            self._month_categories[month][category],
+            self._stores[store],
+            self._categories[category],
+        ):
+            totals["total"] += amount
+            totals["items"] += items
+        self.purchases += purchases
+
+    def month(self, month: str) -> Dict[str, float]:
+        return dict(self._months.get(month) or _totals())
+
+    def spent_in(self, month: str) -> float:
+        totals = self._months.get(month)
+        return totals["total"] if totals else 0.0
+
+    def by_store(self, month: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        source = self._stores if month is None else self._month_stores.get(month, {})
+        return {store: dict(totals) for store, totals in source.items()}
+
+    def by_category(self, month: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        source = self._categories if month is None else self._month_categories.get(month, {})
+        return {category: dict(totals) for category, totals in source.items()}
+
+    def monthly(self) -> Dict[str, Dict[str, float]]:
+        """Totals for every month with purchases, oldest first"""
+        return {month: dict(self._months[month]) for month in sorted(self._months)}
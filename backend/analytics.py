@@ -0,0 +1,294 @@
+"""Columnar spending analytics.
+
+Purchase history is kept as NumPy columns (one array per field, with stores,
+categories and products dictionary-encoded as integer codes) so trends,
+breakdowns, rolling averages and price-per-unit history are computed in a few
+vectorized passes instead of looping over PurchaseRecord objects. Columns grow
+by appending only the purchases recorded since the last refresh.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from aggregates import UNCATEGORIZED
+
+_EPOCH_YEAR = 1970
+
+
+def _month_label(index: int) -> str:
+    year, month = divmod(int(index), 12)
+    return f"{year + _EPOCH_YEAR:04d}-{month + 1:02d}"
+
+
+def _month_index(label: str) -> int:
+    year, month = label[:7].split("-")
+    return (int(year) - _EPOCH_YEAR) * 12 + int(month) - 1
+
+
+class _Codes:
+    """Dictionary encoding of a string column"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class PurchaseColumns:
+    """Append-only purchase history as NumPy arrays.
+
+    `append` takes rows with seq, upc, item_name, price, store, date (ISO
+    string or datetime), quantity and category, in seq order.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self.last_seq = 0
+        self.stores = _Codes()
+        self.categories = _Codes()
+        self.products = _Codes()
+        self.product_names: List[str] = []
+        self._day = np.zeros(capacity, dtype="datetime64[D]")
+        self._price = np.zeros(capacity, dtype=np.float64)
+        self._quantity = np.zeros(capacity, dtype=np.int64)
+        self._store = np.zeros(capacity, dtype=np.int32)
+        self._category = np.zeros(capacity, dtype=np.int32)
+        self._product = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self, needed: int):
+        capacity = len(self._price)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_day", "_price", "_quantity", "_store", "_category", "_product"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    def append(self, rows: Iterable):
+        rows = list(rows)
+        if not rows:
+            return
+        start, end = self._size, self._size + len(rows)
+        self._grow(end)
+        days, prices, quantities, stores, categories, products = [], [], [], [], [], []
+        for row in rows:
+            when = row["date"]
+            days.append(when[:10] if isinstance(when, str) else when.isoformat()[:10])
+            prices.append(row["price"])
+            quantities.append(row["quantity"] or 1)
+            stores.append(self.stores.code(row["store"]))
+            categories.append(self.categories.code(row["category"] or UNCATEGORIZED))
+            key = row["upc"] or row["item_name"]
+            product = self.products.code(key)
+            if product == len(self.product_names):
+                self.product_names.append(row["item_name"])
+            products.append(product)
+        self._day[start:end] = np.array(days, dtype="datetime64[D]")
+        self._price[start:end] = prices
+        self._quantity[start:end] = quantities
+        self._store[start:end] = stores
+        self._category[start:end] = categories
+        self._product[start:end] = products
+        self._size = end
+        self.last_seq = rows[-1]["seq"]
+
+    # Views over the filled part of each column
+    @property
+    def day(self) -> np.ndarray:
+        return self._day[: self._size]
+
+    @property
+    def month(self) -> np.ndarray:
+        return self.day.astype("datetime64[M]").astype(np.int64)
+
+    @property
+    def price(self) -> np.ndarray:
+        return self._price[: self._size]
+
+    @property
+    def quantity(self) -> np.ndarray:
+        return self._quantity[: self._size]
+
+    @property
+    def amount(self) -> np.ndarray:
+        return self.price * self.quantity
+
+    @property
+    def store(self) -> np.ndarray:
+        return self._store[: self._size]
+
+    @property
+    def category(self) -> np.ndarray:
+        return self._category[: self._size]
+
+    @property
+    def product(self) -> np.ndarray:
+        return self._product[: self._size]
+
+
+def monthly_trend(columns: PurchaseColumns, months: int = 12, window: int = 3) -> List[dict]:
+    """Spend per month for the last `months` months with purchases (empty months included).
+
+    Each month has its total, items, purchases, change vs the previous month
+    (percent, None when the previous month is zero) and the rolling mean of
+    the last `window` months.
+    """
+    if not len(columns):
+        return []
+    month = columns.month
+    first, last = int(month.min()), int(month.max())
+    offsets = month - first
+    span = last - first + 1
+    totals = np.bincount(offsets, weights=columns.amount, minlength=span)
+    items = np.bincount(offsets, weights=columns.quantity, minlength=span)
+    purchases = np.bincount(offsets, minlength=span)
+
+    previous = np.concatenate(([0.0], totals[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(previous > 0, (totals - previous) / previous * 100, np.nan)
+    cumulative = np.cumsum(np.concatenate(([0.0], totals)))
+    counts = np.minimum(np.arange(1, span + 1), window)
+    rolling = (cumulative[1:] - cumulative[np.arange(span) + 1 - counts]) / counts
+
+    keep = slice(max(span - months, 0), span)
+    return [
+        {
+            "month": _month_label(first + i),
+            "total": round(float(totals[i]), 2),
+            "items": int(items[i]),
+            "purchases": int(purchases[i]),
+            "change_pct": None if np.isnan(change[i]) else round(float(change[i]), 1),
+            "rolling_avg": round(float(rolling[i]), 2),
+        }
+        for i in range(span)[keep]
+    ]
+
+
+def breakdown(
+    columns: PurchaseColumns, field: str, month: Optional[str] = None, top: Optional[int] = None
+) -> List[dict]:
+    """Spend per store or category (`field`), largest first, optionally for one "YYYY-MM" month"""
+    codes = columns.store if field == "store" else columns.category
+    names = columns.stores.names if field == "store" else columns.categories.names
+    amount, quantity = columns.amount, columns.quantity
+    if month is not None:
+        selected = columns.month == _month_index(month)
+        codes, amount, quantity = codes[selected], amount[selected], quantity[selected]
+    totals = np.bincount(codes, weights=amount, minlength=len(names))
+    items = np.bincount(codes, weights=quantity, minlength=len(names))
+    grand = totals.sum()
+    order = np.lexsort((np.arange(len(names)), -totals))
+    rows = [
+        {
+            field: names[i],
+            "total": round(float(totals[i]), 2),
+            "items": int(items[i]),
+            "share_pct": round(float(totals[i] / grand * 100), 1) if grand else 0.0,
+        }
+        for i in order if totals[i] > 0
+    ]
+    return rows[:top] if top else rows
+
+
+def ranked_totals(totals: Dict[str, Dict[str, float]], field: str, top: Optional[int] = None) -> List[dict]:
+    """Running totals by store or category (`field`), as `breakdown` rows, largest first"""
+    grand = sum(t["total"] for t in totals.values())
+    ordered = sorted(totals.items(), key=lambda pair: (-pair[1]["total"], pair[0]))
+    rows = [
+        {
+            field: name,
+            "total": round(t["total"], 2),
+            "items": int(t["items"]),
+            "share_pct": round(t["total"] / grand * 100, 1) if grand else 0.0,
+        }
+        for name, t in ordered if t["total"] > 0
+    ]
+    return rows[:top] if top else rows
+
+
+def price_history(columns: PurchaseColumns, top: int = 10, points: int = 12) -> List[dict]:
+    """Unit-price history for the `top` most-bought products.
+
+    For each product: first/latest/min/max/mean unit price, the change from
+    first to latest in percent, and up to the last `points` (day, price) pairs.
+    """
+    if not len(columns):
+        return []
+    product = columns.product
+    bought = np.bincount(product, weights=columns.quantity)
+    chosen = np.lexsort((np.arange(len(bought)), -bought))[:top]
+    order = np.lexsort((columns.day, product))
+    sorted_product = product[order]
+    starts = np.searchsorted(sorted_product, chosen, side="left")
+    ends = np.searchsorted(sorted_product, chosen, side="right")
+
+    history = []
+    for code, start, end in zip(chosen, starts, ends):
+        rows = order[start:end]
+        prices = columns.price[rows]
+        first, latest = float(prices[0]), float(prices[-1])
+        history.append({
+            "product": columns.product_names[code],
+            "purchases": int(end - start),
+            "first": round(first, 2),
+            "latest": round(latest, 2),
+            "min": round(float(prices.min()), 2),
+            "max": round(float(prices.max()), 2),
+            "mean": round(float(prices.mean()), 2),
+            "change_pct": round((latest - first) / first * 100, 1) if first else None,
+            "history": [
+                {"date": str(day), "price": round(float(price), 2)}
+                for day, price in zip(columns.day[rows][-points:], prices[-points:])
+            ],
+        })
+    return history
+
+
+def spending_report(
+    columns: PurchaseColumns, months: int = 12, window: int = 3, top: int = 10, month: Optional[str] = None
+) -> dict:
+    return {
+        "purchases": len(columns),
+        "total_spent": round(float(columns.amount.sum()), 2) if len(columns) else 0.0,
+        "monthly": monthly_trend(columns, months, window),
+        "by_store": breakdown(columns, "store", month, top),
+        "by_category": breakdown(columns, "category", month, top),
+        "price_history": price_history(columns, top),
+    }
+
+
+def summary_lines(report: dict, months: int = 6, top: int = 5) -> Sequence[str]:
+    """A few short lines of the report for an LLM prompt (price changes only when it has `price_history`)"""
+    lines = []
+    recent = report["monthly"][-months:]
+    if recent:
+        lines.append("Monthly spend: " + ", ".join(
+            f"{m['month']} ${m['total']:.0f}" + (f" ({m['change_pct']:+.0f}%)" if m["change_pct"] is not None else "")
+            for m in recent
+        ))
+        lines.append(f"Rolling average (latest): ${recent[-1]['rolling_avg']:.2f}/month")
+    for field, label, title in (("by_store", "store", "stores"), ("by_category", "category", "categories")):
+        rows = report[field][:top]
+        if rows:
+            lines.append(f"Top {title}: " + ", ".join(f"{r[label]} ${r['total']:.0f} ({r['share_pct']:.0f}%)" for r in rows))
+    movers = sorted(
+        (p for p in report.get("price_history", ()) if p["change_pct"] and p["purchases"] > 1),
+        key=lambda p: -abs(p["change_pct"]),
+    )[:top]
+    if movers:
+        lines.append("Unit price changes: " + ", ".join(
+            f"{p['product']} ${p['first']:.2f}->${p['latest']:.2f} ({p['change_pct']:+.0f}%)" for p in movers
+        ))
+    return lines
@@ -0,0 +1,148 @@
+"""EAN-13 / UPC-A decoding from photos.
+
+A photo is reduced to grayscale scanlines across the middle of the image, each
+scanline is thresholded into bar/space run lengths (NumPy), and every window
+of 59 runs that starts with a bar is tried as a barcode: guard patterns are
+checked, each digit's four runs are scaled to 7 modules and looked up, and the
+result must pass the check digit. Scanlines are also read right-to-left, and
+the image is tried rotated by 90 degrees, so upside-down and sideways
+barcodes decode too. Functions here are CPU-bound and meant for worker
+processes.
+"""
+import io
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Left-hand odd-parity ("L") patterns as module widths (space, bar, space, bar)
+_L_PATTERNS = {
+    (3, 2, 1, 1): 0, (2, 2, 2, 1): 1, (2, 1, 2, 2): 2, (1, 4, 1, 1): 3, (1, 1, 3, 2): 4,
+    (1, 2, 3, 1): 5, (1, 1, 1, 4): 6, (1, 3, 1, 2): 7, (1, 2, 1, 3): 8, (3, 1, 1, 2): 9,
+}
+# Even-parity ("G") patterns are the L patterns reversed; right-hand ("R") ones share L's widths
+_G_PATTERNS = {widths[::-1]: digit for widths, digit in _L_PATTERNS.items()}
+# Parity of the six left digits encodes the first digit
+_FIRST_DIGIT = {
+    "LLLLLL": 0, "LLGLGG": 1, "LLGGLG": 2, "LLGGGL": 3, "LGLLGG": 4,
+    "LGGLLG": 5, "LGGGLL": 6, "LGLGLG": 7, "LGLGGL": 8, "LGGLGL": 9,
+}
+
+RUNS = 59  # 3 guard + 6 x 4 + 5 centre + 6 x 4 + 3 guard
+MODULES = 95
+MAX_WIDTH = 1600
+SCANLINES = 24
+
+
+def check_digit_ok(code: str) -> bool:
+    digits = [int(c) for c in code]
+    total = sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return (10 - total % 10) % 10 == digits[12]
+
+
+def to_upc(ean13: str) -> str:
+    """The UPC-A form for EAN-13 codes with a leading 0, else the EAN-13 itself"""
+    return ean13[1:] if ean13.startswith("0") else ean13
+
+
+def _runs(line: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Run lengths of a thresholded scanline, and whether each run is a bar"""
+    lo, hi = np.percentile(line, (5, 95))
+    if hi - lo < 40:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+    dark = line < (lo + hi) / 2
+    edges = np.flatnonzero(np.diff(dark.astype(np.int8))) + 1
+    bounds = np.concatenate(([0], edges, [len(line)]))
+    return np.diff(bounds), dark[bounds[:-1]]
+
+
+def _digit(widths: np.ndarray) -> Optional[Tuple[int, str]]:
+    modules = widths * 7.0 / widths.sum()
+    pattern = tuple(int(m) for m in np.clip(np.rint(modules), 1, 4))
+    if sum(pattern) != 7:
+        # Rounding drifted; give the extra/missing module to the least certain run
+        error = modules - np.array(pattern)
+        pattern = list(pattern)
+        index = int(np.argmax(error)) if sum(pattern) < 7 else int(np.argmin(error))
+        pattern[index] += 1 if sum(pattern) < 7 else -1
+        pattern = tuple(pattern)
+    if pattern in _L_PATTERNS:
+        return _L_PATTERNS[pattern], "L"
+    if pattern in _G_PATTERNS:
+        return _G_PATTERNS[pattern], "G"
+    return None
+
+
+def _guard_ok(widths: np.ndarray, module: float) -> bool:
+    return bool(np.all(np.abs(widths / module - 1) < 0.7))
+
+
+def _decode_window(widths: np.ndarray) -> Optional[str]:
+    module = widths.sum() / MODULES
+    if not (_guard_ok(widths[:3], module) and _guard_ok(widths[27:32], module) and _guard_ok(widths[56:59], module)):
+        return None
+    left, parity = [], ""
+    for i in range(6):
+        decoded = _digit(widths[3 + 4 * i: 7 + 4 * i])
+        if decoded is None:
+            return None
+        left.append(decoded[0])
+        parity += decoded[1]
+    first = _FIRST_DIGIT.get(parity)
+    if first is None:
+        return None
+    right = []
+    for i in range(6):
+        decoded = _digit(widths[32 + 4 * i: 36 + 4 * i])
+        if decoded is None or decoded[1] != "L":
+            return None
+        right.append(decoded[0])
+    code = "".join(map(str, [first] + left + right))
+    return code if check_digit_ok(code) else None
+
+
+def _scan_line(line: np.ndarray) -> Optional[str]:
+    widths, dark = _runs(line)
+    for direction in (1, -1):
+        w, d = widths[::direction], dark[::direction]
+        for start in np.flatnonzero(d[: len(w) - RUNS + 1] if len(w) >= RUNS else []):
+            # Needs a quiet zone before the start guard
+            if start > 0 and w[start - 1] < 5 * w[start: start + 3].mean():
+                continue
+            code = _decode_window(w[start: start + RUNS].astype(np.float64))
+            if code:
+                return code
+    return None
+
+
+def _scan(pixels: np.ndarray, scanlines: int) -> List[str]:
+    height = pixels.shape[0]
+    rows = np.linspace(height * 0.1, height * 0.9, scanlines).astype(int)
+    codes = []
+    for row in rows:
+        code = _scan_line(pixels[row])
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def decode_image(data: bytes, scanlines: int = SCANLINES) -> List[str]:
+    """EAN-13 codes found in an encoded image (runs in a worker process)"""
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("L", (MAX_WIDTH, MAX_WIDTH))
+        image = ImageOps.exif_transpose(image).convert("L")
+    if image.width > MAX_WIDTH:
+        image = image.resize((MAX_WIDTH, round(image.height * MAX_WIDTH / image.width)))
+    pixels = np.asarray(image, dtype=np.int16)
+    codes = _scan(pixels, scanlines)
+    if not codes:
+        codes = _scan(np.ascontiguousarray(pixels.T), scanlines)
+    return codes
+
+
+def try_decode_image(data: bytes) -> Tuple[List[str], Optional[str]]:
+    """decode_image for batches: (codes, None), or ([], error) for an unreadable image"""
+    try:
+        return decode_image(data), None
+    except Exception:
+        return [], "Could not read image"
@@ -0,0 +1,101 @@
+"""Server-side barcode decoding throughput on a synthetic fixture set.
+
+    python -m benchmarks.bench_barcode --images 200 --workers 1 2 4
+
+Renders EAN-13 labels (random codes, sizes, blur, noise, some upside down or
+sideways) as JPEGs, then decodes them inline and through the vision process
+pool at each worker count. Reports images/s and how many decoded correctly.
+"""
+import argparse
+import asyncio
+import io
+import random
+import time
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from barcode import decode_image
+from vision import VisionPipeline
+
+_L = ["0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011"]
+_PARITY = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+
+def ean13(rng: random.Random) -> str:
+    body = "0" + "".join(str(rng.randrange(10)) for _ in range(11)) if rng.random() < 0.5 else \
+        "".join(str(rng.randrange(10)) for _ in range(12))
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def modules(code: str) -> str:
+    digits = [int(c) for c in code]
+    bits = "101"
+    for digit, parity in zip(digits[1:7], _PARITY[digits[0]]):
+        pattern = _L[digit]
+        bits += pattern if parity == "L" else "".join("1" if b == "0" else "0" for b in pattern)[::-1]
+    bits += "01010"
+    for digit in digits[7:]:
+        bits += "".join("1" if b == "0" else "0" for b in _L[digit])
+    return bits + "101"
+
+
+def render(code: str, rng: random.Random) -> bytes:
+    module = rng.choice([2, 3, 4, 5])
+    bars = modules(code)
+    width, height = (len(bars) + 30) * module, rng.randint(60, 160) * module // 2
+    label = Image.new("L", (width, height + 40), 255)
+    draw = ImageDraw.Draw(label)
+    for i, bit in enumerate(bars):
+        if bit == "1":
+            x = (i + 15) * module
+            draw.rectangle([x, 10, x + module - 1, 10 + height], fill=rng.randint(0, 60))
+    canvas = Image.new("L", (width + rng.randint(0, 400), height + rng.randint(40, 400)), rng.randint(200, 255))
+    canvas.paste(label, (rng.randint(0, canvas.width - width), rng.randint(0, canvas.height - label.height)))
+    canvas = canvas.filter(ImageFilter.GaussianBlur(rng.uniform(0, module / 3)))
+    pixels = np.asarray(canvas, dtype=np.int16) + np.random.default_rng(rng.randrange(2**32)).normal(0, 12, (canvas.height, canvas.width))
+    canvas = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    canvas = canvas.rotate(rng.choice([0, 0, 0, 90, 180]), expand=True)
+    out = io.BytesIO()
+    canvas.convert("RGB").save(out, "JPEG", quality=rng.randint(60, 95))
+    return out.getvalue()
+
+
+def fixtures(n: int) -> List[Tuple[str, bytes]]:
+    rng = random.Random(17)
+    return [(code, render(code, rng)) for code in (ean13(rng) for _ in range(n))]
+
+
+def score(images, results) -> int:
+    return sum(code in codes for (code, _), codes in zip(images, results))
+
+
+async def pooled(images, workers: int) -> Tuple[float, int]:
+    pipeline = VisionPipeline(workers, max_pending=len(images))
+    await pipeline.start()
+    # Warm the workers so process start-up is not timed
+    await asyncio.gather(*[pipeline.submit(decode_image, images[0][1]) for _ in range(workers)])
+    start = time.perf_counter()
+    results = await asyncio.gather(*[pipeline.submit(decode_image, data) for _, data in images])
+    elapsed = time.perf_counter() - start
+    await pipeline.aclose()
+    return elapsed, score(images, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    images = fixtures(args.images)
+    print(f"{'mode':>10} {'images/s':>9} {'decoded':>9}")
+    start = time.perf_counter()
+    inline = [decode_image(data) for _, data in images]
+    elapsed = time.perf_counter() - start
+    print(f"{'inline':>10} {len(images) / elapsed:>9.1f} {score(images, inline):>5}/{len(images)}")
+    for workers in args.workers:
+        elapsed, decoded = asyncio.run(pooled(images, workers))
+        print(f"{f'{workers} procs':>10} {len(images) / elapsed:>9.1f} {decoded:>5}/{len(images)}")
@@ -0,0 +1,103 @@
+"""Bulk inventory import against one-item-at-a-time adds, with fake upstreams.
+
+    python -m benchmarks.bench_bulk_import --rows 10 100 1000 --off-latency 0.05 --llm-latency 0.2
+
+Each row set is mostly scanned products (one Open Food Facts lookup per UPC)
+plus some unrecognised names that need an LLM shelf-life estimate. The
+sequential path does what one POST /inventory per item does: a lookup, then an
+expiry estimate, item by item. The bulk path is import_inventory. Both run
+against fresh UPCs and names, so neither benefits from the other's caches.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="kitchenhelper-bench-"))
+
+from benchmarks.fake_upstreams import create_fake_llm_app, create_fake_off_app, serve_in_thread  # noqa: E402
+import main  # noqa: E402
+from models import EnhancedInventoryItem  # noqa: E402
+
+# One row in this many is a free-text name the rule table does not know
+UNKNOWN_EVERY = 10
+
+
+def _word(i: int) -> str:
+    # Shelf-life keys ignore digits, so unknown names need distinct letters
+    letters = ""
+    while True:
+        i, r = divmod(i, 26)
+        letters += chr(ord("a") + r)
+        if not i:
+            return letters
+
+
+def make_rows(n: int, run: int):
+    rows = []
+    for i in range(n):
+        if i % UNKNOWN_EVERY == 0:
+            rows.append(EnhancedInventoryItem(name=f"Specialty {_word(run)} {_word(i)}", purchase_price=4.0, store="Bench"))
+        else:
+            rows.append(EnhancedInventoryItem(upc=f"9{run:03d}{i:08d}", purchase_price=2.0, store="Bench"))
+    return rows
+
+
+async def add_sequentially(tenant, rows):
+    for row in rows:
+        product = await main.fetch_product_info(row.upc) if row.upc else None
+        item, purchase = main.build_inventory_records(row, product)
+        expiry = await main.estimate_expiry_date(item.name, item.category or "food")
+        item.expiry = expiry
+        with tenant.storage.db.transaction():
+            tenant.storage.purchases.add(purchase)
+            tenant.storage.inventory.add(item)
+
+
+async def add_in_bulk(tenant, rows):
+    result = await main.import_inventory(tenant, [(i, row, None) for i, row in enumerate(rows, start=1)])
+    assert result["added"] == len(rows), result["failed"]
+
+
+async def timed(fn, tenant, rows, off, llm):
+    off.state.calls = llm.state.calls = 0
+    start = time.perf_counter()
+    await fn(tenant, rows)
+    return time.perf_counter() - start, off.state.calls, llm.state.calls
+
+
+async def run(sizes, off_latency: float, llm_latency: float, sequential_max: int):
+    off = create_fake_off_app(off_latency)
+    llm = create_fake_llm_app(llm_latency)
+    main.off_client.base_url = serve_in_thread(off) + "/api/v0/product"
+    main.llm.base_url = serve_in_thread(llm) + "/v1"
+    await main.off_client.start()
+    await main.llm.start()
+
+    print(f"{'rows':>6} {'path':>10} {'seconds':>9} {'rows/s':>9} {'off calls':>10} {'llm calls':>10}")
+    run = 0
+    async with main.tenants.session("bench") as tenant:
+        for n in sizes:
+            paths = [("bulk", add_in_bulk)]
+            if n <= sequential_max:
+                paths.insert(0, ("sequential", add_sequentially))
+            for name, fn in paths:
+                run += 1
+                elapsed, off_calls, llm_calls = await timed(fn, tenant, make_rows(n, run), off, llm)
+                print(f"{n:>6} {name:>10} {elapsed:>9.2f} {n / elapsed:>9.0f} {off_calls:>10} {llm_calls:>10}")
+            tenant.storage.inventory.clear()
+
+    await main.off_client.aclose()
+    await main.llm.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--off-latency", type=float, default=0.05, help="fake Open Food Facts latency in seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--sequential-max", type=int, default=100, help="skip the sequential path above this many rows")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.off_latency, args.llm_latency, args.sequential_max))
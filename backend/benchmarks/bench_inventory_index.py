@@ -0,0 +1,99 @@
+"""InventoryIndex against the list scans it replaced.
+
+    python -m benchmarks.bench_inventory_index --sizes 10000 100000
+
+Times "expiring within 3 days", delete-by-UPC and delete-by-id on a pantry of
+N items, for both a plain list (the old code paths) and the index.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from inventory_index import InventoryIndex
+from models import InventoryItem
+
+QUERIES = 200
+
+
+def make_items(n: int):
+    rng = random.Random(n)
+    now = datetime.utcnow()
+    return [
+        InventoryItem(
+            id=f"item_{i}",
+            upc=f"{rng.randrange(n // 4 or 1):012d}",
+            name=f"Item {i}",
+            purchase_price=round(rng.uniform(0.5, 20), 2),
+            quantity=rng.randint(1, 4),
+            expiry=now + timedelta(days=rng.randint(-2, 365), hours=rng.randint(0, 23)),
+        )
+        for i in range(n)
+    ]
+
+
+def per_op_us(fn, ops: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def bench_list(items, upcs, ids):
+    inventory = list(items)
+    now = datetime.utcnow()
+
+    def expiring():
+        for _ in range(QUERIES):
+            [item for item in inventory if item.expiry and (item.expiry - now).days <= 3]
+
+    def delete_upc():
+        for upc in upcs:
+            removed, new_list = 0, []
+            for item in inventory:
+                if item.upc == upc and removed < 1:
+                    removed += 1
+                    continue
+                new_list.append(item)
+            inventory[:] = new_list
+
+    def delete_id():
+        for item_id in ids:
+            inventory[:] = [item for item in inventory if item.id != item_id]
+
+    return per_op_us(expiring, QUERIES), per_op_us(delete_upc, len(upcs)), per_op_us(delete_id, len(ids))
+
+
+def bench_index(items, upcs, ids):
+    index = InventoryIndex(items)
+    now = datetime.utcnow()
+
+    def expiring():
+        for _ in range(QUERIES):
+            index.expiring_within(3, now)
+
+    def delete_upc():
+        for upc in upcs:
+            index.remove_by_upc(upc, 1)
+
+    def delete_id():
+        for item_id in ids:
+            index.remove(item_id)
+
+    return per_op_us(expiring, QUERIES), per_op_us(delete_upc, len(upcs)), per_op_us(delete_id, len(ids))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--deletes", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'impl':>6} {'expiring<=3d':>14} {'delete-by-upc':>14} {'delete-by-id':>14}  (us/op)")
+    for n in args.sizes:
+        items = make_items(n)
+        rng = random.Random(0)
+        upcs = [item.upc for item in rng.sample(items, args.deletes)]
+        ids = [item.id for item in rng.sample(items, args.deletes)]
+        for name, bench in (("list", bench_list), ("index", bench_index)):
+            expiring, by_upc, by_id = bench(items, upcs, ids)
+            print(f"{n:>8} {name:>6} {expiring:>14.1f} {by_upc:>14.1f} {by_id:>14.1f}")
@@ -0,0 +1,87 @@
+"""GET /inventory cost: full list, revalidation and delta sync, against the old path.
+
+    python -m benchmarks.bench_inventory_sync --sizes 1000 10000
+
+For a pantry of N items, times and sizes the answers a client refreshing
+after one change can get: the old response (every record validated as a
+Pydantic model, then encoded), the encoded list built from scratch, a full
+GET after one item changed (only that item is re-encoded), a 304
+revalidation, and /inventory/changes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="kitchenhelper-bench-"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from benchmarks.bench_inventory_index import make_items  # noqa: E402
+from models import InventoryItem  # noqa: E402
+from records import InventoryRecord  # noqa: E402
+
+REPEATS = 5
+
+
+async def open_tenant(household_id: str):
+    async with main.tenants.session(household_id) as tenant:
+        return tenant
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / REPEATS, result
+
+
+def run(client: TestClient, n: int):
+    headers = {"X-Household-Id": f"bench-sync-{n}"}
+    client.delete("/inventory", headers=headers)
+    tenant = asyncio.run(open_tenant(headers["X-Household-Id"]))
+    inventory = tenant.storage.inventory
+    with tenant.storage.db.transaction():
+        for item in make_items(n):
+            inventory.add(InventoryRecord.from_model(item))
+    items = inventory.list()
+
+    def pydantic_path():
+        return json.dumps(jsonable_encoder([InventoryItem(**item.to_dict()) for item in items])).encode()
+
+    def fresh_encode():
+        inventory._encoded.clear()
+        return inventory.encode(items)
+
+    rows = []
+    rows.append(("validated models", *timed(pydantic_path)))
+    rows.append(("encoded, cold", *timed(fresh_encode)))
+
+    first = client.get("/inventory", headers=headers)
+    version = first.headers["x-inventory-version"]
+    inventory.update(items[0].id, remaining_quantity=0.5)
+    rows.append(("GET, 1 changed", *timed(lambda: client.get("/inventory", headers=headers).content)))
+    etag = client.get("/inventory", headers=headers).headers["etag"]
+    rows.append(("304 revalidation", *timed(lambda: client.get("/inventory", headers={**headers, "If-None-Match": etag}).content)))
+    rows.append(("changes since", *timed(
+        lambda: client.get("/inventory/changes", headers=headers, params={"since": version}).content
+    )))
+
+    print(f"{n} items")
+    print(f"{'response':>20} {'ms':>9} {'bytes':>10}")
+    for name, ms, body in rows:
+        print(f"{name:>20} {ms:>9.2f} {len(body):>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    with TestClient(main.app) as client:
+        for n in args.sizes:
+            run(client, n)
@@ -0,0 +1,76 @@
+"""Memory per inventory item: Pydantic InventoryItem against InventoryRecord.
+
+    python -m benchmarks.bench_record_memory --items 10000
+
+Both are loaded from the JSON stored in the inventory table, the way the index
+is rebuilt, with a nutrition dict shaped like real Open Food Facts nutriments
+(about 30 numeric keys). Bytes per item are measured with tracemalloc.
+"""
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from models import InventoryItem
+from records import InventoryRecord
+
+NUTRIMENT_KEYS = [
+    f"{name}{suffix}"
+    for name in ("energy-kcal", "energy", "fat", "saturated-fat", "carbohydrates", "sugars",
+                 "fiber", "proteins", "salt", "sodium")
+    for suffix in ("", "_100g", "_serving")
+]
+STORES = ["Loblaws", "Metro", "No Frills", "Walmart", "Costco"]
+CATEGORIES = ["en:dairies", "en:breads", "en:meats", "en:fruits", "en:beverages", "en:snacks"]
+
+
+def stored_rows(n: int):
+    rng = random.Random(n)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n):
+        expiry = now + timedelta(days=rng.randint(1, 60))
+        rows.append(json.dumps({
+            "id": f"item_{i:012x}",
+            "upc": f"{rng.randrange(10**12):012d}",
+            "name": f"Product {i}",
+            "purchase_price": round(rng.uniform(0.5, 20), 2),
+            "store": rng.choice(STORES),
+            "quantity": 2,
+            "unit": "pieces",
+            "remaining_quantity": 2,
+            "total_quantity": 2,
+            "expiry": expiry.isoformat(),
+            "expiry_date": expiry.isoformat(),
+            "nutrition": {key: round(rng.uniform(0, 100), 2) for key in NUTRIMENT_KEYS},
+            "category": rng.choice(CATEGORIES),
+            "purchase_date": now.isoformat(),
+        }))
+    return rows
+
+
+def bytes_per_item(load, rows) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [load(row) for row in rows]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(items) == len(rows)
+    return (after - before) / len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = stored_rows(args.items)
+    model = bytes_per_item(InventoryItem.model_validate_json, rows)
+    record = bytes_per_item(InventoryRecord.from_json, rows)
+    print(f"{'representation':>16} {'bytes/item':>11}")
+    print(f"{'InventoryItem':>16} {model:>11.0f}")
+    print(f"{'InventoryRecord':>16} {record:>11.0f}  ({model / record:.1f}x smaller)")
@@ -0,0 +1,49 @@
+"""N concurrent lookups of one UPC against a fake Open Food Facts server.
+
+    python -m benchmarks.bench_singleflight --concurrency 50 --latency 0.2
+
+Compares the uncoalesced lookup path with fetch_product_info, which should
+send exactly one upstream request per burst.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="kitchenhelper-bench-"))
+
+from benchmarks.fake_upstreams import create_fake_off_app, serve_in_thread  # noqa: E402
+import main  # noqa: E402
+
+
+async def burst(lookup, upc: str, concurrency: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[lookup(upc) for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+
+async def run(concurrency: int, latency: float):
+    fake = create_fake_off_app(latency)
+    main.off_client.base_url = serve_in_thread(fake) + "/api/v0/product"
+    await main.off_client.start()
+
+    fake.state.calls = 0
+    elapsed = await burst(main._fetch_and_cache_product, "4006381333931", concurrency)
+    print(f"uncoalesced: {concurrency} lookups -> {fake.state.calls} upstream calls in {elapsed * 1000:.0f} ms")
+
+    fake.state.calls = 0
+    elapsed = await burst(main.fetch_product_info, "4006381333948", concurrency)
+    print(f"single-flight: {concurrency} lookups -> {fake.state.calls} upstream calls in {elapsed * 1000:.0f} ms")
+    assert fake.state.calls == 1, "concurrent same-UPC lookups must share one upstream call"
+
+    await main.off_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake upstream latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.latency))
@@ -0,0 +1,79 @@
+"""Store locator query latency on a synthetic catalogue, against a full scan.
+
+    python -m benchmarks.bench_stores --stores 50000 --queries 2000 --k 20
+
+Stores are scattered around Canadian city centres with random types and price
+levels. Each query point is checked against a brute-force haversine scan of
+the whole catalogue, so the report also confirms the grid returns the same
+stores.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from stores import Store, StoreIndex, haversine_km
+
+CITIES = [
+    (43.6532, -79.3832), (45.5019, -73.5674), (49.2827, -123.1207), (51.0447, -114.0719),
+    (53.5461, -113.4938), (45.4215, -75.6972), (49.8951, -97.1384), (44.6488, -63.5752),
+]
+TYPES = ["grocery_store", "supermarket", "discount_store", "organic_store", "convenience_store", "department_store"]
+
+
+def catalogue(n: int, rng: random.Random):
+    stores = []
+    for i in range(n):
+        lat, lng = rng.choice(CITIES)
+        stores.append(Store(
+            id=str(i), name=f"Store {i}", address="",
+            lat=lat + rng.gauss(0, 0.3), lng=lng + rng.gauss(0, 0.4),
+            rating=round(rng.uniform(3, 5), 1), price_level="$" * rng.randint(1, 3),
+            types=tuple(rng.sample(TYPES, 2)),
+        ))
+    return stores
+
+
+def per_query_ms(fn, points) -> float:
+    start = time.perf_counter()
+    for lat, lng in points:
+        fn(lat, lng)
+    return (time.perf_counter() - start) * 1000 / len(points)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stores", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--radius", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(19)
+    stores = catalogue(args.stores, rng)
+    start = time.perf_counter()
+    index = StoreIndex(stores)
+    print(f"indexed {len(index)} stores in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    points = [(lat + rng.gauss(0, 0.4), lng + rng.gauss(0, 0.5)) for lat, lng in rng.choices(CITIES, k=args.queries)]
+    lat, lng = index.lat, index.lng
+
+    def scan(qlat, qlng):
+        distances = haversine_km(qlat, qlng, lat, lng)
+        return np.sort(distances)[: args.k]
+
+    queries = {
+        f"nearest k={args.k}": lambda a, b: index.nearest(a, b, k=args.k),
+        f"within {args.radius:g} km": lambda a, b: index.within(a, b, args.radius),
+        "nearest, filtered": lambda a, b: index.nearest(a, b, k=args.k, types=["organic_store"], price_levels=["$", "$$"]),
+        "full scan": scan,
+    }
+    print(f"{'query':>20} {'ms/query':>9}")
+    for name, fn in queries.items():
+        print(f"{name:>20} {per_query_ms(fn, points):>9.3f}")
+
+    mismatched = sum(
+        not np.allclose([d for _, d in index.nearest(a, b, k=args.k)], scan(a, b)) for a, b in points
+    )
+    print(f"results differing from the full scan: {mismatched}/{len(points)}")
@@ -0,0 +1,187 @@
+"""Local stand-ins for the third-party services the backend talks to.
+
+Run a fake OpenAI-compatible chat completion server with:
+
+    python -m benchmarks.fake_upstreams llm --port 9100 --latency 0.5
+
+and start the API with OPENAI_BASE_URL=http://127.0.0.1:9100/v1 so every AI
+endpoint runs against it instead of the real service. Likewise
+
+    python -m benchmarks.fake_upstreams off --port 9200
+
+serves Open Food Facts lookups for OFF_API_BASE=http://127.0.0.1:9200/api/v0/product.
+UPCs starting with "000" are reported as unknown products.
+
+Both fakes take --jitter (latency varies uniformly by that fraction either
+way) and --error-rate (that share of requests fail with a 5xx), drawn from a
+seeded generator so runs are repeatable.
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class _Faults:
+    """Latency jitter and error injection shared by the fakes"""
+
+    def __init__(self, latency: float, jitter: float, error_rate: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    async def delay(self):
+        spread = self.latency * self.jitter
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-spread, spread)))
+
+    def fail(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+
+def create_fake_llm_app(
+    latency: float = 0.0,
+    reply: str = "42",
+    token_interval: float = 0.01,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+) -> FastAPI:
+    """Chat completion server that answers every prompt with `reply` after `latency` seconds.
+
+    Streaming requests get `reply` word by word, one chunk every `token_interval` seconds.
+    """
+    app = FastAPI(title="Fake chat completions")
+    app.state.calls = 0
+    faults = _Faults(latency, jitter, error_rate, seed)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        await faults.delay()
+        if faults.fail():
+            return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=500)
+        if body.get("stream"):
+            return StreamingResponse(_stream_chunks(body, reply, token_interval), media_type="text/event-stream")
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": _usage(body, reply),
+        }
+
+    return app
+
+
+async def _stream_chunks(body: dict, reply: str, token_interval: float):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    words = reply.split(" ")
+    for i, word in enumerate(words):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else " " + word},
+                    "finish_reason": None if i < len(words) - 1 else "stop",
+                }
+            ],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(token_interval)
+    if (body.get("stream_options") or {}).get("include_usage"):
+        usage = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": body.get("model", "fake"), "choices": [], "usage": _usage(body, reply)}
+        yield f"data: {json.dumps(usage)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def _usage(body: dict, reply: str) -> dict:
+    """Rough token counts (4 characters per token), so token metrics have something to count"""
+    prompt = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+    completion = max(1, len(reply) // 4)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def create_fake_off_app(latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """Open Food Facts product API; every UPC not starting with "000" is a known product"""
+    app = FastAPI(title="Fake Open Food Facts")
+    app.state.calls = 0
+    faults = _Faults(latency, jitter, error_rate, seed)
+
+    @app.get("/api/v0/product/{upc}.json")
+    async def product(upc: str):
+        app.state.calls += 1
+        await faults.delay()
+        if faults.fail():
+            return JSONResponse({"status": 0, "status_verbose": "injected failure"}, status_code=503)
+        if upc.startswith("000"):
+            return {"status": 0, "status_verbose": "product not found", "code": upc}
+        return {
+            "status": 1,
+            "code": upc,
+            "product": {
+                "product_name": f"Test product {upc[-4:]}",
+                "brands": "Acme",
+                "categories": "Dairies,Milks",
+                "categories_tags": ["en:dairies", "en:milks"],
+                "nutriments": {"energy-kcal_100g": 64, "fat_100g": 3.6, "proteins_100g": 3.3},
+                "image_url": "",
+            },
+        }
+
+    return app
+
+
+def serve_in_thread(app: FastAPI) -> str:
+    """Start `app` on a free local port in a daemon thread and return its base URL"""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("service", choices=["llm", "off"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--reply", default="42")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency varies by up to this fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 5xx")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.service == "llm":
+        fake = create_fake_llm_app(args.latency, args.reply, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    else:
+        fake = create_fake_off_app(args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    uvicorn.run(fake, host=args.host, port=args.port)
@@ -0,0 +1,340 @@
+"""Mixed-workload load test of the API against local upstream stand-ins.
+
+    python -m benchmarks.loadtest --users 20 --duration 30 --output results.json
+    python -m benchmarks.loadtest --users 20 --duration 30 --compare baseline.json
+
+Starts the fake Open Food Facts and chat-completion servers and the app
+itself (uvicorn, one worker, fresh DATA_DIR) as subprocesses. Each virtual
+user is its own household and loops through a shopping session: scan a UPC
+(GET /product, some unknown), add it (POST /inventory), list the pantry
+(GET /inventory) and, every few rounds, ask for a meal plan (POST /mealplan).
+UPCs and prices come from one seeded generator, so runs with the same flags
+send the same mix of requests.
+
+The report gives throughput and p50/p95/p99 latency per endpoint for the mixed
+phase, then the server's resident memory growth while each endpoint is driven
+on its own. It is printed as a table and written as JSON with the run's flags
+and git commit; --compare reads an earlier JSON file and exits with status 1
+when an endpoint's p95 or throughput regressed by more than --threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("scan", "add", "list", "mealplan")
+# Share of scans for UPCs the fake reports as unknown
+UNKNOWN_SHARE = 0.1
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    """Resident set size of a process in MiB (Linux /proc)"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class RssSampler:
+    """Polls a process's RSS in a thread and keeps the peak"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid, self.interval = pid, interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_mb(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_mb(self.pid)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def start_process(args: List[str], env: Dict[str, str], port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(args)} exited with status {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{' '.join(args)} did not start listening on port {port}")
+
+
+def start_servers(args, data_dir: str):
+    """The two fakes and the app; returns (processes, app base URL)"""
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    off_port, llm_port, app_port = free_port(), free_port(), free_port()
+    fault_flags = ["--jitter", str(args.jitter), "--error-rate", str(args.error_rate), "--seed", str(args.seed)]
+    processes = [
+        start_process(
+            ["-m", "benchmarks.fake_upstreams", "off", "--port", str(off_port), "--latency", str(args.off_latency), *fault_flags],
+            env, off_port,
+        ),
+        start_process(
+            ["-m", "benchmarks.fake_upstreams", "llm", "--port", str(llm_port), "--latency", str(args.llm_latency), *fault_flags],
+            env, llm_port,
+        ),
+    ]
+    app_env = {
+        **env,
+        "DATA_DIR": data_dir,
+        "OPENAI_API_KEY": "loadtest",
+        "OFF_API_BASE": f"http://127.0.0.1:{off_port}/api/v0/product",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "LOG_LEVEL": "warning",
+    }
+    processes.append(start_process(
+        ["-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning", "--no-access-log"],
+        app_env, app_port,
+    ))
+    return processes, f"http://127.0.0.1:{app_port}"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+
+    async def call(self, name: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+            failed = response.status_code >= 500
+        except httpx.HTTPError:
+            response, failed = None, True
+        self.latencies[name].append(time.perf_counter() - start)
+        if failed:
+            self.errors[name] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        results = {}
+        for name in ENDPOINTS:
+            samples = np.array(self.latencies[name]) * 1000
+            if not len(samples):
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            results[name] = {
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "mean_ms": round(float(samples.mean()), 2),
+                "max_ms": round(float(samples.max()), 2),
+            }
+        return results
+
+
+class Workload:
+    """Seeded request generator for the virtual users"""
+
+    def __init__(self, seed: int, catalogue: int, mealplan_every: int):
+        self.rng = random.Random(seed)
+        self.catalogue = catalogue
+        self.mealplan_every = mealplan_every
+
+    def upc(self) -> str:
+        if self.rng.random() < UNKNOWN_SHARE:
+            return f"000{self.rng.randrange(10**9):09d}"
+        # A shared catalogue, so concurrent users also hit the product cache
+        return f"4{self.rng.randrange(self.catalogue):011d}"
+
+    def price(self) -> float:
+        return round(self.rng.uniform(1, 12), 2)
+
+
+async def user(client: httpx.AsyncClient, household: str, workload: Workload, recorder: Recorder, deadline: float):
+    headers = {"X-Household-Id": household}
+    rounds = 0
+    while time.monotonic() < deadline:
+        upc, price = workload.upc(), workload.price()
+        await recorder.call("scan", client.get(f"/product/{upc}", headers=headers))
+        await recorder.call("add", client.post(
+            "/inventory", headers=headers, json={"upc": upc, "purchase_price": price, "store": "Loadtest"}
+        ))
+        await recorder.call("list", client.get("/inventory", headers=headers))
+        rounds += 1
+        if rounds % workload.mealplan_every == 0:
+            await recorder.call("mealplan", client.post("/mealplan", headers=headers, json={"days": 3, "members": 2}))
+
+
+async def mixed_phase(base_url: str, args, pid: int) -> dict:
+    workload = Workload(args.seed, args.catalogue, args.mealplan_every)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        rss_start = rss_mb(pid)
+        with RssSampler(pid) as sampler:
+            start = time.monotonic()
+            deadline = start + args.duration
+            await asyncio.gather(*[
+                user(client, f"loadtest-{i}", workload, recorder, deadline) for i in range(args.users)
+            ])
+            elapsed = time.monotonic() - start
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "endpoints": recorder.summary(elapsed),
+        "memory_mb": {"start": round(rss_start, 1), "end": round(rss_mb(pid), 1), "peak": round(sampler.peak, 1)},
+    }
+
+
+async def isolated_phase(base_url: str, args, pid: int) -> Dict[str, dict]:
+    """Server RSS growth while one endpoint at a time is driven at the same concurrency"""
+    workload = Workload(args.seed + 1, args.catalogue, 1)
+    memory = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for name in ENDPOINTS:
+            count = args.isolated_requests if name != "mealplan" else max(1, args.isolated_requests // 10)
+            semaphore = asyncio.Semaphore(args.users)
+            recorder = Recorder()
+
+            async def one(i: int):
+                headers = {"X-Household-Id": f"isolated-{i % args.users}"}
+                async with semaphore:
+                    if name == "scan":
+                        request = client.get(f"/product/{workload.upc()}", headers=headers)
+                    elif name == "add":
+                        request = client.post("/inventory", headers=headers, json={
+                            "upc": workload.upc(), "purchase_price": workload.price(), "store": "Loadtest",
+                        })
+                    elif name == "list":
+                        request = client.get("/inventory", headers=headers)
+                    else:
+                        request = client.post("/mealplan", headers=headers, json={"days": 3, "members": 2})
+                    await recorder.call(name, request)
+
+            before = rss_mb(pid)
+            with RssSampler(pid) as sampler:
+                await asyncio.gather(*[one(i) for i in range(count)])
+            after = rss_mb(pid)
+            memory[name] = {
+                "requests": count,
+                "rss_before_mb": round(before, 1),
+                "rss_growth_mb": round(after - before, 1),
+                "rss_peak_growth_mb": round(sampler.peak - before, 1),
+            }
+    return memory
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict):
+    mixed = report["mixed"]
+    print(f"mixed workload: {report['config']['users']} users for {mixed['elapsed_s']} s")
+    print(f"{'endpoint':>9} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mem +MB':>8}")
+    for name, row in mixed["endpoints"].items():
+        growth = report["memory_by_endpoint"].get(name, {}).get("rss_growth_mb", 0.0)
+        print(
+            f"{name:>9} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {growth:>8.1f}"
+        )
+    memory = mixed["memory_mb"]
+    print(f"server RSS: {memory['start']} MB at start, {memory['peak']} MB peak, {memory['end']} MB at end")
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """Endpoints whose p95 grew, or throughput fell, by more than `threshold` (a fraction)"""
+    regressions = []
+    old = baseline.get("mixed", {}).get("endpoints", {})
+    for name, row in report["mixed"]["endpoints"].items():
+        before = old.get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and row["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {row['p95_ms']} ms")
+        if before["rps"] and row["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['rps']} -> {row['rps']} req/s")
+    return regressions
+
+
+def main(args) -> int:
+    data_dir = tempfile.mkdtemp(prefix="kitchenhelper-loadtest-")
+    processes, base_url = start_servers(args, data_dir)
+    app_pid = processes[-1].pid
+    try:
+        mixed = asyncio.run(mixed_phase(base_url, args, app_pid))
+        memory = asyncio.run(isolated_phase(base_url, args, app_pid))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    report = {"commit": git_commit(), "timestamp": int(time.time()), "config": config, "mixed": mixed, "memory_by_endpoint": memory}
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        print(f"compared with {args.compare} (commit {baseline.get('commit')}): {len(regressions)} regression(s)")
+        for line in regressions:
+            print(f"  {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of mixed workload")
+    parser.add_argument("--mealplan-every", type=int, default=5, help="rounds between meal plan requests")
+    parser.add_argument("--catalogue", type=int, default=500, help="distinct known UPCs")
+    parser.add_argument("--isolated-requests", type=int, default=200, help="requests per endpoint in the memory phase")
+    parser.add_argument("--off-latency", type=float, default=0.05, help="fake Open Food Facts latency in seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake completion latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="upstream latency varies by up to this fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream requests that fail")
+    parser.add_argument("--seed", type=int, default=23)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95/throughput change, as a fraction")
+    sys.exit(main(parser.parse_args()))
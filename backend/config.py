@@ -4,3 +4,66 @@ import os
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # No hardcoded API keys should be present here.
+
+# LLM gateway settings. OPENAI_BASE_URL can point at a local fake completion
+# server (see benchmarks/fake_upstreams.py) for development and load testing.
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Open Food Facts lookups and the on-disk product cache
+OFF_API_BASE = os.getenv("OFF_API_BASE", "https://world.openfoodfacts.org/api/v0/product")
+OFF_TIMEOUT = float(os.getenv("OFF_TIMEOUT", "3"))
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+os.makedirs(DATA_DIR, exist_ok=True)
+PRODUCT_CACHE_DB = os.getenv("PRODUCT_CACHE_DB", os.path.join(DATA_DIR, "product_cache.db"))
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "2048"))
+SHELF_LIFE_DB = os.getenv("SHELF_LIFE_DB", os.path.join(DATA_DIR, "shelf_life.db"))
+STORAGE_DB = os.getenv("STORAGE_DB", os.path.join(DATA_DIR, "kitchen.db"))
+
+# Bulk inventory import: rows per request, uploaded file size and concurrent UPC lookups
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "5000"))
+BULK_IMPORT_MAX_UPLOAD_BYTES = int(os.getenv("BULK_IMPORT_MAX_UPLOAD_BYTES", str(2 * 1024 * 1024)))
+BULK_LOOKUP_CONCURRENCY = int(os.getenv("BULK_LOOKUP_CONCURRENCY", "8"))
+
+# AI endpoint response cache
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "900"))
+
+# Upper bounds for the inventory table in AI prompts (see prompts.py)
+PROMPT_MAX_ROWS = int(os.getenv("PROMPT_MAX_ROWS", "40"))
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+
+# Food photo analysis (POST /analyze-food): OCR worker processes, queue bound and hash cache
+VISION_WORKERS = int(os.getenv("VISION_WORKERS", str(os.cpu_count() or 1)))
+VISION_MAX_PENDING = int(os.getenv("VISION_MAX_PENDING", "32"))
+VISION_CACHE_SIZE = int(os.getenv("VISION_CACHE_SIZE", "512"))
+VISION_MAX_UPLOAD_BYTES = int(os.getenv("VISION_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+BARCODE_BATCH_MAX = int(os.getenv("BARCODE_BATCH_MAX", "20"))
+
+# Store locator catalogue (CSV or GeoJSON; the built-in Toronto list when missing) and its grid cell size
+STORES_PATH = os.getenv("STORES_PATH", os.path.join(DATA_DIR, "stores.csv"))
+STORE_GRID_DEG = float(os.getenv("STORE_GRID_DEG", "0.05"))
+
+# Postal-code centroids for geocoding saved locations (CSV: postal_code,lat,lng,city)
+GEOCODE_PATH = os.getenv("GEOCODE_PATH", os.path.join(DATA_DIR, "postal_codes.csv"))
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "4096"))
+
+# Extra recipes for local "what can I eat" matching (JSON list; the built-in recipes are always loaded)
+RECIPES_PATH = os.getenv("RECIPES_PATH", os.path.join(DATA_DIR, "recipes.json"))
+RECIPE_MATCH_LIMIT = int(os.getenv("RECIPE_MATCH_LIMIT", "10"))
+
+# Households: one SQLite shard each under TENANT_DIR (the default household uses STORAGE_DB);
+# shards idle for TENANT_IDLE_TTL seconds are closed, and at most TENANT_MAX_OPEN stay open
+TENANT_DIR = os.getenv("TENANT_DIR", os.path.join(DATA_DIR, "households"))
+TENANT_IDLE_TTL = float(os.getenv("TENANT_IDLE_TTL", "600"))
+TENANT_MAX_OPEN = int(os.getenv("TENANT_MAX_OPEN", "256"))
+TENANT_EVICT_INTERVAL = float(os.getenv("TENANT_EVICT_INTERVAL", "60"))
+
+# Logging and instrumentation: JSON log lines at LOG_LEVEL, with per-lookup events
+# sampled at LOG_SAMPLE_RATE; PROFILE_REQUESTS=all profiles every request, =header only
+# those sent with "X-Profile: 1" (the breakdown is logged and returned as Server-Timing)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "off")
@@ -0,0 +1,142 @@
+"""Postal-code geocoding from a local centroid dataset.
+
+Postal codes are normalised (upper case, no spaces) and looked up by their
+longest known prefix: the full code, then its 3-character prefix (a Canadian
+forward sortation area or a US ZIP sectional centre), then, for Canadian
+codes, its first letter (a province or region). Prefix centroids are the mean
+of the codes under them unless the dataset lists the prefix itself. The dataset
+is a CSV of `postal_code,lat,lng[,city]` rows; a small built-in table of
+regional centroids is always loaded underneath it. Lookups never touch the
+network and are memoised per (postal code, city).
+"""
+import csv
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PREFIX_LENGTHS = (3, 1)
+
+# Regional centroids served without a dataset: the first letter of a Canadian
+# postal code identifies a province or region, plus a few FSAs and US ZIP codes
+BUILTIN_CENTROIDS: List[Tuple[str, float, float, str]] = [
+    ("A", 47.5615, -52.7126, "St. John's, NL"),
+    ("B", 44.6488, -63.5752, "Halifax, NS"),
+    ("C", 46.2382, -63.1311, "Charlottetown, PE"),
+    ("E", 46.0878, -64.7782, "Moncton, NB"),
+    ("G", 46.8139, -71.2080, "Quebec City, QC"),
+    ("H", 45.5019, -73.5674, "Montreal, QC"),
+    ("J", 45.4042, -71.8929, "Sherbrooke, QC"),
+    ("K", 45.4215, -75.6972, "Ottawa, ON"),
+    ("L", 43.2557, -79.8711, "Hamilton, ON"),
+    ("M", 43.6532, -79.3832, "Toronto, ON"),
+    ("N", 42.9849, -81.2453, "London, ON"),
+    ("P", 46.4917, -80.9930, "Sudbury, ON"),
+    ("R", 49.8951, -97.1384, "Winnipeg, MB"),
+    ("S", 50.4452, -104.6189, "Regina, SK"),
+    ("T", 51.0447, -114.0719, "Calgary, AB"),
+    ("V", 49.2827, -123.1207, "Vancouver, BC"),
+    ("X", 62.4540, -114.3718, "Yellowknife, NT"),
+    ("Y", 60.7212, -135.0568, "Whitehorse, YT"),
+    ("M5V", 43.6426, -79.3871, "Toronto, ON"),
+    ("10001", 40.7505, -73.9934, "New York, NY"),
+    ("90210", 34.1030, -118.4105, "Beverly Hills, CA"),
+    ("60601", 41.8857, -87.6228, "Chicago, IL"),
+    ("77001", 29.7604, -95.3698, "Houston, TX"),
+    ("33101", 25.7617, -80.1918, "Miami, FL"),
+    ("98101", 47.6062, -122.3321, "Seattle, WA"),
+]
+
+_NON_ALNUM = re.compile(r"[^0-9A-Z]")
+
+
+@dataclass(frozen=True, slots=True)
+class GeoPoint:
+    lat: float
+    lng: float
+    precision: str  # "postal_code", "prefix", "region" or "city"
+    matched: str
+    city: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {"lat": self.lat, "lng": self.lng, "precision": self.precision, "matched": self.matched, "city": self.city}
+
+
+def normalize_postal_code(code: str) -> str:
+    return _NON_ALNUM.sub("", (code or "").upper())
+
+
+def _city_key(city: str) -> str:
+    # "Toronto, ON" and "toronto" both become "toronto"
+    return (city or "").split(",")[0].strip().lower()
+
+
+class Geocoder:
+    def __init__(self, rows: Iterable[Tuple[str, float, float, Optional[str]]] = (), cache_size: int = 4096):
+        self._points: Dict[str, GeoPoint] = {}
+        self._cities: Dict[str, GeoPoint] = {}
+        sums: Dict[str, List[float]] = {}
+        for code, lat, lng, city in [*BUILTIN_CENTROIDS, *rows]:
+            code = normalize_postal_code(code)
+            if not code:
+                continue
+            self._points[code] = GeoPoint(lat, lng, self._precision(code), code, city)
+            for length in PREFIX_LENGTHS:
+                # Single-character regions only mean something for Canadian (lettered) codes
+                if len(code) > length and (length > 1 or code[0].isalpha()):
+                    total = sums.setdefault(code[:length], [0.0, 0.0, 0])
+                    total[0] += lat
+                    total[1] += lng
+                    total[2] += 1
+            if city:
+                self._cities.setdefault(_city_key(city), GeoPoint(lat, lng, "city", code, city))
+        # Prefixes without their own row get the mean of the codes under them
+        for prefix, (lat, lng, count) in sums.items():
+            if prefix not in self._points:
+                self._points[prefix] = GeoPoint(lat / count, lng / count, self._precision(prefix), prefix)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @staticmethod
+    def _precision(code: str) -> str:
+        if len(code) == 1:
+            return "region"
+        return "prefix" if len(code) in PREFIX_LENGTHS else "postal_code"
+
+    def lookup(self, postal_code: str) -> Optional[GeoPoint]:
+        """Centroid of the longest known prefix of a postal code"""
+        code = normalize_postal_code(postal_code)
+        for length in (len(code), *[n for n in PREFIX_LENGTHS if n < len(code)]):
+            point = self._points.get(code[:length])
+            if point is not None:
+                return point
+        return None
+
+    def _resolve(self, postal_code: str, city: str = "") -> Optional[GeoPoint]:
+        """The postal code's centroid, or the city's when the code is unknown"""
+        point = self.lookup(postal_code)
+        # A code matched only to its region is less precise than a known city
+        if point is None or point.precision == "region":
+            point = self._cities.get(_city_key(city)) or point
+        return point
+
+    def cache_info(self) -> dict:
+        info = self.resolve.cache_info()
+        return {"entries": len(self), "hits": info.hits, "misses": info.misses, "cached": info.currsize}
+
+
+def load_centroids(path: str) -> List[Tuple[str, float, float, Optional[str]]]:
+    with open(path, newline="") as f:
+        return [
+            (row["postal_code"], float(row["lat"]), float(row["lng"]), row.get("city") or None)
+            for row in csv.DictReader(f)
+        ]
+
+
+def load_geocoder(path: Optional[str], cache_size: int = 4096) -> Geocoder:
+    """Geocoder over the dataset at `path` (if present) and the built-in centroids"""
+    rows = load_centroids(path) if path and os.path.exists(path) else []
+    return Geocoder(rows, cache_size)
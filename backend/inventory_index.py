@@ -0,0 +1,140 @@
+"""In-memory indexes over the inventory.
+
+Items are kept by id (in insertion order), by UPC, and in per-day expiry
+buckets, so lookups, delete-by-id, delete-by-UPC and "expiring within N days"
+queries touch only the items involved instead of scanning the whole pantry.
+"""
+import bisect
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from records import InventoryRecord
+
+
+class InventoryIndex:
+    def __init__(self, items: Iterable[InventoryRecord] = ()):
+        self._by_id: "OrderedDict[str, InventoryRecord]" = OrderedDict()
+        self._by_upc: Dict[str, "OrderedDict[str, None]"] = {}
+        self._by_day: Dict[int, Set[str]] = {}
+        self._days: List[int] = []  # sorted keys of _by_day
+        self._no_expiry: "OrderedDict[str, None]" = OrderedDict()
+        self.total_value = 0.0
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[InventoryRecord]:
+        return iter(list(self._by_id.values()))
+
+    def get(self, item_id: str) -> Optional[InventoryRecord]:
+        return self._by_id.get(item_id)
+
+    def add(self, item: InventoryRecord):
+        if item.id in self._by_id:
+            self.remove(item.id)
+        self._by_id[item.id] = item
+        self._by_upc.setdefault(item.upc, OrderedDict())[item.id] = None
+        self._link_expiry(item)
+        self.total_value += _value(item)
+
+    def replace(self, item: InventoryRecord):
+        """Swap in a new version of an item, keeping its insertion position"""
+        old = self._by_id.get(item.id)
+        if old is None:
+            self.add(item)
+            return
+        self._unlink_expiry(old)
+        if old.upc != item.upc:
+            self._unlink_upc(old)
+            self._by_upc.setdefault(item.upc, OrderedDict())[item.id] = None
+        self._by_id[item.id] = item
+        self._link_expiry(item)
+        self.total_value += _value(item) - _value(old)
+
+    def remove(self, item_id: str) -> Optional[InventoryRecord]:
+        item = self._by_id.pop(item_id, None)
+        if item is None:
+            return None
+        self._unlink_upc(item)
+        self._unlink_expiry(item)
+        self.total_value -= _value(item)
+        return item
+
+    def ids_for_upc(self, upc: str, limit: Optional[int] = None) -> List[str]:
+        """Ids of items with `upc`, oldest first"""
+        ids = self._by_upc.get(upc)
+        if not ids:
+            return []
+        if limit is None:
+            return list(ids)
+        out = []
+        for item_id in ids:
+            if len(out) >= limit:
+                break
+            out.append(item_id)
+        return out
+
+    def remove_by_upc(self, upc: str, quantity: int) -> List[InventoryRecord]:
+        """Remove up to `quantity` items matching `upc`, oldest first"""
+        return [self.remove(item_id) for item_id in self.ids_for_upc(upc, quantity)]
+
+    def clear(self):
+        self.__init__()
+
+    def expiring_within(self, days: int, now: Optional[datetime] = None) -> List[InventoryRecord]:
+        """Items whose `(expiry - now).days <= days` (already expired included), soonest first"""
+        cutoff = (now or datetime.utcnow()) + timedelta(days=days + 1)
+        last_day = cutoff.toordinal()
+        out: List[InventoryRecord] = []
+        for day in self._days[: bisect.bisect_right(self._days, last_day)]:
+            items = [self._by_id[item_id] for item_id in self._by_day[day]]
+            if day == last_day:
+                items = [item for item in items if item.expiry < cutoff]
+            out.extend(sorted(items, key=lambda item: item.expiry))
+        return out
+
+    def by_expiry(self) -> List[InventoryRecord]:
+        """Every item, soonest expiry first; items without an expiry come last"""
+        out: List[InventoryRecord] = []
+        for day in self._days:
+            out.extend(sorted((self._by_id[item_id] for item_id in self._by_day[day]), key=lambda item: item.expiry))
+        out.extend(self._by_id[item_id] for item_id in self._no_expiry)
+        return out
+
+    def _link_expiry(self, item: InventoryRecord):
+        if item.expiry is None:
+            self._no_expiry[item.id] = None
+        else:
+            day = item.expiry.toordinal()
+            bucket = self._by_day.get(day)
+            if bucket is None:
+                bucket = self._by_day[day] = set()
+                bisect.insort(self._days, day)
+            bucket.add(item.id)
+
+    def _unlink_upc(self, item: InventoryRecord):
+        ids = self._by_upc.get(item.upc)
+        if ids is not None:
+            ids.pop(item.id, None)
+            if not ids:
+                del self._by_upc[item.upc]
+
+    def _unlink_expiry(self, item: InventoryRecord):
+        if item.expiry is None:
+            self._no_expiry.pop(item.id, None)
+            return
+        day = item.expiry.toordinal()
+        bucket = self._by_day.get(day)
+        if bucket is None:
+            return
+        bucket.discard(item.id)
+        if not bucket:
+            del self._by_day[day]
+            del self._days[bisect.bisect_left(self._days, day)]
+
+
+def _value(item: InventoryRecord) -> float:
+    return (item.purchase_price or 0) * item.quantity
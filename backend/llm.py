@@ -0,0 +1,215 @@
+"""Async gateway for chat completions.
+
+Every AI endpoint goes through a single LLMGateway so the app keeps one pooled
+AsyncOpenAI client for its whole lifetime instead of building a synchronous
+client per call. Calls are bounded by a semaphore, carry a per-call timeout and
+are cancelled when the HTTP client that asked for them disconnects.
+"""
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+from fastapi import Request
+from openai import AsyncOpenAI
+
+from config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_MODEL,
+    LLM_TIMEOUT,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+)
+from metrics import LLM_TIME_TO_FIRST_TOKEN, LLM_TOKENS, UPSTREAM_SECONDS
+
+UNAVAILABLE = "AI service temporarily unavailable"
+
+# How often a pending completion checks whether its HTTP client went away
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client went away while its completion was pending"""
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_key: Optional[str] = OPENAI_API_KEY,
+        base_url: Optional[str] = OPENAI_BASE_URL,
+        model: str = LLM_MODEL,
+        timeout: float = LLM_TIMEOUT,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._client: Optional[AsyncOpenAI] = None
+
+    async def start(self):
+        """Open the pooled HTTP client (called from the app lifespan)"""
+        if self._client is not None:
+            return
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency * 2,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+        )
+        self._client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=self._http,
+            max_retries=1,
+        )
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._client = None
+
+    async def complete(
+        self,
+        prompt: str,
+        system: str,
+        *,
+        temperature: float = 0.7,
+        timeout: Optional[float] = None,
+        request: Optional[Request] = None,
+    ) -> str:
+        """Run one chat completion and return its text.
+
+        Failures and timeouts come back as an "AI service temporarily
+        unavailable" message, matching what the endpoints always returned.
+        Raises ClientDisconnected if `request`'s client goes away first.
+        """
+        await self.start()
+        try:
+            content = await _cancel_on_disconnect(
+                self._create(prompt, system, temperature, timeout or self.timeout),
+                request,
+            )
+        except ClientDisconnected:
+            raise
+        except asyncio.TimeoutError:
+            return f"{UNAVAILABLE}: timed out"
+        except Exception as e:
+            return f"{UNAVAILABLE}: {str(e)}"
+        return content.strip() if content else "No response from AI"
+
+    async def _create(self, prompt: str, system: str, temperature: float, timeout: float) -> Optional[str]:
+        async with self._semaphore:
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                resp = await asyncio.wait_for(
+                    self._client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": system},
+                            {"role": "user", "content": prompt},
+                        ],
+                        temperature=temperature,
+                    ),
+                    timeout,
+                )
+                outcome = "ok"
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                raise
+            finally:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - start, upstream="llm", outcome=outcome)
+        _count_tokens(resp.usage)
+        return resp.choices[0].message.content
+
+    async def stream(
+        self,
+        prompt: str,
+        system: str,
+        *,
+        temperature: float = 0.7,
+        timeout: Optional[float] = None,
+        request: Optional[Request] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the completion's text as it is generated.
+
+        The consumer pulls one delta at a time, so a slow client slows the
+        upstream read instead of buffering the whole completion. `timeout`
+        bounds the wait for each delta; the stream stops with
+        ClientDisconnected if `request`'s client goes away.
+        """
+        await self.start()
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            start = time.perf_counter()
+            first = True
+            outcome = "error"
+            stream = await asyncio.wait_for(
+                self._client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=temperature,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                ),
+                timeout,
+            )
+            chunks = stream.__aiter__()
+            try:
+                while True:
+                    if request is not None and await request.is_disconnected():
+                        outcome = "disconnected"
+                        raise ClientDisconnected()
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        outcome = "ok"
+                        return
+                    # The last chunk carries usage and no choices
+                    _count_tokens(getattr(chunk, "usage", None))
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if first:
+                            LLM_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start)
+                            first = False
+                        yield chunk.choices[0].delta.content
+            finally:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - start, upstream="llm_stream", outcome=outcome)
+                await stream.close()
+
+
+def _count_tokens(usage):
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+
+
+async def _watch_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def _cancel_on_disconnect(coro, request: Optional[Request]):
+    """Await `coro`, cancelling it if `request`'s client disconnects first"""
+    if request is None:
+        return await coro
+
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(_watch_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            return task.result()
+        raise ClientDisconnected()
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
@@ -1,13 +1,77 @@
+import asyncio
+import csv
+import io
+import json
+import logging
 import os
-from typing import List, Dict, Optional
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
-import httpx
 import openai
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import BackgroundTasks, Depends, FastAPI, File, Header, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+
+from analytics import monthly_trend, ranked_totals, spending_report, summary_lines
+from barcode import decode_image, to_upc, try_decode_image
+from config import (
+    BULK_IMPORT_MAX_ROWS,
+    BULK_IMPORT_MAX_UPLOAD_BYTES,
+    BULK_LOOKUP_CONCURRENCY,
+    BARCODE_BATCH_MAX,
+    GEOCODE_CACHE_SIZE,
+    GEOCODE_PATH,
+    PROFILE_REQUESTS,
+    PRODUCT_CACHE_DB,
+    PRODUCT_CACHE_SIZE,
+    RECIPE_MATCH_LIMIT,
+    RECIPES_PATH,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    SHELF_LIFE_DB,
+    STORAGE_DB,
+    STORE_GRID_DEG,
+    STORES_PATH,
+    TENANT_DIR,
+    TENANT_EVICT_INTERVAL,
+    TENANT_IDLE_TTL,
+    TENANT_MAX_OPEN,
+    VISION_CACHE_SIZE,
+    VISION_MAX_PENDING,
+    VISION_MAX_UPLOAD_BYTES,
+    VISION_WORKERS,
+)
+from geocoding import load_geocoder
+from llm import UNAVAILABLE, ClientDisconnected, LLMGateway
+from metrics import InstrumentationMiddleware, cache_gauges, get_logger, log_event, registry, span
+from models import (
+    Budget,
+    EnhancedInventoryItem,
+    InventoryItem,
+    LocationUpdate,
+    MealPlanRequest,
+    PortionUsage,
+    PurchaseRecord,
+)
+from openfoodfacts import OpenFoodFactsClient, not_found_record
+from planner import MealPlanAllocation, plan_meals, servings_per_unit
+from prompts import inventory_table, name_list, purchases_table
+from product_cache import ProductCache
+from recipes import RecipeMatch, load_recipe_index
+from records import InventoryRecord
+from response_cache import ResponseCache
+from shelf_life import ShelfLifeEstimator
+from singleflight import SingleFlight
+from storage import InsufficientQuantity, Storage
+from stores import load_store_index
+from tenants import DEFAULT_HOUSEHOLD, InvalidHousehold, Tenant, TenantRegistry
+from vision import PipelineBusy, VisionPipeline, barcode_numbers
+
+logger = get_logger("api")
 
 # Load environment
 load_dotenv()
@@ -16,10 +80,7 @@ if not OPENAI_API_KEY:
     raise RuntimeError("Missing OPENAI_API_KEY in environment")
 openai.api_key = OPENAI_API_KEY
 
-# Free Open Food Facts API
-OFF_API_BASE = "https://world.openfoodfacts.org/api/v0/product"
-
-# Local product cache for common items
+# Pinned products that never need a lookup
 PRODUCT_CACHE = {
     "6001253010178": {
         "found": True,
@@ -33,7 +94,49 @@ PRODUCT_CACHE = {
     # Add more common products here
 }
 
-app = FastAPI(title="SmartPantry API")
+# Shared async LLM client, pooled for the lifetime of the app
+llm = LLMGateway(api_key=OPENAI_API_KEY)
+
+# Shared Open Food Facts client and the memory/SQLite product cache in front of it
+off_client = OpenFoodFactsClient()
+product_cache = ProductCache(PRODUCT_CACHE_DB, max_entries=PRODUCT_CACHE_SIZE)
+
+# Concurrent lookups of the same UPC share one upstream request
+product_lookups = SingleFlight()
+
+# AI answers keyed by a hash of their prompt, which embeds the inventory, so a write changes the key;
+# superseded entries are never cleared, they just expire after the TTL
+response_cache = ResponseCache(max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+# Postal-code centroids, so locations resolve to coordinates without a network call
+geocoder = load_geocoder(GEOCODE_PATH, GEOCODE_CACHE_SIZE)
+
+# Store catalogue with its spatial index
+store_locator = load_store_index(STORES_PATH, STORE_GRID_DEG)
+
+# Recipe dataset with its ingredient index, for "what can I eat" without an AI call
+recipe_index = load_recipe_index(RECIPES_PATH)
+
+# Food photo OCR in worker processes
+vision = VisionPipeline(VISION_WORKERS, max_pending=VISION_MAX_PENDING, cache_size=VISION_CACHE_SIZE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await llm.start()
+    await off_client.start()
+    product_cache.purge_expired()
+    await vision.start()
+    evictions = asyncio.create_task(tenants.run_evictions(TENANT_EVICT_INTERVAL))
+    yield
+    evictions.cancel()
+    tenants.close()
+    await vision.aclose()
+    await off_client.aclose()
+    await llm.aclose()
+
+
+app = FastAPI(title="SmartPantry API", lifespan=lifespan)
 
 # CORS—allow requests from React dev server
 app.add_middleware(
@@ -42,297 +145,342 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Inventory-Version", "X-Next-Cursor"],
 )
+# Outermost, so request latency includes CORS handling
+app.add_middleware(InstrumentationMiddleware, profile=PROFILE_REQUESTS)
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nobody is listening any more; 499 mirrors nginx's "client closed request"
+    return Response(status_code=499)
+
+# Durable per-household stores (one SQLite shard each, shared by every worker process on this host)
+tenants = TenantRegistry(TENANT_DIR, STORAGE_DB, idle_ttl=TENANT_IDLE_TTL, max_open=TENANT_MAX_OPEN)
+
+
+async def household(x_household_id: Optional[str] = Header(None)) -> AsyncIterator[Tenant]:
+    """The requesting household (X-Household-Id header; the default pantry without one)"""
+    household_id = x_household_id or DEFAULT_HOUSEHOLD
+    try:
+        TenantRegistry.validate(household_id)
+    except InvalidHousehold as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    async with tenants.session(household_id) as tenant:
+        yield tenant
+
+
+async def tenant_storage(tenant: Tenant = Depends(household)) -> Storage:
+    return tenant.storage
+
+DEFAULT_BUDGET: Dict[str, float] = {"monthly_budget": 0.0}
+DEFAULT_LOCATION: Dict[str, str] = {"zip_code": "M5V 3A8", "city": "Toronto, ON"}
+DEFAULT_COORDINATES = (43.6532, -79.3832)
+
+
+async def _read_upload(upload: UploadFile, max_bytes: int = VISION_MAX_UPLOAD_BYTES, kind: str = "Image") -> bytes:
+    """The uploaded file, or 413 if it is larger than `max_bytes` (never reads more than one byte past it)"""
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{upload.filename or kind} is too large")
+    data = await upload.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{upload.filename or kind} is too large")
+    return data
+
+
+UNKNOWN_FOOD = {"name": "Unknown Food Item", "category": "Other", "upc": None, "nutrition": {}}
+
+
+def match_label_text(text: str) -> Optional[dict]:
+    """A cached product for OCR'd label text: a printed barcode number first, then the name"""
+    for upc in barcode_numbers(text):
+        product = cached_product_info(upc)
+        if product and product.get("found"):
+            return {**product, "match": "barcode"}
+    product = product_cache.match_name(text)
+    return {**product, "match": "name"} if product else None
 
-# In-memory stores
-inventory: List["InventoryItem"] = []
-budget_state: Dict[str, float] = {"monthly_budget": 0.0, "spent_this_month": 0.0}
-user_location: Dict[str, str] = {"zip_code": "M5V 3A8", "city": "Toronto, ON"}
-purchase_history: List["PurchaseRecord"] = []
 
+@app.post("/analyze-food")
+async def analyze_food(image: UploadFile = File(...)):
+    """Identify a food product from a photo of its packaging.
 
-class InventoryItem(BaseModel):
-    id: Optional[str] = None  # Add ID field for React keys
-    upc: str
-    name: Optional[str] = None
-    purchase_price: Optional[float] = None
-    store: Optional[str] = None
-    quantity: int = Field(1, ge=1)
-    unit: str = "pieces"  # Add unit field
-    remaining_quantity: Optional[int] = None  # Add remaining quantity field
-    total_quantity: Optional[int] = None  # Add total quantity field
-    expiry: Optional[datetime] = None
-    expiry_date: Optional[str] = None  # Add expiry_date field for frontend
-    nutrition: Dict[str, float] = {}
-    category: Optional[str] = None
-    purchase_date: Optional[datetime] = None
+    OCR runs in the vision worker pool; the text is matched against products
+    already in the cache. Unrecognised photos come back as "Unknown Food Item"
+    with whatever text was read.
+    """
+    data = await _read_upload(image)
+    try:
+        with span("vision"):
+            result = await vision.analyze(data)
+    except PipelineBusy:
+        raise HTTPException(status_code=503, detail="Image analysis is busy, try again shortly", headers={"Retry-After": "1"})
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not read image")
+
+    product = match_label_text(result["text"]) if result["text"] else None
+    food = UNKNOWN_FOOD
+    if product:
+        food = {
+            "name": product["name"],
+            "category": product.get("category") or "Other",
+            "upc": product.get("upc"),
+            "nutrition": _numeric_nutrition(product.get("nutrition", {})),
+            "brand": product.get("brand", ""),
+            "image_url": product.get("image_url", ""),
+        }
+    return {
+        **food,
+        "match": product["match"] if product else None,
+        "text": result["text"][:500],
+        "ocr": result["ocr"],
+        "cached": result["cached"],
+    }
 
 
-class PurchaseRecord(BaseModel):
-    upc: str
-    item_name: str
-    price: float
-    store: str
-    date: datetime
-    quantity: int = 1
+async def _barcode_result(codes: List[str]) -> dict:
+    if not codes:
+        return {"found": False, "upc": None, "product": None}
+    upc = to_upc(codes[0])
+    return {"found": True, "upc": upc, "ean13": codes[0], "product": await fetch_product_info(upc)}
 
 
-class Budget(BaseModel):
-    monthly_budget: float = Field(..., gt=0)
+@app.post("/barcode")
+async def decode_barcode(image: UploadFile = File(...)):
+    """Decode an EAN-13/UPC-A barcode from a photo and return its product record"""
+    data = await _read_upload(image)
+    try:
+        with span("vision"):
+            codes = await vision.submit(decode_image, data)
+    except PipelineBusy:
+        raise HTTPException(status_code=503, detail="Image analysis is busy, try again shortly", headers={"Retry-After": "1"})
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not read image")
+    result = await _barcode_result(codes)
+    if not result["found"]:
+        raise HTTPException(status_code=422, detail="No barcode found in image")
+    return result
 
 
-class LocationUpdate(BaseModel):
-    zip_code: str
-    city: str
+@app.post("/barcode/batch")
+async def decode_barcodes(images: List[UploadFile] = File(...)):
+    """Decode several barcode photos in parallel; one result per image, in upload order"""
+    if len(images) > BARCODE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BARCODE_BATCH_MAX} images per batch")
+    payloads = [await _read_upload(image) for image in images]
+    try:
+        with span("vision"):
+            decoded = await vision.map(try_decode_image, payloads)
+    except PipelineBusy:
+        raise HTTPException(status_code=503, detail="Image analysis is busy, try again shortly", headers={"Retry-After": "1"})
 
+    async def result(index: int, codes: List[str], error: Optional[str]) -> dict:
+        entry = {"index": index, "filename": images[index].filename}
+        if error:
+            return {**entry, "found": False, "error": error}
+        return {**entry, **await _barcode_result(codes)}
 
-class MealPlanRequest(BaseModel):
-    days: int = Field(..., gt=0, le=14)
-    members: int = Field(..., gt=0)
+    return {"results": await asyncio.gather(*[result(i, *outcome) for i, outcome in enumerate(decoded)])}
 
 
-class EnhancedInventoryItem(BaseModel):
-    upc: Optional[str] = None  # Make UPC optional
-    name: Optional[str] = None
-    purchase_price: float = Field(..., gt=0)
-    store: str
-    quantity: int = Field(1, ge=1)
-    category: Optional[str] = None
-    unit: str = "pieces"  # Add unit field with default value
+@app.get("/analyze-food/stats")
+async def get_analyze_food_stats():
+    return vision.stats()
 
 
 # Add this before the location endpoints
-async def fetch_product_info(upc: str) -> dict:
-    """Fetch product information from Open Food Facts API with local cache"""
-    print(f"🔍 Fetching product info for UPC: {upc}")
-    
-    # Check local cache first (only for specific known products)
+def cached_product_info(upc: str) -> Optional[dict]:
+    """Product record from the pinned table or the product cache, without any network call"""
+    # Pinned products first, then the memory/SQLite cache (negative entries included)
     if upc in PRODUCT_CACHE:
-        print(f"✅ Found {upc} in local cache: {PRODUCT_CACHE[upc]['name']}")
+        log_event(logger, logging.DEBUG, "product.pinned", sample=0.1, upc=upc)
         return PRODUCT_CACHE[upc]
-    
-    print(f"🌐 UPC {upc} not in cache, fetching from Open Food Facts API...")
-    
+
+    cached = product_cache.get(upc)
+    if cached is not None:
+        log_event(logger, logging.DEBUG, "product.cache_hit", sample=0.1, upc=upc, found=cached.get("found"))
+    return cached
+
+
+async def fetch_product_info(upc: str) -> dict:
+    """Fetch product information from Open Food Facts API with local cache"""
+    with span("product_lookup"):
+        cached = cached_product_info(upc)
+        if cached is not None:
+            return cached
+
+        return await product_lookups.do(upc, lambda: _fetch_and_cache_product(upc))
+
+
+async def _fetch_and_cache_product(upc: str) -> dict:
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{OFF_API_BASE}/{upc}.json", timeout=3.0)  # Reduced timeout to 3 seconds
-            print(f"📡 API Response Status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"📦 API Response Data: {data}")
-                
-                if data.get("status") == 1:  # Product found
-                    product = data.get("product", {})
-                    result = {
-                        "found": True,
-                        "name": product.get("product_name", f"Product (UPC: {upc})"),
-                        "category": product.get("categories_tags", ["food"])[0] if product.get("categories_tags") else "food",
-                        "brand": product.get("brands", ""),
-                        "nutrition": product.get("nutriments", {}),
-                        "image_url": product.get("image_url", ""),
-                        "upc": upc
-                    }
-                    print(f"✅ Found product in API: {result['name']}")
-                    print(f"📋 Product details: {result}")
-                    
-                    # Only cache products that are actually found in the API AND have a real name
-                    if result['name'] and result['name'] != f"Product (UPC: {upc})":
-                        PRODUCT_CACHE[upc] = result
-                        print(f"💾 Cached product: {result['name']}")
-                    
-                    return result
-                else:
-                    print(f"❌ Product not found in Open Food Facts API for UPC: {upc}")
-                    print(f"📋 API Response: {data}")
-            else:
-                print(f"❌ API returned status {response.status_code} for UPC: {upc}")
+        result = await off_client.fetch(upc)
     except Exception as e:
-        print(f"❌ Error fetching product info for UPC {upc}: {e}")
-    
-    # Fallback for when API fails or product not found
-    print(f"⚠️ Using fallback for UPC: {upc}")
-    return {
-        "found": False,
-        "name": f"Product (UPC: {upc})",
-        "category": "food",
-        "brand": "",
-        "nutrition": {},
-        "image_url": "",
-        "upc": upc,
-        "error": "Product not found in database"
-    }
+        # Outages are not cached so the next scan retries
+        log_event(logger, logging.WARNING, "product.lookup_failed", upc=upc, error=str(e) or type(e).__name__)
+        return not_found_record(upc)
+
+    if result["found"] and result["name"] and result["name"] != f"Product (UPC: {upc})":
+        log_event(logger, logging.DEBUG, "product.found", sample=0.1, upc=upc)
+        product_cache.put(upc, result)
+    else:
+        # Unknown (or nameless) products are cached with the shorter negative TTL
+        log_event(logger, logging.INFO, "product.not_found", sample=0.1, upc=upc)
+        product_cache.put(upc, {**result, "found": False} if result["found"] else result)
+    return result
 
 @app.get("/product/{upc}")
 async def get_product_info(upc: str):
     """Get product information by UPC"""
     return await fetch_product_info(upc)
 
+
+@app.get("/product-cache/stats")
+async def get_product_cache_stats():
+    """Hit/miss counters for the product cache tiers"""
+    return {**product_cache.stats(), "coalescing": product_lookups.stats()}
+
+
+# Cache and pool state read at scrape time; latency and token metrics are recorded where they happen
+cache_gauges("product", product_cache.stats, hits=("memory_hits", "disk_hits"), misses=("misses",))
+cache_gauges("response", response_cache.stats, hits=("hits",), misses=("misses",))
+cache_gauges("vision", vision.stats, hits=("cache_hits",), misses=("analyzed",))
+cache_gauges("shelf_life", lambda: shelf_life.stats(), hits=("rule_hits", "memo_hits"), misses=("llm_items", "defaults"))
+cache_gauges("geocode", geocoder.cache_info, hits=("hits",), misses=("misses",))
+cache_gauges("recipe_names", recipe_index.stats, hits=("name_hits",), misses=("name_misses",))
+registry.gauge("tenants", "Household shards by state", "state", tenants.stats)
+registry.gauge("product_lookups", "Coalesced Open Food Facts lookups (calls, shared, in flight)", "stat", product_lookups.stats)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request, upstream, LLM token and cache metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Location endpoints
+def location_coordinates(store: Storage) -> Tuple[float, float]:
+    """Coordinates of the saved location: stored, else geocoded, else the default"""
+    saved = store.settings.get("location", DEFAULT_LOCATION)
+    if saved.get("lat") is not None and saved.get("lng") is not None:
+        return saved["lat"], saved["lng"]
+    point = geocoder.resolve(saved.get("zip_code", ""), saved.get("city", ""))
+    return (point.lat, point.lng) if point else DEFAULT_COORDINATES
+
+
 @app.post("/location")
-async def set_location(location: LocationUpdate):
-    user_location["zip_code"] = location.zip_code
-    user_location["city"] = location.city
+async def set_location(location: LocationUpdate, tenant: Tenant = Depends(household)):
+    saved = {"zip_code": location.zip_code, "city": location.city}
+    if location.lat is not None and location.lng is not None:
+        saved.update(lat=location.lat, lng=location.lng, precision="device")
+    else:
+        point = geocoder.resolve(location.zip_code, location.city)
+        if point is not None:
+            saved.update(lat=point.lat, lng=point.lng, precision=point.precision)
+    async with tenant.lock:
+        user_location = tenant.storage.settings.set("location", saved)
     return {"message": "Location updated", "location": user_location}
 
 
 @app.get("/location")
-async def get_location():
-    return user_location
+async def get_location(store: Storage = Depends(tenant_storage)):
+    return store.settings.get("location", DEFAULT_LOCATION)
+
+
+@app.get("/geocode")
+async def geocode(postal_code: str = "", city: str = ""):
+    """Coordinates for a postal code (or city) from the local centroid dataset"""
+    point = geocoder.resolve(postal_code, city)
+    if point is None:
+        raise HTTPException(status_code=404, detail="Unknown postal code")
+    return point.to_dict()
+
+
+@app.get("/geocode/stats")
+async def geocode_stats():
+    return geocoder.cache_info()
 
 
 @app.get("/nearby-stores")
-async def get_nearby_stores():
-    """Get nearby grocery stores and food options"""
-    # Get user location for context
-    location = user_location.get("city", "Toronto")
-    
-    # Mock data for Toronto area stores
-    toronto_stores = [
-        {
-            "id": 1,
-            "name": "Loblaws",
-            "address": "123 Queen St W, Toronto, ON",
-            "distance": "0.8 km",
-            "rating": 4.2,
-            "price_level": "$$",
-            "types": ["grocery_store", "supermarket"],
-            "position": {
-                "lat": 43.6532 + 0.01,
-                "lng": -79.3832 + 0.01
-            },
-            "hours": "7:00 AM - 11:00 PM",
-            "phone": "(416) 555-1234"
-        },
-        {
-            "id": 2,
-            "name": "Sobeys",
-            "address": "456 Yonge St, Toronto, ON",
-            "distance": "1.2 km",
-            "rating": 4.5,
-            "price_level": "$$",
-            "types": ["grocery_store"],
-            "position": {
-                "lat": 43.6532 - 0.008,
-                "lng": -79.3832 + 0.015
-            },
-            "hours": "7:00 AM - 10:00 PM",
-            "phone": "(416) 555-2345"
-        },
-        {
-            "id": 3,
-            "name": "No Frills",
-            "address": "789 Dundas St W, Toronto, ON",
-            "distance": "1.5 km",
-            "rating": 4.0,
-            "price_level": "$",
-            "types": ["grocery_store", "discount_store"],
-            "position": {
-                "lat": 43.6532 + 0.012,
-                "lng": -79.3832 - 0.005
-            },
-            "hours": "8:00 AM - 9:00 PM",
-            "phone": "(416) 555-3456"
-        },
-        {
-            "id": 4,
-            "name": "Walmart Supercenter",
-            "address": "321 Dufferin St, Toronto, ON",
-            "distance": "2.1 km",
-            "rating": 4.3,
-            "price_level": "$$",
-            "types": ["department_store", "grocery_store"],
-            "position": {
-                "lat": 43.6532 - 0.015,
-                "lng": -79.3832 - 0.01
-            },
-            "hours": "8:00 AM - 10:00 PM",
-            "phone": "(416) 555-4567"
-        },
-        {
-            "id": 5,
-            "name": "Whole Foods Market",
-            "address": "654 Avenue Rd, Toronto, ON",
-            "distance": "2.8 km",
-            "rating": 4.7,
-            "price_level": "$$$",
-            "types": ["grocery_store", "organic_store"],
-            "position": {
-                "lat": 43.6532 + 0.018,
-                "lng": -79.3832 + 0.02
-            },
-            "hours": "7:00 AM - 10:00 PM",
-            "phone": "(416) 555-5678"
-        },
-        {
-            "id": 6,
-            "name": "FreshCo",
-            "address": "987 Bloor St W, Toronto, ON",
-            "distance": "3.2 km",
-            "rating": 4.1,
-            "price_level": "$",
-            "types": ["grocery_store", "supermarket"],
-            "position": {
-                "lat": 43.6532 + 0.025,
-                "lng": -79.3832 - 0.015
-            },
-            "hours": "7:00 AM - 11:00 PM",
-            "phone": "(416) 555-6789"
-        }
-    ]
-    
-    return {"stores": toronto_stores}
+async def get_nearby_stores(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=500),
+    limit: int = Query(20, ge=1, le=200),
+    types: Optional[str] = Query(None, description="Comma-separated; stores with any of these types"),
+    price_level: Optional[str] = Query(None, description="Comma-separated, e.g. $,$$"),
+    store: Storage = Depends(tenant_storage),
+):
+    """Nearest grocery stores to the given point (or the saved location), closest first"""
+    if lat is None or lng is None:
+        lat, lng = location_coordinates(store)
+    nearest = store_locator.nearest(
+        lat,
+        lng,
+        k=limit,
+        max_km=radius_km,
+        types=[t.strip() for t in types.split(",") if t.strip()] if types else None,
+        price_levels=[p.strip() for p in price_level.split(",") if p.strip()] if price_level else None,
+    )
+    return {
+        "origin": {"lat": lat, "lng": lng},
+        "stores": [s.to_dict(distance) for s, distance in nearest],
+    }
 
 
 # Enhanced budget endpoints
 @app.post("/budget")
-async def set_budget(b: Budget):
-    budget_state["monthly_budget"] = b.monthly_budget
-    return budget_state
+async def set_budget(b: Budget, tenant: Tenant = Depends(household)):
+    # Only the budget is stored; spending always comes from the running totals
+    async with tenant.lock:
+        tenant.storage.settings.set("budget", {"monthly_budget": b.monthly_budget})
+    return budget_summary(tenant.storage)
 
 
-@app.get("/budget")
-async def get_budget():
-    # Calculate spent this month from purchase history
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
-    spent_this_month = sum(
-        record.price * record.quantity
-        for record in purchase_history
-        if record.date.month == current_month and record.date.year == current_year
-    )
-    
-    budget_state["spent_this_month"] = spent_this_month
-    
-    # Calculate inventory value
-    inventory_value = sum(
-        (item.purchase_price or 0) * item.quantity
-        for item in inventory
-    )
-    
+def budget_summary(store: Storage) -> dict:
+    """The monthly budget with this (UTC) month's spending and daily rate so far"""
+    today = datetime.utcnow()
+    spent_this_month = store.purchases.spent_in_month(today)
+    monthly_budget = store.settings.get("budget", DEFAULT_BUDGET).get("monthly_budget", 0.0)
     return {
-        **budget_state,
-        "inventory_value": inventory_value,
-        "remaining_budget": budget_state["monthly_budget"] - spent_this_month,
-        "cost_per_day": spent_this_month / datetime.now().day if datetime.now().day > 0 else 0
+        "monthly_budget": monthly_budget,
+        "spent_this_month": spent_this_month,
+        "inventory_value": store.inventory.total_value(),
+        "remaining_budget": monthly_budget - spent_this_month,
+        "cost_per_day": spent_this_month / today.day,
     }
 
 
+@app.get("/budget")
+async def get_budget(store: Storage = Depends(tenant_storage)):
+    return budget_summary(store)
+
+
+@app.get("/analytics")
+async def get_analytics(
+    months: int = Query(12, ge=1, le=120),
+    window: int = Query(3, ge=1, le=12),
+    top: int = Query(10, ge=1, le=50),
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    store: Storage = Depends(tenant_storage),
+):
+    """Spending trends, store/category breakdowns and unit-price history, computed locally"""
+    return spending_report(store.purchases.columns(), months=months, window=window, top=top, month=month)
+
+
 @app.get("/spending-analysis")
-async def get_spending_analysis():
+async def get_spending_analysis(request: Request, store: Storage = Depends(tenant_storage)):
     """Get AI-powered spending analysis"""
-    if not purchase_history:
+    if not store.purchases.count():
         return {"analysis": "No purchase history available yet."}
     
-    # Prepare spending data for AI
-    spending_summary = {}
-    for record in purchase_history:
-        store = record.store
-        if store not in spending_summary:
-            spending_summary[store] = {"total": 0, "items": 0}
-        spending_summary[store]["total"] += record.price * record.quantity
-        spending_summary[store]["items"] += record.quantity
+    budget_state = budget_summary(store)
+    # Store and category totals come from the running aggregates; only the trend needs the history
+    summary = "\n    ".join(summary_lines({
+        "monthly": monthly_trend(store.purchases.columns()),
+        "by_store": ranked_totals(store.purchases.by_store(), "store"),
+        "by_category": ranked_totals(store.purchases.by_category(), "category"),
+    }))
     
     prompt = f"""
     Analyze this grocery spending data and provide insights:
@@ -340,9 +488,7 @@ async def get_spending_analysis():
     Monthly Budget: ${budget_state['monthly_budget']}
     Current Month Spending: ${budget_state['spent_this_month']}
     
-    Store Breakdown: {spending_summary}
-    
-    Recent Purchases: {[f"{r.item_name} at {r.store} for ${r.price}" for r in purchase_history[-10:]]}
+    {summary}
     
     Provide specific recommendations for:
     1. Budget optimization
@@ -351,65 +497,75 @@ async def get_spending_analysis():
     4. Cost-saving opportunities
     """
     
-    analysis = call_openai(prompt, "You are a financial advisor specializing in grocery budgeting.")
+    analysis = await call_openai_cached(prompt, "You are a financial advisor specializing in grocery budgeting.", request)
     return {"analysis": analysis}
 
 
-# AI-powered expiry estimation
+# AI-powered expiry estimation: rule table first, then one memoized LLM call per product type
+shelf_life = ShelfLifeEstimator(lambda prompt, system: call_openai(prompt, system), SHELF_LIFE_DB)
+
+
 async def estimate_expiry_date(product_name: str, category: Optional[str] = None) -> datetime:
-    """Use AI to estimate expiry date based on product type"""
-    prompt = f"""
-    Estimate the shelf life in days for: {product_name}
-    Category: {category or 'unknown'}
-    
-    Consider typical storage conditions (pantry/fridge/freezer).
-    Return only a number representing days until expiry.
-    """
-    
-    try:
-        days_str = call_openai(prompt, "You are a food safety expert. Return only the number of days.")
-        days = int(''.join(filter(str.isdigit, days_str)))
-        return datetime.utcnow() + timedelta(days=min(days, 365))  # Cap at 1 year
-    except:
-        # Fallback to default estimates
-        default_days = {
-            "fresh": 7,
-            "dairy": 14,
-            "meat": 5,
-            "pantry": 180,
-            "frozen": 90
-        }
-        days = default_days.get(category or "unknown", 30)
-        return datetime.utcnow() + timedelta(days=days)
+    """Estimate expiry date based on product type"""
+    days = await shelf_life.days(product_name, category)
+    return datetime.utcnow() + timedelta(days=days)
 
 
-# Enhanced inventory endpoints
-@app.post("/inventory", response_model=InventoryItem)
-async def add_inventory(item: EnhancedInventoryItem):
-    # Generate a UPC if not provided
-    upc = item.upc or f"generated_{int(datetime.utcnow().timestamp())}"
+def _numeric_nutrition(nutrition: dict) -> Dict[str, float]:
+    """Open Food Facts nutriments mix numbers with unit strings; keep the numbers"""
+    return {
+        k: float(v) for k, v in nutrition.items()
+        if isinstance(v, (int, float)) and not isinstance(v, bool)
+    }
+
+
+async def enrich_inventory_item(household_id: str, item_id: str, lookup_upc: Optional[str], keep_name: bool):
+    """Background step of POST /inventory: resolve the product and estimate expiry, then patch the item"""
+    async with tenants.session(household_id) as tenant:
+        await _enrich(tenant, item_id, lookup_upc, keep_name)
+
+
+async def _enrich(tenant: Tenant, item_id: str, lookup_upc: Optional[str], keep_name: bool):
+    store = tenant.storage
+    item = store.inventory.get(item_id)
+    if item is None:
+        return
+
+    if lookup_upc:
+        product = await fetch_product_info(lookup_upc)
+        if product.get("found"):
+            patch = {
+                "category": item.category or product.get("category"),
+                "nutrition": _numeric_nutrition(product.get("nutrition", {})),
+            }
+            if not keep_name:
+                patch["name"] = product["name"]
+            async with tenant.lock:
+                item = store.inventory.update(item_id, **patch)
+            if item is None:
+                return
+
+    expiry_date = await estimate_expiry_date(item.name or "Unknown product", item.category or "food")
+    async with tenant.lock:
+        store.inventory.update(item_id, expiry=expiry_date)
+
+
+def build_inventory_records(
+    item: EnhancedInventoryItem, product: Optional[dict]
+) -> Tuple[InventoryItem, PurchaseRecord]:
+    """The inventory item and purchase record for one added item, given its product record (if any)"""
+    # Generate a unique ID (enrichment patches the item by id)
+    item_id = f"item_{uuid.uuid4().hex[:12]}"
     
-    # Generate a unique ID
-    item_id = f"item_{int(datetime.utcnow().timestamp())}"
+    # Generate a UPC if not provided (unique per item, so bulk rows never share one)
+    upc = item.upc or f"generated_{int(datetime.utcnow().timestamp())}_{item_id[5:11]}"
     
-    # Get product info from Open Food Facts if UPC is provided
-    data = {}
-    if item.upc:
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(f"{OFF_API_BASE}/{item.upc}.json", timeout=10)
-                data = resp.json().get("product", {})
-            except:
-                data = {}
+    found = bool(product and product.get("found"))
     
     # Get product name and category
-    product_name = item.name or data.get("product_name", "Unknown product")
-    product_category = item.category or data.get("categories", "").split(",")[0] if data.get("categories") else None
+    product_name = item.name or (product["name"] if found else "Unknown product")
+    product_category = item.category or (product.get("category") if found else None)
     
-    # AI-powered expiry estimation
-    expiry_date = await estimate_expiry_date(product_name, product_category or "food")
-    
-    # Create inventory item
     inventory_item = InventoryItem(
         id=item_id,
         upc=upc,
@@ -420,157 +576,531 @@ async def add_inventory(item: EnhancedInventoryItem):
         unit=item.unit or "pieces",
         remaining_quantity=item.quantity,
         total_quantity=item.quantity,
-        expiry=expiry_date,
-        expiry_date=expiry_date.isoformat() if expiry_date else None,
-        nutrition=data.get("nutriments", {}),
+        nutrition=_numeric_nutrition(product.get("nutrition", {})) if found else {},
         category=product_category,
         purchase_date=datetime.utcnow()
     )
     
-    # Add to purchase history
+    # Purchase history entry
     purchase_record = PurchaseRecord(
         upc=upc,
         item_name=product_name,
         price=item.purchase_price,
         store=item.store,
         date=datetime.utcnow(),
-        quantity=item.quantity
+        quantity=item.quantity,
+        category=product_category
     )
-    purchase_history.append(purchase_record)
+    return inventory_item, purchase_record
+
+
+# Enhanced inventory endpoints
+@app.post("/inventory", response_model=InventoryItem)
+async def add_inventory(
+    item: EnhancedInventoryItem, background_tasks: BackgroundTasks, tenant: Tenant = Depends(household)
+):
+    """Add an item using only locally cached product data.
+
+    Anything that needs a third party (an uncached UPC lookup, the expiry
+    estimate) runs after the response in enrich_inventory_item, which patches
+    the stored item when it finishes.
+    """
+    # Reuse the product record the scan already fetched, if any
+    product = cached_product_info(item.upc) if item.upc else None
     
-    inventory.append(inventory_item)
+    # Expiry is filled in by the background enrichment
+    inventory_item, purchase_record = build_inventory_records(item, product)
+    store = tenant.storage
+    async with tenant.lock:
+        with store.db.transaction():
+            store.purchases.add(purchase_record)
+            store.inventory.add(inventory_item)
+    background_tasks.add_task(
+        enrich_inventory_item,
+        tenant.id,
+        inventory_item.id,
+        lookup_upc=item.upc if product is None else None,
+        keep_name=bool(item.name),
+    )
     return inventory_item
 
 
+async def import_inventory(
+    tenant: Tenant, rows: List[Tuple[int, Optional[EnhancedInventoryItem], Optional[str]]]
+) -> dict:
+    """Add many items at once: concurrent UPC lookups, one batched expiry pass, one transaction.
+
+    `rows` are (row number, parsed item or None, parse error). Returns per-row
+    status; rows that failed to parse are reported and skipped.
+    """
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_IMPORT_MAX_ROWS} rows per import")
+    valid = [(row, item) for row, item, _ in rows if item is not None]
+
+    # Resolve each distinct UPC once, with a bounded number of lookups in flight
+    products: Dict[str, dict] = {}
+    limit = asyncio.Semaphore(BULK_LOOKUP_CONCURRENCY)
+
+    async def resolve(upc: str):
+        async with limit:
+            products[upc] = await fetch_product_info(upc)
+
+    await asyncio.gather(*[resolve(upc) for upc in {item.upc for _, item in valid if item.upc}])
+
+    records = [build_inventory_records(item, products.get(item.upc)) for _, item in valid]
+    shelf_days = await shelf_life.days_many(
+        (inventory_item.name, inventory_item.category or "food") for inventory_item, _ in records
+    )
+    now = datetime.utcnow()
+    for (inventory_item, _), days in zip(records, shelf_days):
+        inventory_item.expiry = now + timedelta(days=days)
+        inventory_item.expiry_date = inventory_item.expiry.isoformat()
+
+    store = tenant.storage
+    async with tenant.lock:
+        with store.db.transaction():
+            for inventory_item, purchase_record in records:
+                store.purchases.add(purchase_record)
+                store.inventory.add(inventory_item)
+
+    added = iter(records)
+    results = []
+    for row, item, error in rows:
+        if item is None:
+            results.append({"row": row, "status": "error", "error": error})
+        else:
+            inventory_item, _ = next(added)
+            results.append({"row": row, "status": "added", "item": inventory_item.model_dump(mode="json")})
+    return {"added": len(records), "failed": len(rows) - len(records), "rows": results}
+
+
+@app.post("/inventory/bulk")
+async def add_inventory_bulk(items: List[EnhancedInventoryItem], tenant: Tenant = Depends(household)):
+    """Add many items in one request (e.g. a whole receipt)"""
+    return await import_inventory(tenant, [(row, item, None) for row, item in enumerate(items, start=1)])
+
+
+def _parse_import_rows(text: str, csv_format: bool) -> List[Tuple[int, Optional[EnhancedInventoryItem], Optional[str]]]:
+    """CSV (with a header row) or JSON lines into (row number, item or None, error)"""
+    if csv_format:
+        records = [
+            {key: value for key, value in record.items() if key and value not in ("", None)}
+            for record in csv.DictReader(io.StringIO(text))
+        ]
+    else:
+        records = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                records.append(ValueError(f"invalid JSON: {e.msg}"))
+
+    rows = []
+    for row, record in enumerate(records, start=1):
+        if isinstance(record, ValueError):
+            rows.append((row, None, str(record)))
+            continue
+        try:
+            rows.append((row, EnhancedInventoryItem.model_validate(record), None))
+        except ValidationError as e:
+            rows.append((row, None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())))
+    return rows
+
+
+@app.post("/inventory/bulk/upload")
+async def upload_inventory(file: UploadFile = File(...), tenant: Tenant = Depends(household)):
+    """Bulk import from a CSV file (header: upc,name,purchase_price,store,quantity,category,unit) or JSON lines"""
+    text = (await _read_upload(file, BULK_IMPORT_MAX_UPLOAD_BYTES, "Import file")).decode("utf-8-sig")
+    filename = (file.filename or "").lower()
+    csv_format = filename.endswith(".csv") or (file.content_type or "").startswith("text/csv")
+    return await import_inventory(tenant, _parse_import_rows(text, csv_format))
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match names `etag` (weak comparison, as for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
 @app.get("/inventory", response_model=List[InventoryItem])
-async def list_inventory():
-    return inventory
+async def list_inventory(
+    request: Request,
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    tenant: Tenant = Depends(household),
+):
+    """The inventory, oldest first; with `limit`, one page, and X-Next-Cursor names the next one.
+
+    The ETag is the household and its inventory version, so a request with a
+    matching If-None-Match gets 304 Not Modified without the list being built.
+    """
+    store = tenant.storage
+    version = store.inventory.version()
+    paged = limit is not None or cursor is not None
+    # Every household counts versions from zero, so the tag names the household too
+    etag = f'"{tenant.id}-{version}-{cursor or 0}-{limit}"' if paged else f'"{tenant.id}-{version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "X-Household-Id",
+        "X-Inventory-Version": str(version),
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if paged:
+        items, next_cursor = store.inventory.page(cursor or 0, limit or 100)
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+    else:
+        items = store.inventory.list()
+    # Records serialize themselves in the response's shape, so skip re-validating them as models
+    return Response(store.inventory.encode(items), media_type="application/json", headers=headers)
+
+
+@app.get("/inventory/changes")
+async def inventory_changes(since: int = Query(..., ge=0), store: Storage = Depends(tenant_storage)):
+    """Items added, updated and removed after inventory version `since` (from X-Inventory-Version).
+
+    `reset` is true when `since` is too old to answer (or unknown); the client
+    should then refetch /inventory.
+    """
+    # Read first: a write landing in between is then sent again next time rather than skipped
+    version = store.inventory.version()
+    changes = store.inventory.changes(since)
+    if changes is None:
+        return {"version": version, "reset": True, "added": [], "updated": [], "removed": []}
+    added, updated, removed = changes
+    return {
+        "version": version,
+        "reset": False,
+        "added": [item.to_dict() for item in added],
+        "updated": [item.to_dict() for item in updated],
+        "removed": removed,
+    }
 
 
 @app.delete("/inventory/{upc}")
-async def remove_inventory(upc: str, quantity: int = Query(1, ge=1)):
-    """Remove up to `quantity` items matching `upc` from inventory"""
-    removed = 0
-    new_list = []
-    for item in inventory:
-        if item.upc == upc and removed < quantity:
-            removed += 1
-            continue
-        new_list.append(item)
+async def remove_inventory(upc: str, quantity: int = Query(1, ge=1), tenant: Tenant = Depends(household)):
+    """Remove one item by id, or up to `quantity` items matching `upc` from inventory"""
+    # The inventory page deletes by item id; scanners delete by UPC
+    async with tenant.lock:
+        if tenant.storage.inventory.remove(upc) is not None:
+            return {"removed": 1}
+
+        removed = tenant.storage.inventory.remove_by_upc(upc, quantity)
 
     if removed == 0:
         raise HTTPException(status_code=404, detail="No such item to remove")
 
-    inventory[:] = new_list
     return {"removed": removed}
 
 
 @app.delete("/inventory")
-async def clear_inventory():
+async def clear_inventory(tenant: Tenant = Depends(household)):
     """Clear entire inventory"""
-    inventory.clear()
+    async with tenant.lock:
+        tenant.storage.inventory.clear()
     return {"cleared": True}
 
 
-# OpenAI helper
-def call_openai(prompt: str, system: str) -> str:
+# Portion tracking
+
+
+@app.post("/use-portion")
+async def use_portion(usage: PortionUsage, tenant: Tenant = Depends(household)):
+    """Record a portion of an item used in a meal and decrement what is left of it"""
+    store = tenant.storage
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.7,
-        )
-        content = resp.choices[0].message.content
-        return content.strip() if content else "No response from AI"
-    except Exception as e:
-        return f"AI service temporarily unavailable: {str(e)}"
+        async with tenant.lock:
+            meal = store.usage.record(
+                usage.item_id, usage.quantity_used, usage.meal_name.strip(), usage.servings_made, usage.notes or None
+            )
+    except InsufficientQuantity as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if meal is None:
+        raise HTTPException(status_code=404, detail="No such item in inventory")
+    return {"meal": meal, "item": store.inventory.get(usage.item_id).to_dict()}
 
 
-@app.post("/mealplan")
-async def meal_plan(req: MealPlanRequest):
-    """Enhanced AI meal planning with budget and nutrition optimization"""
+@app.get("/meal-history")
+async def meal_history(
+    cursor: Optional[int] = Query(None, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    store: Storage = Depends(tenant_storage),
+):
+    """Meals newest first; pass `next_cursor` back as `cursor` for the next page"""
+    meals, next_cursor = store.usage.history(cursor, limit)
+    return {"meals": meals, "next_cursor": next_cursor}
+
+
+# OpenAI helper
+async def call_openai(prompt: str, system: str, request: Optional[Request] = None) -> str:
+    """Run a chat completion through the shared gateway without blocking the event loop"""
+    with span("llm"):
+        return await llm.complete(prompt, system, request=request)
+
+
+def _cacheable(answer: str) -> bool:
+    """Empty and failed completions are not cached, so the next view asks again"""
+    return bool(answer.strip()) and not answer.startswith(UNAVAILABLE)
+
+
+async def call_openai_cached(prompt: str, system: str, request: Optional[Request] = None) -> str:
+    """call_openai for endpoints whose answer depends only on what goes into the prompt"""
+    key = response_cache.fingerprint(system, prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    answer = await call_openai(prompt, system, request)
+    if _cacheable(answer):
+        response_cache.put(key, answer)
+    return answer
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def stream_text(text: str) -> StreamingResponse:
+    """A finished answer in the same event format as stream_completion"""
+    async def events():
+        yield _sse("delta", {"text": text})
+        yield _sse("done", {"cached": True})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def stream_completion(
+    prompt: str, system: str, request: Request, first: Optional[Tuple[str, dict]] = None
+) -> StreamingResponse:
+    """Forward a completion as server-sent events: `delta` per chunk, then `done` (or `error`).
+
+    `first` is an optional (event, data) pair sent before the completion.
+    Answers already in the response cache are sent as one delta; freshly
+    streamed answers are cached once complete, unless they came back empty.
+    """
+    async def events():
+        if first is not None:
+            yield _sse(*first)
+        key = response_cache.fingerprint(system, prompt)
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield _sse("delta", {"text": cached})
+            yield _sse("done", {"cached": True})
+            return
+
+        parts = []
+        try:
+            async for delta in llm.stream(prompt, system, request=request):
+                parts.append(delta)
+                yield _sse("delta", {"text": delta})
+        except ClientDisconnected:
+            return
+        except Exception as e:
+            yield _sse("error", {"message": f"{UNAVAILABLE}: {str(e)}"})
+            return
+        answer = "".join(parts).strip()
+        if _cacheable(answer):
+            response_cache.put(key, answer)
+        yield _sse("done", {"cached": False})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+MEAL_PLAN_SYSTEM_PROMPT = """You are a professional meal planner and nutritionist specializing in budget-conscious, waste-reducing meal planning. Focus on practical, achievable meals that maximize nutrition and minimize cost."""
+EMPTY_MEAL_PLAN = "No items in inventory. Please add some groceries first!"
+
+
+def max_cost_per_serving(store: Storage) -> Optional[float]:
+    """Per person per meal, from the monthly budget over a 30-day month of three meals a day"""
+    monthly_budget = store.settings.get("budget", DEFAULT_BUDGET).get("monthly_budget", 0)
+    return monthly_budget / 90 if monthly_budget else None
+
+
+def build_meal_plan(store: Storage, req: MealPlanRequest) -> Optional[Tuple[MealPlanAllocation, str]]:
+    """Allocate the inventory to meal slots locally and build the prompt that names the meals.
+
+    Returns None when there is nothing in the inventory. The prompt only lists
+    each slot's chosen items, so its size is bounded by days x meals rather
+    than by the inventory.
+    """
+    inventory = store.inventory.by_expiry()
     if not inventory:
-        return {"meal_plan": "No items in inventory. Please add some groceries first!"}
-    
-    # Prepare detailed inventory data
-    items = []
-    total_value = 0
-    for item in inventory:
-        expiry_days = (item.expiry - datetime.utcnow()).days if item.expiry else 30
-        items.append({
-            "name": item.name,
-            "quantity": item.quantity,
-            "expiry_days": expiry_days,
-            "price": item.purchase_price or 0,
-            "nutrition": item.nutrition,
-            "category": item.category
-        })
-        total_value += (item.purchase_price or 0) * item.quantity
-    
-    cost_per_person_per_day = total_value / (req.members * req.days) if req.members and req.days else 0
-    
+        return None
+
+    with span("plan_meals"):
+        allocation = plan_meals(inventory, req.days, req.members, max_cost_per_serving(store))
+
+    lines = []
+    for slot in allocation.slots:
+        if slot.portions:
+            servings: Dict[str, int] = {}
+            for p in slot.portions:
+                servings[p.name] = servings.get(p.name, 0) + p.servings
+            used = ", ".join(f"{name} x{count}" for name, count in servings.items())
+            short = f" (short {slot.servings_needed - slot.servings} servings)" if slot.servings < slot.servings_needed else ""
+            lines.append(f"Day {slot.day} {slot.meal}: {used} — ${slot.cost:.2f}{short}")
+        else:
+            lines.append(f"Day {slot.day} {slot.meal}: nothing left in the pantry")
+    at_risk_ids = {item["item_id"] for item in allocation.at_risk}
+    at_risk = name_list(item for item in inventory if item.id in at_risk_ids)
+    plan_lines = "\n".join(lines)
+
     prompt = f"""
-    Create a {req.days}-day meal plan for {req.members} people using ONLY these available items:
-    
-    Available Inventory: {items}
-    
-    Budget Context:
-    - Total inventory value: ${total_value:.2f}
-    - Target cost per person per day: ${cost_per_person_per_day:.2f}
-    - Monthly budget: ${budget_state.get('monthly_budget', 0)}
-    
-    Requirements:
-    1. Use items closest to expiry first
-    2. Create balanced, nutritious meals
-    3. Maximize food usage to minimize waste
-    4. Consider portion sizes for {req.members} people
-    5. Include breakfast, lunch, and dinner
-    6. Provide cost estimates for each meal
-    7. Suggest any critical missing ingredients
-    
-    Format as a day-by-day plan with meals and estimated costs.
+    The ingredients for a {req.days}-day meal plan for {req.members} people are already chosen.
+    Each line is one meal with its ingredients (servings) and cost:
+
+    {plan_lines}
+
+    For every meal, give a short recipe name and a one-sentence description using only its listed
+    ingredients plus pantry staples (oil, salt, spices). Keep the day/meal order and the costs.
+    For meals that are short on servings or empty, suggest the cheapest item to buy.
+    Items that will still expire unused: {at_risk}.
     """
-    
-    system_prompt = """You are a professional meal planner and nutritionist specializing in budget-conscious, waste-reducing meal planning. Focus on practical, achievable meals that maximize nutrition and minimize cost."""
-    
-    plan = call_openai(prompt, system_prompt)
-    return {"meal_plan": plan}
+    return allocation, prompt
 
 
-@app.get("/whatcanieat")
-async def what_can_i_eat():
-    """Enhanced 'What Can I Eat' with cost and nutrition focus"""
+@app.post("/mealplan")
+async def meal_plan(req: MealPlanRequest, request: Request, store: Storage = Depends(tenant_storage)):
+    """Meal plan allocated locally by expiry, quantity and budget; the AI only names the meals"""
+    planned = build_meal_plan(store, req)
+    if planned is None:
+        return {"meal_plan": EMPTY_MEAL_PLAN, "plan": None}
+    allocation, prompt = planned
+
+    plan = await call_openai_cached(prompt, MEAL_PLAN_SYSTEM_PROMPT, request)
+    return {"meal_plan": plan, "plan": allocation.to_dict()}
+
+
+@app.post("/mealplan/stream")
+async def meal_plan_stream(req: MealPlanRequest, request: Request, store: Storage = Depends(tenant_storage)):
+    """/mealplan as server-sent events: a `plan` event with the allocation, then the AI text"""
+    planned = build_meal_plan(store, req)
+    if planned is None:
+        return stream_text(EMPTY_MEAL_PLAN)
+    allocation, prompt = planned
+    return stream_completion(prompt, MEAL_PLAN_SYSTEM_PROMPT, request, first=("plan", allocation.to_dict()))
+
+
+WHAT_CAN_I_EAT_SYSTEM_PROMPT = "You are a creative chef specializing in using available ingredients efficiently."
+EMPTY_WHAT_CAN_I_EAT = "No items in inventory. Please add some groceries first!"
+
+
+def match_recipes(inventory: List[InventoryRecord], limit: int = RECIPE_MATCH_LIMIT, min_coverage: float = 0.5) -> List[dict]:
+    """Recipes ranked by how much of them the inventory covers, weighted by expiry urgency"""
+    now = datetime.utcnow()
+    with span("recipes"):
+        pantry = recipe_index.pantry(inventory, now)
+        matches = recipe_index.match({name: urgency for name, (urgency, _) in pantry.items()}, limit, min_coverage)
+    return [recipe_to_dict(match, pantry, now) for match in matches]
+
+
+def recipe_to_dict(match: RecipeMatch, pantry: dict, now: datetime) -> dict:
+    uses = []
+    for ingredient in match.have:
+        item = pantry[ingredient][1]
+        uses.append({
+            "ingredient": ingredient,
+            "item_id": item.id,
+            "item": item.name,
+            "days_left": (item.expiry - now).days if item.expiry else None,
+        })
+    return {
+        **match.recipe.to_dict(),
+        "score": match.score,
+        "coverage": match.coverage,
+        "uses": uses,
+        "missing": match.missing,
+    }
+
+
+def recipes_table(recipes: List[dict]) -> str:
+    """Matched recipes as prompt lines for the optional AI step"""
+    return "\n".join(
+        f"- {r['name']}: uses {', '.join(u['item'] or u['ingredient'] for u in r['uses'])}"
+        + (f"; missing {', '.join(r['missing'])}" if r["missing"] else "")
+        for r in recipes
+    ) or "(none)"
+
+
+def recipes_summary(recipes: List[dict]) -> str:
+    """Plain-text meal options from matched recipes, in place of the AI answer"""
+    if not recipes:
+        return "No recipes match your inventory yet. Add a few more groceries!"
+    lines = []
+    for n, r in enumerate(recipes, start=1):
+        details = ", ".join(filter(None, (
+            f"{r['minutes']} min" if r["minutes"] else "", f"serves {r['servings']}" if r["servings"] else ""
+        )))
+        lines.append(f"{n}. {r['name']}" + (f" ({details})" if details else ""))
+        lines.append(f"   Uses: {', '.join(u['item'] or u['ingredient'] for u in r['uses'])}")
+        if r["missing"]:
+            lines.append(f"   Also needs: {', '.join(r['missing'])}")
+        if r["instructions"]:
+            lines.append(f"   {r['instructions']}")
+    return "\n".join(lines)
+
+
+@app.get("/recipes")
+async def get_recipes(
+    request: Request,
+    limit: int = Query(RECIPE_MATCH_LIMIT, ge=1, le=50),
+    min_coverage: float = Query(0.5, ge=0, le=1),
+    enrich: bool = False,
+    store: Storage = Depends(tenant_storage),
+):
+    """Recipes from the local dataset that the inventory can make; `enrich` also asks the AI to adapt them"""
+    recipes = match_recipes(store.inventory.list(), limit, min_coverage)
+    result = {"recipes": recipes, "count": len(recipes)}
+    if enrich and recipes:
+        prompt = f"""
+    These recipes were matched to a household's pantry (most urgent first):
+    {recipes_table(recipes)}
+
+    For the best three, suggest substitutions for missing ingredients and one tip
+    to use up the items expiring soonest. Keep it short.
+    """
+        result["notes"] = await call_openai_cached(prompt, WHAT_CAN_I_EAT_SYSTEM_PROMPT, request)
+    return result
+
+
+@app.get("/recipes/stats")
+async def get_recipe_stats():
+    """Size of the recipe index and hit/miss counters for the item-name matcher"""
+    return recipe_index.stats()
+
+
+def build_what_can_i_eat_prompt(store: Storage, recipes: List[dict]) -> Optional[str]:
+    """The /whatcanieat prompt, or None when there is nothing in the inventory"""
+    inventory = store.inventory.list()
     if not inventory:
-        return {"options": "No items in inventory. Please add some groceries first!"}
-    
-    # Prepare inventory with urgency (expiry dates)
-    urgent_items = []
-    regular_items = []
-    
-    for item in inventory:
-        expiry_days = (item.expiry - datetime.utcnow()).days if item.expiry else 30
-        item_info = {
-            "name": item.name,
-            "quantity": item.quantity,
-            "expiry_days": expiry_days,
-            "price": item.purchase_price or 0
-        }
-        
-        if expiry_days <= 3:
-            urgent_items.append(item_info)
-        else:
-            regular_items.append(item_info)
+        return None
+    
+    # Split by urgency (expiry dates); each table is size-bounded
+    urgent = store.inventory.expiring_within(3)
+    urgent_ids = {item.id for item in urgent}
+    regular = [item for item in inventory if item.id not in urgent_ids]
+    columns = ("name", "qty", "days_left", "value")
     
     prompt = f"""
     Based on available ingredients, suggest complete meal options:
     
-    URGENT (use first - expiring soon): {urgent_items}
-    REGULAR items: {regular_items}
+    URGENT (use first - expiring soon):
+    {inventory_table(urgent, columns=columns, max_rows=20, max_tokens=250)}
+    
+    REGULAR items:
+    {inventory_table(regular, columns=columns)}
+    
+    Recipes already known to fit this inventory (start from these):
+    {recipes_table(recipes)}
     
     For each meal suggestion:
     1. List required ingredients from inventory
@@ -582,34 +1112,86 @@ async def what_can_i_eat():
     
     Focus on practical, achievable recipes that maximize ingredient usage.
     """
-    
-    options = call_openai(prompt, "You are a creative chef specializing in using available ingredients efficiently.")
-    return {"options": options}
+    return prompt
+
+
+@app.get("/whatcanieat")
+async def what_can_i_eat(request: Request, enrich: bool = False, store: Storage = Depends(tenant_storage)):
+    """Meal options from the local recipe index; `enrich` has the AI build on them (cost and nutrition focus)"""
+    inventory = store.inventory.list()
+    if not inventory:
+        return {"options": EMPTY_WHAT_CAN_I_EAT, "recipes": []}
+    recipes = match_recipes(inventory)
+    if not enrich:
+        return {"options": recipes_summary(recipes), "recipes": recipes}
+
+    prompt = build_what_can_i_eat_prompt(store, recipes)
+    options = await call_openai_cached(prompt, WHAT_CAN_I_EAT_SYSTEM_PROMPT, request)
+    return {"options": options, "recipes": recipes}
+
+
+@app.get("/whatcanieat/stream")
+async def what_can_i_eat_stream(request: Request, store: Storage = Depends(tenant_storage)):
+    """AI meal options as server-sent events, after a `recipes` event with the local matches"""
+    recipes = match_recipes(store.inventory.list())
+    prompt = build_what_can_i_eat_prompt(store, recipes)
+    if prompt is None:
+        return stream_text(EMPTY_WHAT_CAN_I_EAT)
+    return stream_completion(prompt, WHAT_CAN_I_EAT_SYSTEM_PROMPT, request, first=("recipes", {"recipes": recipes}))
+
+
+@app.get("/what-can-i-eat")
+async def meal_suggestions(
+    days: int = Query(1, ge=1, le=7),
+    members: int = Query(1, ge=1, le=20),
+    store: Storage = Depends(tenant_storage),
+):
+    """Meals to cook from what is left, allocated locally by expiry and budget (no AI call)"""
+    inventory = store.inventory.by_expiry()
+    with span("plan_meals"):
+        allocation = plan_meals(inventory, days, members, max_cost_per_serving(store))
+    items = {item.id: item for item in inventory}
+    suggestions = []
+    for slot in allocation.slots:
+        if not slot.portions:
+            continue
+        names = ", ".join(dict.fromkeys(p.name for p in slot.portions))
+        meal = f"{slot.meal.title()}: {names}" if days == 1 else f"Day {slot.day} {slot.meal}: {names}"
+        suggestions.append({
+            "meal": meal,
+            "portions_needed": [
+                {
+                    "item_id": p.item_id,
+                    "item": p.name,
+                    "quantity": round(p.servings / servings_per_unit(items[p.item_id]), 2),
+                    "unit": items[p.item_id].unit,
+                }
+                for p in slot.portions
+            ],
+            "estimated_cost": slot.cost,
+            "servings": slot.servings,
+        })
+    return {"meal_suggestions": suggestions, "at_risk": allocation.at_risk}
 
 
 @app.get("/tips")
-async def waste_tips():
+async def waste_tips(request: Request, store: Storage = Depends(tenant_storage)):
     """Enhanced waste reduction tips with specific item context"""
+    inventory = store.inventory.list()
     if not inventory:
         return {"tips": "Add some items to your inventory to get personalized waste reduction tips!"}
     
     # Categorize items by expiry urgency
-    expiring_soon = []
-    perishables = []
-    
-    for item in inventory:
-        expiry_days = (item.expiry - datetime.utcnow()).days if item.expiry else 30
-        if expiry_days <= 5:
-            expiring_soon.append(item.name)
-        elif expiry_days <= 14:
-            perishables.append(item.name)
+    soon = store.inventory.expiring_within(5)
+    soon_ids = {item.id for item in soon}
+    perishables = [item for item in store.inventory.expiring_within(14) if item.id not in soon_ids]
     
     prompt = f"""
     Provide specific waste reduction tips for these items:
     
-    EXPIRING SOON (within 5 days): {expiring_soon}
-    PERISHABLES (within 2 weeks): {perishables}
-    ALL ITEMS: {[item.name for item in inventory]}
+    EXPIRING SOON (within 5 days): {name_list(soon)}
+    PERISHABLES (within 2 weeks): {name_list(perishables)}
+    ALL ITEMS: {name_list(inventory, max_tokens=300)}
     
     Include tips for:
     1. Immediate use strategies for expiring items
@@ -622,23 +1204,26 @@ async def waste_tips():
     Make tips specific and actionable.
     """
     
-    tips = call_openai(prompt, "You are an expert in food preservation and zero-waste cooking.")
+    tips = await call_openai_cached(prompt, "You are an expert in food preservation and zero-waste cooking.", request)
     return {"tips": tips}
 
 
 @app.get("/price-comparison")
-async def price_comparison():
+async def price_comparison(request: Request, store: Storage = Depends(tenant_storage)):
     """Get AI-powered price comparison suggestions"""
+    user_location = store.settings.get("location", DEFAULT_LOCATION)
     if not user_location.get("zip_code"):
         return {"suggestions": "Please set your location first for local price comparisons."}
     
-    recent_purchases = purchase_history[-20:] if purchase_history else []
+    # recent() is oldest first; the table lists (and, when trimmed, keeps) the newest first
+    recent_purchases = store.purchases.recent(20)[::-1]
     
     prompt = f"""
     Analyze recent grocery purchases and suggest cost-saving opportunities:
     
     Location: {user_location['city']}, {user_location['zip_code']}
-    Recent Purchases: {[f"{r.item_name} at {r.store} for ${r.price}" for r in recent_purchases]}
+    Recent Purchases:
+    {purchases_table(recent_purchases)}
     
     Provide suggestions for:
     1. Alternative stores that might be cheaper
@@ -651,23 +1236,25 @@ async def price_comparison():
     Focus on practical, location-specific advice.
     """
     
-    suggestions = call_openai(prompt, "You are a grocery shopping expert who helps people save money on food.")
+    suggestions = await call_openai_cached(prompt, "You are a grocery shopping expert who helps people save money on food.", request)
     return {"suggestions": suggestions}
 
 
 @app.get("/cost-per-meal")
-async def calculate_cost_per_meal():
+async def calculate_cost_per_meal(request: Request, store: Storage = Depends(tenant_storage)):
     """Calculate cost per meal based on current inventory"""
+    inventory = store.inventory.list()
     if not inventory:
         return {"cost_per_meal": 0, "analysis": "No inventory data available"}
     
-    total_value = sum((item.purchase_price or 0) * item.quantity for item in inventory)
+    total_value = store.inventory.total_value()
     
     # Estimate number of meals from inventory
     prompt = f"""
     Estimate how many meals can be made from this inventory:
     
-    Items: {[(item.name, item.quantity, item.category) for item in inventory]}
+    Items:
+    {inventory_table(inventory, columns=("name", "qty", "category"))}
     Total value: ${total_value:.2f}
     
     Consider:
@@ -679,7 +1266,7 @@ async def calculate_cost_per_meal():
     """
     
     try:
-        meals_str = call_openai(prompt, "You are a meal planning expert. Return only the number of estimated meals.")
+        meals_str = await call_openai(prompt, "You are a meal planning expert. Return only the number of estimated meals.", request)
         estimated_meals = int(''.join(filter(str.isdigit, meals_str))) or 1
     except:
         estimated_meals = len(inventory) * 2  # Fallback estimate
@@ -0,0 +1,306 @@
+"""Metrics, structured logging and request profiling.
+
+Hot paths record into in-process counters and fixed-bucket histograms, which
+cost a dict lookup and a bisect per observation; GET /metrics renders them in
+the Prometheus text format together with gauges read from the caches' own
+stats() at scrape time. Logs are one JSON object per line, filtered by level,
+and chatty per-lookup events are sampled. Profiling collects named spans for
+one request (through a context variable) so the breakdown can be logged and
+returned as a Server-Timing header.
+"""
+import bisect
+import contextvars
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import LOG_LEVEL, LOG_SAMPLE_RATE
+
+# Seconds; spans sub-millisecond cache hits up to slow LLM completions
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+LabelValues = Tuple[str, ...]
+
+
+def _label_text(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = 'le="%s"' % (bound if isinstance(bound, str) else f"{bound:g}")
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        # name -> (help, callback returning {label value: number}, label name)
+        self._gauges: List[Tuple[str, str, str, Callable[[], Dict[str, float]]]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, label: str, collect: Callable[[], Dict[str, float]]):
+        """A gauge whose values are read by `collect` at scrape time, one series per returned key"""
+        self._gauges.append((name, help, label, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help, label, collect in self._gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            for key, value in sorted(collect().items()):
+                lines.append(f"{name}{_label_text((label,), (key,))} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+UPSTREAM_SECONDS = registry.histogram(
+    "upstream_request_duration_seconds", "Latency of calls to third-party services", ("upstream", "outcome")
+)
+LLM_TOKENS = registry.counter("llm_tokens_total", "LLM tokens reported by the API", ("kind",))
+LLM_TIME_TO_FIRST_TOKEN = registry.histogram(
+    "llm_time_to_first_token_seconds", "Delay before the first streamed completion token"
+)
+
+
+# name -> (stats callback, hit counter keys, miss counter keys)
+_caches: Dict[str, Tuple[Callable[[], dict], Sequence[str], Sequence[str]]] = {}
+
+
+def cache_gauges(name: str, stats: Callable[[], dict], hits: Sequence[str], misses: Sequence[str]):
+    """Export a cache's hit ratio and counters, read from its stats() dict at scrape time"""
+    _caches[name] = (stats, hits, misses)
+
+
+def _cache_hit_ratios() -> Dict[str, float]:
+    ratios = {}
+    for name, (stats, hits, misses) in _caches.items():
+        values = stats()
+        hit = sum(values.get(key, 0) for key in hits)
+        lookups = hit + sum(values.get(key, 0) for key in misses)
+        ratios[name] = hit / lookups if lookups else 0.0
+    return ratios
+
+
+def _cache_stats() -> Dict[str, float]:
+    return {
+        f"{name}:{key}": value
+        for name, (stats, _, _) in _caches.items()
+        for key, value in stats().items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+registry.gauge("cache_hit_ratio", "Share of lookups answered from the cache", "cache", _cache_hit_ratios)
+registry.gauge("cache_stat", "Cache counters and sizes, labelled cache:stat", "stat", _cache_stats)
+
+
+# Structured logging
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A logger under the app's root logger, which writes JSON lines to stderr at LOG_LEVEL"""
+    root = logging.getLogger("kitchenhelper")
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL.upper())
+        root.propagate = False
+    return root.getChild(name)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, sample: float = 1.0, **fields):
+    """Log `event` with structured fields; `sample` < 1 keeps only that share of calls (times LOG_SAMPLE_RATE)"""
+    if not logger.isEnabledFor(level):
+        return
+    if sample < 1.0 or LOG_SAMPLE_RATE < 1.0:
+        if random.random() >= sample * LOG_SAMPLE_RATE:
+            return
+    logger.log(level, event, extra={"fields": fields})
+
+
+# Per-request profiling
+
+_profile: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("profile", default=None)
+
+
+@contextmanager
+def profiling() -> Iterator[List[Tuple[str, float]]]:
+    """Collect the spans recorded in this context (and tasks it starts) into the yielded list"""
+    spans: List[Tuple[str, float]] = []
+    token = _profile.set(spans)
+    try:
+        yield spans
+    finally:
+        _profile.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block into the current request's profile; free when no profile is active"""
+    spans = _profile.get()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, time.perf_counter() - start))
+
+
+def server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """Spans as a Server-Timing header value (durations in milliseconds)"""
+    totals: Dict[str, float] = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f"{name.replace(' ', '_')};dur={seconds * 1000:.2f}" for name, seconds in totals.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware: latency per route into REQUEST_SECONDS, plus optional profiling.
+
+    `profile` is "off", "all" or "header" (only requests sent with
+    "X-Profile: 1"). Profiled requests get a Server-Timing header with the
+    spans finished before the response started, and the full breakdown is
+    logged when the response completes.
+    """
+
+    def __init__(self, app, profile: str = "off"):
+        self.app = app
+        self.profile = profile
+        self.logger = get_logger("requests")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profiled = self.profile == "all" or (
+            self.profile == "header" and (b"x-profile", b"1") in scope.get("headers", [])
+        )
+        start = time.perf_counter()
+        status = 500
+        spans: List[Tuple[str, float]] = []
+        token = _profile.set(spans) if profiled else None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profiled:
+                    timing = server_timing(spans, time.perf_counter() - start).encode()
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            # The router records the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=path, status=str(status))
+            if profiled:
+                _profile.reset(token)
+                log_event(
+                    self.logger, logging.INFO, "request.profile",
+                    method=scope["method"], route=path, status=status, ms=round(elapsed * 1000, 2),
+                    spans=[{"name": name, "ms": round(seconds * 1000, 2)} for name, seconds in spans],
+                )
@@ -1,22 +1,66 @@
+from datetime import datetime
+from typing import Dict, Optional
+
 from pydantic import BaseModel, Field
-from typing import List, Optional
+
 
 class InventoryItem(BaseModel):
+    id: Optional[str] = None  # Add ID field for React keys
     upc: str
-    name: str
-    quantity: int
-    expiry: Optional[str]
-    nutrition: dict
-    purchase_price: float
+    name: Optional[str] = None
+    purchase_price: Optional[float] = None
+    store: Optional[str] = None
+    quantity: int = Field(1, ge=1)
+    unit: str = "pieces"  # Add unit field
+    remaining_quantity: Optional[float] = None  # Decremented as portions are used
+    total_quantity: Optional[int] = None  # Add total quantity field
+    expiry: Optional[datetime] = None
+    expiry_date: Optional[str] = None  # Add expiry_date field for frontend
+    nutrition: Dict[str, float] = {}
+    category: Optional[str] = None
+    purchase_date: Optional[datetime] = None
+
+
+class PurchaseRecord(BaseModel):
+    upc: str
+    item_name: str
+    price: float
     store: str
+    date: datetime
+    quantity: int = 1
+    category: Optional[str] = None
+
+
+class Budget(BaseModel):
+    monthly_budget: float = Field(..., gt=0)
+
+
+class LocationUpdate(BaseModel):
+    zip_code: str
+    city: str
+    # Optional device coordinates; otherwise the postal code is geocoded
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+
 
 class MealPlanRequest(BaseModel):
-    members: int
-    days: int
+    days: int = Field(..., gt=0, le=14)
+    members: int = Field(..., gt=0)
+
+
+class EnhancedInventoryItem(BaseModel):
+    upc: Optional[str] = None  # Make UPC optional
+    name: Optional[str] = None
+    purchase_price: float = Field(..., gt=0)
+    store: str
+    quantity: int = Field(1, ge=1)
+    category: Optional[str] = None
+    unit: str = "pieces"  # Add unit field with default value
 
-class MealPlan(BaseModel):
-    day: int
-    meals: List[str]
 
-class BudgetRequest(BaseModel):
-    monthly_budget: float
+class PortionUsage(BaseModel):
+    item_id: str
+    quantity_used: float = Field(..., gt=0)
+    meal_name: str = Field(..., min_length=1)
+    servings_made: int = Field(1, ge=1)
+    notes: Optional[str] = None
@@ -0,0 +1,95 @@
+"""Pooled client for the free Open Food Facts product API.
+
+One httpx.AsyncClient is opened for the app lifespan so barcode lookups reuse
+keep-alive connections instead of paying a TCP+TLS handshake per scan.
+"""
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from config import OFF_API_BASE, OFF_TIMEOUT
+from metrics import UPSTREAM_SECONDS, get_logger, log_event
+
+logger = get_logger("openfoodfacts")
+
+
+class OpenFoodFactsClient:
+    def __init__(self, base_url: str = OFF_API_BASE, timeout: float = OFF_TIMEOUT, max_connections: int = 20):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        """Open the pooled HTTP client (called from the app lifespan)"""
+        if self._http is not None:
+            return
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=httpx.Timeout(self.timeout),
+            headers={"User-Agent": "SmartPantry/1.0"},
+        )
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+
+    async def fetch_raw(self, upc: str) -> dict:
+        """Return the raw `product` object for `upc`, or {} if Open Food Facts doesn't know it.
+
+        Transport errors and non-200 responses raise so callers never mistake an
+        outage for a missing product.
+        """
+        await self.start()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._http.get(f"{self.base_url}/{upc}.json")
+            response.raise_for_status()
+            data = response.json()
+            outcome = "found" if data.get("status") == 1 else "not_found"
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_SECONDS.observe(elapsed, upstream="openfoodfacts", outcome=outcome)
+        # Sampled, and never the body: product records run to tens of KB
+        log_event(
+            logger, logging.DEBUG, "off.response", sample=0.1,
+            upc=upc, status=response.status_code, bytes=len(response.content), ms=round(elapsed * 1000, 1),
+        )
+        if data.get("status") != 1:
+            return {}
+        return data.get("product", {})
+
+    async def fetch(self, upc: str) -> dict:
+        """Return a normalized product record; `found` is False for unknown UPCs"""
+        product = await self.fetch_raw(upc)
+        if not product:
+            return not_found_record(upc)
+        return {
+            "found": True,
+            "name": product.get("product_name", f"Product (UPC: {upc})"),
+            "category": product.get("categories_tags", ["food"])[0] if product.get("categories_tags") else "food",
+            "brand": product.get("brands", ""),
+            "nutrition": product.get("nutriments", {}),
+            "image_url": product.get("image_url", ""),
+            "upc": upc,
+        }
+
+
+def not_found_record(upc: str) -> dict:
+    return {
+        "found": False,
+        "name": f"Product (UPC: {upc})",
+        "category": "food",
+        "brand": "",
+        "nutrition": {},
+        "image_url": "",
+        "upc": upc,
+        "error": "Product not found in database",
+    }
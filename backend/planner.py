@@ -0,0 +1,188 @@
+"""Local meal-plan allocation.
+
+Decides which inventory items go into which day/meal slot before the LLM is
+involved. Each slot needs one serving per household member and takes them
+greedily from the items that expire soonest, preferring items that suit the
+meal and fit the per-serving budget. The result is deterministic for a given
+inventory, so the LLM only has to name and describe recipes for small,
+already-chosen groupings.
+"""
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from records import InventoryRecord
+
+MEALS = ("breakfast", "lunch", "dinner")
+MAX_ITEMS_PER_MEAL = 3
+
+# Servings one unit of an item provides, most specific keyword first
+SERVINGS_RULES = [
+    (r"\beggs?\b", 1),
+    (r"bread|bagel|tortilla|wrap", 8),
+    (r"milk|juice", 4),
+    (r"yogh?urt", 4),
+    (r"cheese", 8),
+    (r"\brice\b|pasta|spaghetti|noodle|quinoa|lentil|oats|cereal", 8),
+    (r"chicken|beef|pork|turkey|fish|salmon|steak|sausage", 3),
+    (r"apple|banana|orange|pear|avocado|tomato|potato|onion", 1),
+]
+_SERVINGS_PATTERNS = [(re.compile(pattern), servings) for pattern, servings in SERVINGS_RULES]
+DEFAULT_SERVINGS_PER_UNIT = 2
+
+# Name/category hints for items that suit breakfast
+BREAKFAST_HINTS = re.compile(r"milk|yogh?urt|cereal|oat|granola|bread|bagel|egg|fruit|banana|apple|berr|juice|coffee|tea|dair")
+
+
+@dataclass
+class Portion:
+    item_id: str
+    name: str
+    servings: int
+    cost: float
+
+
+@dataclass
+class MealSlot:
+    day: int
+    meal: str
+    portions: List[Portion] = field(default_factory=list)
+    servings_needed: int = 0
+
+    @property
+    def servings(self) -> int:
+        return sum(p.servings for p in self.portions)
+
+    @property
+    def cost(self) -> float:
+        return round(sum(p.cost for p in self.portions), 2)
+
+
+@dataclass
+class _Stock:
+    item: InventoryRecord
+    servings_left: int
+    cost_per_serving: float
+    expires_in: Optional[int]
+    breakfast: bool
+
+
+@dataclass
+class MealPlanAllocation:
+    days: int
+    members: int
+    slots: List[MealSlot]
+    leftovers: List[Dict]
+    at_risk: List[Dict]
+
+    @property
+    def total_cost(self) -> float:
+        return round(sum(slot.cost for slot in self.slots), 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "days": self.days,
+            "members": self.members,
+            "total_cost": self.total_cost,
+            "slots": [
+                {
+                    "day": slot.day,
+                    "meal": slot.meal,
+                    "servings_needed": slot.servings_needed,
+                    "servings": slot.servings,
+                    "cost": slot.cost,
+                    "portions": [asdict(p) for p in slot.portions],
+                }
+                for slot in self.slots
+            ],
+            "leftovers": self.leftovers,
+            "at_risk": self.at_risk,
+        }
+
+
+def servings_per_unit(item: InventoryRecord) -> int:
+    name = (item.name or "").lower()
+    for pattern, servings in _SERVINGS_PATTERNS:
+        if pattern.search(name):
+            return servings
+    return DEFAULT_SERVINGS_PER_UNIT
+
+
+def plan_meals(
+    items: Iterable[InventoryRecord],
+    days: int,
+    members: int,
+    max_cost_per_serving: Optional[float] = None,
+    now: Optional[datetime] = None,
+) -> MealPlanAllocation:
+    """Allocate inventory servings to `days` x breakfast/lunch/dinner slots for `members` people.
+
+    An item is only used on days before it expires. Breakfast prefers
+    breakfast-type items and other meals prefer the rest; within that, items
+    that would otherwise expire during the plan go first. Items costing more
+    than `max_cost_per_serving` are used only when nothing cheaper is left,
+    unless they are about to go to waste anyway.
+    """
+    now = now or datetime.utcnow()
+    stock: List[_Stock] = []
+    for item in items:
+        units = item.remaining_quantity if item.remaining_quantity is not None else item.quantity
+        per_unit = servings_per_unit(item)
+        if units <= 0:
+            continue
+        text = f"{item.name or ''} {item.category or ''}".lower()
+        stock.append(
+            _Stock(
+                item=item,
+                servings_left=int(units * per_unit),
+                cost_per_serving=(item.purchase_price or 0) / per_unit,
+                expires_in=(item.expiry - now).days if item.expiry else None,
+                breakfast=bool(BREAKFAST_HINTS.search(text)),
+            )
+        )
+
+    slots: List[MealSlot] = []
+    for day in range(days):
+        for meal in MEALS:
+            slot = MealSlot(day=day + 1, meal=meal, servings_needed=members)
+            _fill_slot(slot, day, days, stock, members, max_cost_per_serving)
+            slots.append(slot)
+
+    leftovers = [
+        {"item_id": s.item.id, "name": s.item.name, "servings": s.servings_left}
+        for s in stock if s.servings_left > 0
+    ]
+    at_risk = [
+        {"item_id": s.item.id, "name": s.item.name, "servings": s.servings_left, "expires_in_days": s.expires_in}
+        for s in stock if s.servings_left > 0 and s.expires_in is not None and s.expires_in < days
+    ]
+    return MealPlanAllocation(days=days, members=members, slots=slots, leftovers=leftovers, at_risk=at_risk)
+
+
+def _fill_slot(slot: MealSlot, day: int, horizon: int, stock: List[_Stock], members: int, max_cost: Optional[float]):
+    usable = [s for s in stock if s.servings_left > 0 and (s.expires_in is None or s.expires_in >= day)]
+    wants_breakfast = slot.meal == "breakfast"
+
+    def priority(s: _Stock):
+        expiring = s.expires_in is not None and s.expires_in < horizon
+        over_budget = max_cost is not None and s.cost_per_serving > max_cost
+        return (
+            s.breakfast != wants_breakfast,
+            not expiring,
+            over_budget,
+            s.expires_in if s.expires_in is not None else 10**6,
+            s.cost_per_serving,
+            s.item.id or "",
+        )
+
+    needed = members
+    for s in sorted(usable, key=priority):
+        if needed <= 0 or len(slot.portions) >= MAX_ITEMS_PER_MEAL:
+            break
+        take = min(needed, s.servings_left)
+        s.servings_left -= take
+        needed -= take
+        slot.portions.append(
+            Portion(item_id=s.item.id, name=s.item.name, servings=take, cost=round(take * s.cost_per_serving, 2))
+        )
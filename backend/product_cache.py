@@ -0,0 +1,182 @@
+"""Two-tier cache for Open Food Facts product records.
+
+Lookups hit a bounded in-memory LRU first, then an on-disk SQLite table that
+survives restarts. Unknown UPCs are cached too ("negative" entries) with a
+shorter TTL so a product added to Open Food Facts later is eventually picked up.
+
+Found products are also indexed by the words in their names, so text read off
+a label can be matched to a known product without a network call.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+# Name words too common to identify a product
+STOPWORDS = {"the", "and", "with", "for", "from", "per", "net", "wt", "org", "new", "product", "upc"}
+
+
+def name_words(text: str) -> Set[str]:
+    return {word for word in re.findall(r"[a-z]{3,}", (text or "").lower()) if word not in STOPWORDS}
+
+
+class ProductCache:
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 2048,
+        ttl: float = 7 * 24 * 3600,
+        negative_ttl: float = 6 * 3600,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._words: Optional[Dict[str, Set[str]]] = None  # name word -> UPCs, built on first match
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "writes": 0,
+        }
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS products (
+                upc TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                found INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+
+    def get(self, upc: str) -> Optional[dict]:
+        """Return the cached record for `upc` (possibly a negative one) or None on a miss"""
+        with self._lock:
+            return self._lookup(upc, count=True)
+
+    def _lookup(self, upc: str, count: bool) -> Optional[dict]:
+        """get() without the lock; `count=False` leaves the hit/miss counters and LRU order alone"""
+        now = time.time()
+        entry = self._memory.get(upc)
+        if entry is not None:
+            expires_at, record = entry
+            if expires_at > now:
+                if count:
+                    self._memory.move_to_end(upc)
+                    self._count_hit("memory_hits", record)
+                return record
+            del self._memory[upc]
+
+        row = self._conn.execute(
+            "SELECT record, expires_at FROM products WHERE upc = ?", (upc,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            if count:
+                self._stats["misses"] += 1
+            return None
+
+        record = json.loads(row[0])
+        if count:
+            self._remember(upc, row[1], record)
+            self._count_hit("disk_hits", record)
+        return record
+
+    def put(self, upc: str, record: dict):
+        """Cache `record`; records with found=False get the shorter negative TTL"""
+        found = bool(record.get("found"))
+        expires_at = time.time() + (self.ttl if found else self.negative_ttl)
+        with self._lock:
+            self._remember(upc, expires_at, record)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO products (upc, record, found, expires_at) VALUES (?, ?, ?, ?)",
+                (upc, json.dumps(record), int(found), expires_at),
+            )
+            self._stats["writes"] += 1
+            if found and self._words is not None:
+                self._index_name(upc, record.get("name"))
+
+    def match_name(self, text: str, min_score: float = 0.5) -> Optional[dict]:
+        """The found product whose name best matches the words in `text`, if any.
+
+        A product's score is the fraction of its name words present in
+        `text`; ties go to the product matching more words.
+        """
+        words = name_words(text)
+        if not words:
+            return None
+        with self._lock:
+            if self._words is None:
+                self._build_word_index()
+            hits: Dict[str, int] = {}
+            for word in words:
+                for upc in self._words.get(word, ()):
+                    hits[upc] = hits.get(upc, 0) + 1
+            best, best_key = None, (min_score, 0)
+            for upc, count in hits.items():
+                # Candidates are not UPC lookups, so they stay out of the hit/miss counters
+                record = self._lookup(upc, count=False)
+                if not record or not record.get("found"):
+                    continue
+                key = (count / max(len(name_words(record.get("name"))), 1), count)
+                if key >= best_key:
+                    best, best_key = record, key
+        return best
+
+    def invalidate(self, upc: str):
+        with self._lock:
+            self._memory.pop(upc, None)
+            self._conn.execute("DELETE FROM products WHERE upc = ?", (upc,))
+
+    def purge_expired(self) -> int:
+        """Drop expired rows from the disk tier; returns how many were removed"""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM products WHERE expires_at <= ?", (time.time(),))
+            return cur.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _build_word_index(self):
+        self._words = {}
+        rows = self._conn.execute(
+            "SELECT upc, record FROM products WHERE found = 1 AND expires_at > ?", (time.time(),)
+        )
+        for upc, record in rows:
+            self._index_name(upc, json.loads(record).get("name"))
+
+    def _index_name(self, upc: str, name: Optional[str]):
+        for word in name_words(name):
+            self._words.setdefault(word, set()).add(upc)
+
+    def _remember(self, upc: str, expires_at: float, record: dict):
+        self._memory[upc] = (expires_at, record)
+        self._memory.move_to_end(upc)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _count_hit(self, tier: str, record: dict):
+        self._stats[tier] += 1
+        if not record.get("found"):
+            self._stats["negative_hits"] += 1
@@ -0,0 +1,185 @@
+"""Compact, size-bounded prompt sections.
+
+AI endpoints used to paste Python lists of dicts into their prompts, so a
+large pantry meant a large (and slow, and eventually too long) prompt. The
+helpers here render data as small pipe-separated tables instead: duplicate
+items are folded into one row, rows are ranked by expiry urgency and value,
+and rendering stops at a row limit and a token budget. Whatever does not fit
+is summarized in one trailing "+N more" line, so the same data always
+produces the same prompt.
+"""
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from config import PROMPT_MAX_ROWS, PROMPT_TOKEN_BUDGET
+from models import PurchaseRecord
+from records import InventoryRecord
+
+# Rough characters-per-token for English text and numbers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class PantryRow:
+    name: str
+    category: str
+    quantity: int
+    value: float
+    expiry_days: Optional[int]
+    count: int = 1
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def aggregate_items(items: Iterable[InventoryRecord], now: Optional[datetime] = None) -> List[PantryRow]:
+    """Fold inventory entries for the same product (UPC, else name) into one row.
+
+    Quantities and values add up; the row keeps the soonest expiry.
+    """
+    now = now or datetime.utcnow()
+    rows = {}
+    for item in items:
+        name = item.name or item.upc or "Unknown"
+        key = item.upc or name.lower()
+        quantity = item.remaining_quantity if item.remaining_quantity is not None else item.quantity
+        expiry_days = (item.expiry - now).days if item.expiry else None
+        row = rows.get(key)
+        if row is None:
+            rows[key] = PantryRow(
+                name=name,
+                category=(item.category or "").replace("en:", ""),
+                quantity=quantity,
+                value=(item.purchase_price or 0) * item.quantity,
+                expiry_days=expiry_days,
+            )
+            continue
+        row.quantity += quantity
+        row.value += (item.purchase_price or 0) * item.quantity
+        row.count += 1
+        if expiry_days is not None and (row.expiry_days is None or expiry_days < row.expiry_days):
+            row.expiry_days = expiry_days
+    return list(rows.values())
+
+
+def rank_rows(rows: Iterable[PantryRow]) -> List[PantryRow]:
+    """Most urgent first: soonest expiry, then highest value, then name"""
+    return sorted(
+        rows,
+        key=lambda r: (r.expiry_days if r.expiry_days is not None else math.inf, -r.value, r.name.lower()),
+    )
+
+
+def render_table(
+    header: Sequence[str],
+    rows: Sequence[Sequence],
+    *,
+    max_rows: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    overflow: Optional[Callable[[int], str]] = None,
+) -> str:
+    """Pipe-separated table of `rows` (already in priority order).
+
+    Rows are added until `max_rows` or `max_tokens` would be exceeded; the
+    rest are replaced by one line from `overflow(count)` ("+N more rows" by
+    default). The header always fits.
+    """
+    lines = ["|".join(header)]
+    budget = max_tokens if max_tokens is not None else math.inf
+    overflow = overflow or (lambda n: f"+{n} more rows")
+    used = estimate_tokens(lines[0])
+    # Reserve room for the overflow line so the budget is a hard limit
+    reserve = estimate_tokens(overflow(len(rows))) + 1
+    shown = 0
+    for row in rows:
+        if max_rows is not None and shown >= max_rows:
+            break
+        line = "|".join(_cell(value) for value in row)
+        cost = estimate_tokens(line) + 1
+        remaining = len(rows) - shown - 1
+        if used + cost + (reserve if remaining else 0) > budget:
+            break
+        lines.append(line)
+        used += cost
+        shown += 1
+    if shown < len(rows):
+        lines.append(overflow(len(rows) - shown))
+    return "\n".join(lines)
+
+
+def inventory_table(
+    items: Iterable[InventoryRecord],
+    *,
+    columns: Sequence[str] = ("name", "qty", "days_left", "value", "category"),
+    max_rows: int = PROMPT_MAX_ROWS,
+    max_tokens: int = PROMPT_TOKEN_BUDGET,
+    now: Optional[datetime] = None,
+) -> str:
+    """Aggregated, urgency-ranked inventory table for a prompt.
+
+    `columns` picks from name, qty, days_left, value and category. Items that
+    do not fit are summarized by count, units and value.
+    """
+    rows = rank_rows(aggregate_items(items, now))
+    getters = {
+        "name": lambda r: r.name,
+        "qty": lambda r: r.quantity,
+        "days_left": lambda r: r.expiry_days,
+        "value": lambda r: round(r.value, 2),
+        "category": lambda r: r.category or None,
+    }
+    cells = [[getters[column](row) for column in columns] for row in rows]
+
+    def overflow(count: int) -> str:
+        rest = rows[len(rows) - count:]
+        units = sum(r.quantity for r in rest)
+        value = sum(r.value for r in rest)
+        return f"+{count} more items ({units} units, ${value:.2f})"
+
+    return render_table(columns, cells, max_rows=max_rows, max_tokens=max_tokens, overflow=overflow)
+
+
+def purchases_table(purchases: Iterable[PurchaseRecord], *, max_rows: int = 20, max_tokens: int = 300) -> str:
+    """Purchases (newest first, as given) as item|store|price"""
+    purchases = list(purchases)
+    cells = [[p.item_name, p.store, round(p.price, 2)] for p in purchases]
+
+    def overflow(count: int) -> str:
+        rest = purchases[len(purchases) - count:]
+        return f"+{count} more purchases (${sum(p.price for p in rest):.2f})"
+
+    return render_table(("item", "store", "price"), cells, max_rows=max_rows, max_tokens=max_tokens, overflow=overflow)
+
+
+def name_list(items: Iterable[InventoryRecord], *, max_tokens: int = 150) -> str:
+    """Comma-separated distinct item names, most urgent first"""
+    names = [row.name for row in rank_rows(aggregate_items(items))]
+    shown: List[str] = []
+    used = 0
+    for i, name in enumerate(names):
+        more = len(names) - i - 1
+        tail = estimate_tokens(f", +{more} more") if more else 0
+        cost = estimate_tokens(name) + 1
+        if used + cost + tail > max_tokens:
+            break
+        shown.append(name)
+        used += cost
+    if not names:
+        return "none"
+    if not shown:
+        return f"{len(names)} items"
+    text = ", ".join(shown)
+    if len(shown) < len(names):
+        text += f", +{len(names) - len(shown)} more"
+    return text
@@ -0,0 +1,327 @@
+"""Local recipe matching for "what can I eat".
+
+Recipes list the ingredients they need as canonical names ("egg", "cheese",
+"chicken"). Inventory item names are mapped to those names by keyword rules
+(longest match wins, so "peanut butter" is not also "butter"), and the
+recipe index is inverted: for each ingredient, the recipes that use it. A
+query only touches recipes sharing an ingredient with the pantry, counting per
+recipe how many of its ingredients are on hand (coverage) and how urgently
+those items need using (1 for items expiring today or already expired,
+falling off as 1 / (1 + days left)). Recipes are ranked by coverage weighted
+by that urgency and the top K are returned without any network call; an LLM
+can still be asked to adapt the results, but only as an optional extra.
+
+A built-in set of everyday recipes is always loaded; a JSON file of further
+recipes can be added with RECIPES_PATH.
+"""
+import json
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from records import InventoryRecord
+
+# Extra weight given to recipes whose ingredients are about to expire
+URGENCY_WEIGHT = 1.0
+
+# Canonical ingredient -> keywords in item names, for names that differ from the ingredient itself
+INGREDIENT_RULES: Dict[str, str] = {
+    "egg": r"\beggs?\b",
+    "milk": r"\bmilk\b",
+    "butter": r"\bbutter\b|margarine",
+    "peanut butter": r"peanut butter|nut butter",
+    "cheese": r"cheese|cheddar|mozzarella|parmesan|gouda|feta",
+    "cream cheese": r"cream cheese",
+    "yogurt": r"yogh?urt|kefir",
+    "cream": r"\bcream\b",
+    "sour cream": r"sour cream",
+    "bread": r"bread|baguette|\bbuns?\b|\brolls?\b",
+    "bagel": r"bagels?",
+    "tortilla": r"tortillas?|\bwraps?\b",
+    "pasta": r"pasta|spaghetti|macaroni|penne|fusilli|linguine",
+    "noodles": r"noodles?|ramen",
+    "rice": r"\brice\b",
+    "oats": r"\boats?\b|oatmeal|porridge",
+    "cereal": r"cereal|granola|muesli",
+    "flour": r"\bflour\b",
+    "chicken": r"chicken",
+    "beef": r"\bbeef\b|steak|mince|hamburger",
+    "pork": r"\bpork\b",
+    "bacon": r"bacon",
+    "ham": r"\bham\b",
+    "sausage": r"sausages?|hot dogs?|chorizo",
+    "turkey": r"turkey",
+    "salmon": r"salmon",
+    "tuna": r"\btuna\b",
+    "fish": r"\bfish\b|\bcod\b|tilapia|haddock",
+    "shrimp": r"shrimp|prawns?",
+    "tofu": r"\btofu\b",
+    "beans": r"\bbeans?\b|chickpeas?",
+    "lentils": r"lentils?",
+    "tomato": r"tomato(es)?",
+    "tomato sauce": r"tomato sauce|pasta sauce|marinara|passata",
+    "onion": r"onions?|shallots?",
+    "garlic": r"garlic",
+    "potato": r"potato(es)?",
+    "sweet potato": r"sweet potato(es)?|yams?",
+    "carrot": r"carrots?",
+    "celery": r"celery",
+    "bell pepper": r"bell peppers?|capsicum|(red|green|yellow|orange|sweet) peppers?",
+    "broccoli": r"broccoli",
+    "spinach": r"spinach",
+    "lettuce": r"lettuce|salad greens|romaine|arugula|mixed greens",
+    "cucumber": r"cucumbers?",
+    "mushroom": r"mushrooms?",
+    "zucchini": r"zucchini|courgettes?",
+    "corn": r"\bcorn\b",
+    "peas": r"\bpeas\b",
+    "avocado": r"avocados?",
+    "lemon": r"lemons?|limes?",
+    "apple": r"apples?",
+    "banana": r"bananas?",
+    "berries": r"berr(y|ies)",
+    "orange": r"oranges?",
+    "salsa": r"salsa",
+    "honey": r"honey|maple syrup",
+    "jam": r"\bjam\b|jelly|preserves",
+    "hummus": r"hummus",
+}
+
+# name, ingredients, minutes, servings, instructions
+BUILTIN_RECIPES: List[Tuple[str, Tuple[str, ...], int, int, str]] = [
+    ("Scrambled eggs on toast", ("egg", "butter", "bread"), 10, 1, "Whisk the eggs, scramble gently in butter and serve on toast."),
+    ("Cheese omelette", ("egg", "cheese", "butter"), 10, 1, "Beat the eggs, cook in butter, add cheese and fold."),
+    ("Veggie frittata", ("egg", "spinach", "onion", "cheese"), 25, 3, "Soften onion and spinach, pour over beaten eggs and cheese, bake until set."),
+    ("French toast", ("egg", "milk", "bread", "butter"), 15, 2, "Dip bread in egg beaten with milk and fry in butter."),
+    ("Pancakes", ("flour", "egg", "milk", "butter"), 20, 3, "Whisk flour, egg and milk into a batter and cook in a buttered pan."),
+    ("Banana oatmeal", ("oats", "milk", "banana"), 10, 1, "Simmer oats in milk and top with sliced banana."),
+    ("Overnight oats", ("oats", "yogurt", "berries", "honey"), 5, 1, "Stir oats into yogurt, top with berries and honey, chill overnight."),
+    ("Yogurt parfait", ("yogurt", "cereal", "berries"), 5, 1, "Layer yogurt, granola or cereal and berries."),
+    ("Fruit smoothie", ("banana", "berries", "yogurt", "milk"), 5, 2, "Blend fruit with yogurt and milk."),
+    ("Peanut butter banana toast", ("bread", "peanut butter", "banana"), 5, 1, "Spread peanut butter on toast and top with banana."),
+    ("Bagel with cream cheese", ("bagel", "cream cheese"), 5, 1, "Toast the bagel and spread with cream cheese."),
+    ("Grilled cheese sandwich", ("bread", "cheese", "butter"), 10, 1, "Butter the bread, fill with cheese and fry until golden."),
+    ("Ham and cheese sandwich", ("bread", "ham", "cheese", "lettuce"), 5, 1, "Layer ham, cheese and lettuce between slices of bread."),
+    ("BLT", ("bread", "bacon", "lettuce", "tomato"), 15, 1, "Crisp the bacon and layer with lettuce and tomato on toast."),
+    ("Tuna salad sandwich", ("tuna", "bread", "celery", "lettuce"), 10, 2, "Mix tuna with chopped celery and serve in bread with lettuce."),
+    ("Chicken wrap", ("chicken", "tortilla", "lettuce", "tomato"), 15, 2, "Cook and slice the chicken, wrap with lettuce and tomato."),
+    ("Bean burritos", ("tortilla", "beans", "cheese", "salsa"), 15, 2, "Warm beans, fill tortillas with beans, cheese and salsa, roll up."),
+    ("Quesadillas", ("tortilla", "cheese", "bell pepper", "onion"), 15, 2, "Fill tortillas with cheese, pepper and onion and toast both sides."),
+    ("Garden salad", ("lettuce", "tomato", "cucumber", "carrot"), 10, 2, "Chop the vegetables and toss with a simple dressing."),
+    ("Hummus veggie plate", ("hummus", "carrot", "cucumber", "bell pepper"), 5, 2, "Slice the vegetables into sticks and serve with hummus."),
+    ("Spaghetti with tomato sauce", ("pasta", "tomato sauce", "garlic", "onion"), 25, 3, "Simmer onion and garlic in the sauce and toss with cooked pasta."),
+    ("Spaghetti bolognese", ("pasta", "beef", "tomato sauce", "onion", "garlic"), 40, 4, "Brown the beef with onion and garlic, simmer in sauce, serve over pasta."),
+    ("Macaroni and cheese", ("pasta", "cheese", "milk", "butter", "flour"), 25, 4, "Make a cheese sauce with butter, flour and milk and stir through macaroni."),
+    ("Creamy mushroom pasta", ("pasta", "mushroom", "cream", "garlic"), 25, 3, "Fry mushrooms and garlic, add cream and toss with pasta."),
+    ("Chicken stir-fry", ("chicken", "broccoli", "bell pepper", "rice", "garlic"), 25, 3, "Stir-fry chicken, then the vegetables and garlic; serve over rice."),
+    ("Tofu stir-fry", ("tofu", "broccoli", "carrot", "rice"), 25, 3, "Crisp the tofu, stir-fry the vegetables and serve over rice."),
+    ("Egg fried rice", ("rice", "egg", "peas", "carrot", "onion"), 20, 2, "Fry cold rice with vegetables, push aside and scramble the eggs in."),
+    ("Noodle soup", ("noodles", "chicken", "carrot", "celery"), 30, 4, "Simmer chicken with carrot and celery, then cook the noodles in the broth."),
+    ("Roast chicken and potatoes", ("chicken", "potato", "carrot", "onion"), 60, 4, "Roast chicken pieces with chopped potato, carrot and onion."),
+    ("Chicken and rice bake", ("chicken", "rice", "broccoli", "cheese"), 50, 4, "Bake chicken with rice, broccoli and stock, top with cheese."),
+    ("Beef tacos", ("beef", "tortilla", "lettuce", "tomato", "cheese"), 25, 4, "Brown and season the beef and fill tortillas with it and the toppings."),
+    ("Beef chili", ("beef", "beans", "tomato", "onion", "bell pepper"), 60, 6, "Brown the beef with onion and pepper, add beans and tomatoes, simmer."),
+    ("Vegetable chili", ("beans", "tomato", "onion", "bell pepper", "corn"), 45, 6, "Simmer beans, tomatoes, onion, pepper and corn with chili spices."),
+    ("Lentil soup", ("lentils", "carrot", "celery", "onion", "tomato"), 45, 6, "Soften the vegetables, add lentils, tomatoes and water, simmer until tender."),
+    ("Potato soup", ("potato", "onion", "milk", "butter"), 40, 4, "Cook potato and onion in butter and stock, blend with milk."),
+    ("Baked sweet potatoes", ("sweet potato", "beans", "sour cream"), 50, 2, "Bake the sweet potatoes and top with warm beans and sour cream."),
+    ("Sausage and peppers", ("sausage", "bell pepper", "onion"), 30, 3, "Brown the sausages and cook with sliced peppers and onion."),
+    ("Pork chops with apples", ("pork", "apple", "onion"), 30, 2, "Sear the chops, then cook sliced apple and onion in the pan."),
+    ("Baked salmon with lemon", ("salmon", "lemon", "garlic", "potato"), 30, 2, "Bake salmon with lemon and garlic alongside roast potatoes."),
+    ("Fish tacos", ("fish", "tortilla", "lettuce", "lemon", "sour cream"), 25, 3, "Pan-fry the fish, flake into tortillas with lettuce, lemon and sour cream."),
+    ("Garlic shrimp pasta", ("shrimp", "pasta", "garlic", "butter", "lemon"), 20, 3, "Sauté shrimp in garlic butter, add lemon and toss with pasta."),
+    ("Turkey burgers", ("turkey", "bread", "lettuce", "tomato", "onion"), 25, 4, "Shape and grill turkey patties and serve in buns with the toppings."),
+    ("Zucchini and mushroom skillet", ("zucchini", "mushroom", "onion", "garlic"), 20, 2, "Sauté the vegetables with garlic until golden."),
+    ("Spinach and mushroom quesadilla", ("tortilla", "spinach", "mushroom", "cheese"), 15, 2, "Wilt spinach with mushrooms, fill tortillas with cheese and toast."),
+    ("Avocado toast", ("bread", "avocado", "lemon"), 5, 1, "Mash avocado with lemon and spread on toast."),
+    ("Avocado egg toast", ("bread", "avocado", "egg"), 10, 1, "Top smashed avocado on toast with a fried egg."),
+    ("Apple crumble", ("apple", "oats", "flour", "butter"), 45, 6, "Cover sliced apples with an oat, flour and butter crumble and bake."),
+    ("Banana bread", ("banana", "flour", "egg", "butter"), 70, 8, "Mash ripe bananas into a batter with flour, egg and butter and bake."),
+    ("Toast with jam", ("bread", "butter", "jam"), 5, 1, "Toast the bread and spread with butter and jam."),
+    ("Fruit salad", ("apple", "banana", "orange", "berries"), 10, 3, "Chop the fruit and toss together."),
+]
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _slug(name: str) -> str:
+    return _NON_WORD.sub("-", name.lower()).strip("-")
+
+
+@dataclass(frozen=True, slots=True)
+class Recipe:
+    id: str
+    name: str
+    ingredients: Tuple[str, ...]
+    minutes: Optional[int] = None
+    servings: Optional[int] = None
+    instructions: str = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "ingredients": list(self.ingredients),
+            "minutes": self.minutes,
+            "servings": self.servings,
+            "instructions": self.instructions,
+        }
+
+
+@dataclass(slots=True)
+class RecipeMatch:
+    recipe: Recipe
+    score: float
+    coverage: float
+    have: List[str]
+    missing: List[str]
+
+
+def _ingredient_patterns(extra: Iterable[str] = ()) -> List[Tuple[str, "re.Pattern"]]:
+    """Matcher per ingredient, longest ingredient names first; unknown ones match their own name"""
+    patterns = dict(INGREDIENT_RULES)
+    for name in extra:
+        patterns.setdefault(name, r"\b%ss?\b" % re.escape(name))
+    return [(name, re.compile(patterns[name])) for name in sorted(patterns, key=len, reverse=True)]
+
+
+class RecipeIndex:
+    def __init__(self, recipes: Iterable[Recipe]):
+        self.recipes: List[Recipe] = []
+        seen = set()
+        for recipe in recipes:
+            # The first recipe with an id wins, so a dataset can replace a built-in recipe
+            if recipe.id in seen:
+                continue
+            seen.add(recipe.id)
+            self.recipes.append(recipe)
+        postings: Dict[str, List[int]] = {}
+        for i, recipe in enumerate(self.recipes):
+            for ingredient in set(recipe.ingredients):
+                postings.setdefault(ingredient, []).append(i)
+        self._postings = {name: np.array(ids, dtype=np.int32) for name, ids in postings.items()}
+        self._sizes = np.array([max(len(set(r.ingredients)), 1) for r in self.recipes], dtype=np.float64)
+        self._patterns = _ingredient_patterns(self._postings)
+        self.ingredients_in = lru_cache(maxsize=4096)(self._ingredients_in)
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    def _ingredients_in(self, text: str) -> Tuple[str, ...]:
+        """Canonical ingredients named in an item name; overlapping matches keep the longest"""
+        text = text.lower()
+        taken: List[Tuple[int, int]] = []
+        found = []
+        for name, pattern in self._patterns:
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                if any(start < e and s < end for s, e in taken):
+                    continue
+                taken.append((start, end))
+                found.append(name)
+                break
+        return tuple(found)
+
+    def pantry(self, items: Iterable[InventoryRecord], now: Optional[datetime] = None) -> Dict[str, Tuple[float, InventoryRecord]]:
+        """Ingredient -> (urgency, most urgent item supplying it) for items with something left"""
+        now = now or datetime.utcnow()
+        available: Dict[str, Tuple[float, InventoryRecord]] = {}
+        for item in items:
+            if item.remaining_quantity is not None and item.remaining_quantity <= 0:
+                continue
+            ingredients = self.ingredients_in(item.name or "") or self.ingredients_in(item.category or "")
+            if not ingredients:
+                continue
+            urgency = urgency_of(item, now)
+            for ingredient in ingredients:
+                current = available.get(ingredient)
+                if current is None or urgency > current[0]:
+                    available[ingredient] = (urgency, item)
+        return available
+
+    def match(self, available: Dict[str, float], k: int = 10, min_coverage: float = 0.5) -> List[RecipeMatch]:
+        """The `k` best recipes for the ingredients on hand (ingredient -> urgency), best first"""
+        if not self.recipes:
+            return []
+        have = np.zeros(len(self.recipes), dtype=np.float64)
+        urgency = np.zeros(len(self.recipes), dtype=np.float64)
+        for ingredient, weight in available.items():
+            ids = self._postings.get(ingredient)
+            if ids is not None:
+                have[ids] += 1
+                urgency[ids] += weight
+        coverage = have / self._sizes
+        candidates = np.flatnonzero((have > 0) & (coverage >= min_coverage))
+        if not len(candidates):
+            return []
+        # Rounded so that float summation order cannot break ties
+        scores = np.round(coverage[candidates] * (1 + URGENCY_WEIGHT * urgency[candidates] / self._sizes[candidates]), 9)
+        if len(candidates) > k:
+            # Everything scoring at least the k-th best, so ties at the cut are settled below
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            top = scores >= kth
+            candidates, scores = candidates[top], scores[top]
+        # Best score first; ties go to the recipe listed first
+        order = np.lexsort((candidates, -scores))[:k]
+        results = []
+        for i, score in zip(candidates[order], scores[order]):
+            recipe = self.recipes[i]
+            results.append(RecipeMatch(
+                recipe=recipe,
+                score=round(float(score), 4),
+                coverage=round(float(coverage[i]), 4),
+                have=[name for name in recipe.ingredients if name in available],
+                missing=[name for name in recipe.ingredients if name not in available],
+            ))
+        return results
+
+    def stats(self) -> dict:
+        info = self.ingredients_in.cache_info()
+        return {"recipes": len(self.recipes), "ingredients": len(self._postings), "name_hits": info.hits, "name_misses": info.misses}
+
+
+def urgency_of(item: InventoryRecord, now: datetime) -> float:
+    """1 for items expiring today or already expired, 1 / (1 + days left) otherwise, 0 without an expiry"""
+    if item.expiry is None:
+        return 0.0
+    days_left = (item.expiry - now).days
+    return 1.0 / (1 + max(days_left, 0))
+
+
+def builtin_recipes() -> List[Recipe]:
+    return [
+        Recipe(_slug(name), name, ingredients, minutes, servings, instructions)
+        for name, ingredients, minutes, servings, instructions in BUILTIN_RECIPES
+    ]
+
+
+def load_recipes(path: str) -> List[Recipe]:
+    """Recipes from a JSON list of {name, ingredients, [id, minutes, servings, instructions]} objects"""
+    with open(path) as f:
+        rows = json.load(f)
+    recipes = []
+    for row in rows:
+        ingredients = tuple(dict.fromkeys(str(i).strip().lower() for i in row.get("ingredients") or () if str(i).strip()))
+        if not row.get("name") or not ingredients:
+            continue
+        recipes.append(Recipe(
+            id=str(row.get("id") or _slug(row["name"])),
+            name=row["name"],
+            ingredients=ingredients,
+            minutes=row.get("minutes"),
+            servings=row.get("servings"),
+            instructions=row.get("instructions") or "",
+        ))
+    return recipes
+
+
+def load_recipe_index(path: Optional[str]) -> RecipeIndex:
+    """Index over the recipes at `path` (if present) followed by the built-in recipes"""
+    recipes = load_recipes(path) if path and os.path.exists(path) else []
+    return RecipeIndex([*recipes, *builtin_recipes()])
+
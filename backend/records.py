@@ -0,0 +1,154 @@
+"""Compact in-memory inventory records.
+
+The inventory index holds every item of every pantry a worker serves, so items
+are kept as slotted dataclasses rather than Pydantic models: category, store
+and unit strings are interned, nutrition is a fixed-length vector of the
+nutrients the app knows about (NaN where unknown) instead of a raw Open Food
+Facts dict, and the duplicated fields (`expiry_date`, `total_quantity`) are
+derived on the way out. Pydantic models are built only at the API boundary.
+"""
+import json
+import math
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from models import InventoryItem
+
+# Nutrients kept per item, in vector order; anything else is dropped
+NUTRIENTS = (
+    "energy-kcal_100g",
+    "energy_100g",
+    "fat_100g",
+    "saturated-fat_100g",
+    "carbohydrates_100g",
+    "sugars_100g",
+    "fiber_100g",
+    "proteins_100g",
+    "salt_100g",
+    "sodium_100g",
+    # Keys used by the pinned product table
+    "calories",
+    "carbs",
+    "protein",
+)
+_NUTRIENT_SLOTS = {name: i for i, name in enumerate(NUTRIENTS)}
+
+
+def pack_nutrition(nutrition: Optional[Dict[str, float]]) -> Optional[array]:
+    """Known nutrients as a fixed vector, or None when none are known"""
+    if not nutrition:
+        return None
+    vector = array("d", [math.nan]) * len(NUTRIENTS)
+    known = False
+    for name, value in nutrition.items():
+        slot = _NUTRIENT_SLOTS.get(name)
+        if slot is not None and value is not None:
+            vector[slot] = float(value)
+            known = True
+    return vector if known else None
+
+
+def unpack_nutrition(vector: Optional[array]) -> Dict[str, float]:
+    if vector is None:
+        return {}
+    return {name: value for name, value in zip(NUTRIENTS, vector) if not math.isnan(value)}
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+@dataclass(slots=True)
+class InventoryRecord:
+    id: str
+    upc: str
+    name: Optional[str]
+    purchase_price: Optional[float]
+    store: Optional[str]
+    quantity: int
+    unit: str
+    remaining_quantity: Optional[float]
+    expiry: Optional[datetime]
+    category: Optional[str]
+    purchase_date: Optional[datetime]
+    nutrition: Optional[array] = None
+
+    def __post_init__(self):
+        self.store = _intern(self.store)
+        self.unit = _intern(self.unit)
+        self.category = _intern(self.category)
+
+    @property
+    def expiry_date(self) -> Optional[str]:
+        return self.expiry.isoformat() if self.expiry else None
+
+    @property
+    def total_quantity(self) -> int:
+        return self.quantity
+
+    @classmethod
+    def from_model(cls, item: InventoryItem) -> "InventoryRecord":
+        return cls(
+            id=item.id,
+            upc=item.upc,
+            name=item.name,
+            purchase_price=item.purchase_price,
+            store=item.store,
+            quantity=item.quantity,
+            unit=item.unit,
+            remaining_quantity=item.remaining_quantity,
+            expiry=item.expiry,
+            category=item.category,
+            purchase_date=item.purchase_date,
+            nutrition=pack_nutrition(item.nutrition),
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "InventoryRecord":
+        """Load the JSON stored in the inventory table (InventoryItem's serialization)"""
+        raw = json.loads(data)
+        return cls(
+            id=raw["id"],
+            upc=raw["upc"],
+            name=raw.get("name"),
+            purchase_price=raw.get("purchase_price"),
+            store=raw.get("store"),
+            quantity=raw.get("quantity", 1),
+            unit=raw.get("unit") or "pieces",
+            remaining_quantity=raw.get("remaining_quantity"),
+            expiry=_datetime(raw.get("expiry")),
+            category=raw.get("category"),
+            purchase_date=_datetime(raw.get("purchase_date")),
+            nutrition=pack_nutrition(raw.get("nutrition")),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "upc": self.upc,
+            "name": self.name,
+            "purchase_price": self.purchase_price,
+            "store": self.store,
+            "quantity": self.quantity,
+            "unit": self.unit,
+            "remaining_quantity": self.remaining_quantity,
+            "total_quantity": self.total_quantity,
+            "expiry": self.expiry_date,
+            "expiry_date": self.expiry_date,
+            "nutrition": unpack_nutrition(self.nutrition),
+            "category": self.category,
+            "purchase_date": self.purchase_date.isoformat() if self.purchase_date else None,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def to_model(self) -> InventoryItem:
+        return InventoryItem(**self.to_dict())
@@ -0,0 +1,55 @@
+"""Cache for AI endpoint responses.
+
+Entries are keyed by a content hash of everything an endpoint puts into its
+prompt, so a repeat page view with the same inventory, purchases and
+parameters is answered from memory instead of re-prompting the LLM. A write
+changes the prompt and so the key, which means nothing needs invalidating and
+one household's writes never evict another's answers; superseded entries
+expire after a TTL or fall out of the size bound (LRU).
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 15 * 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """Stable hash of the given prompt inputs"""
+        payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return value
+            del self._entries[key]
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,315 @@
+"""Shelf-life estimation for inventory items.
+
+Most products resolve from a local rule table (name keywords, then Open Food
+Facts category tags). Anything else goes to the LLM once per normalized
+(name, category) pair; the answer is memoized in SQLite so the same product
+type never needs another call. Many unknown items are estimated in batched
+prompts of up to BATCH_SIZE products, a few batches at a time.
+"""
+import asyncio
+import re
+import sqlite3
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from llm import UNAVAILABLE
+from singleflight import SingleFlight
+
+MAX_SHELF_LIFE_DAYS = 365
+DEFAULT_SHELF_LIFE_DAYS = 30
+# Products per batched prompt and batched prompts in flight at once
+BATCH_SIZE = 50
+BATCH_CONCURRENCY = 4
+
+# Name keywords, checked in order with the first match winning, so multi-word and more
+# specific names come first ("milk chocolate" is chocolate but "chocolate milk" is milk,
+# "canned tuna" is canned, "cream cheese" is not cheese)
+KEYWORD_RULES: List[Tuple[str, int]] = [
+    (r"frozen|ice cream", 90),
+    (r"canned|tinned|\bcan\b", 365),
+    (r"buttermilk", 14),
+    (r"(chocolate|strawberry|banana) milk\b", 7),
+    (r"chocolate|candy|candies", 270),
+    (r"cookie|biscuit|cracker", 90),
+    (r"cereal|granola|\boats?\b|oatmeal", 180),
+    (r"chips|crisps|popcorn|pretzel", 60),
+    (r"peanut butter|nut butter", 180),
+    (r"yogh?urt|kefir", 14),
+    (r"sour cream|cream cheese|cream\b", 10),
+    (r"cheddar|parmesan|gouda|cheese", 30),
+    (r"\bbutter\b|margarine", 60),
+    (r"milk", 7),
+    (r"\beggs?\b", 28),
+    (r"tortilla|wrap", 14),
+    (r"bread|bagel|\bbuns?\b|baguette|croissant|muffin", 5),
+    (r"chicken|turkey|poultry", 2),
+    (r"shrimp|prawn|salmon|fish|seafood|cod\b|tilapia", 2),
+    (r"bacon|hot dog|deli", 7),
+    (r"\bham\b", 5),
+    (r"beef|pork|lamb|steak|sausage|mince", 3),
+    (r"juice", 10),
+    (r"soda|cola|\bpop\b", 270),
+    (r"\bwater\b", 365),
+    (r"coffee", 180),
+    (r"\btea\b", 365),
+    (r"tofu", 14),
+    (r"hummus|salsa|guacamole", 7),
+    (r"lettuce|spinach|salad|arugula|kale|herbs?\b|cilantro|parsley", 5),
+    (r"berr(y|ies)|strawberr|raspberr|blueberr", 4),
+    (r"avocado", 4),
+    (r"mushroom", 5),
+    (r"banana", 5),
+    (r"tomato", 7),
+    (r"cucumber|zucchini|pepper|broccoli|cauliflower", 7),
+    (r"apple|pear", 30),
+    (r"orange|lemon|lime|grapefruit|citrus", 21),
+    (r"carrot|celery|cabbage", 21),
+    (r"potato|onion|garlic|squash", 30),
+    (r"\brice\b|pasta|spaghetti|macaroni|noodle|quinoa|lentil|dried beans|couscous", 365),
+    (r"flour", 240),
+    (r"sugar|honey|salt|vinegar", 365),
+    (r"\boil\b", 365),
+    (r"jam|jelly|ketchup|mustard|mayo|sauce|dressing|syrup", 180),
+    (r"\bnuts?\b|almond|cashew|walnut|peanut", 180),
+]
+_KEYWORD_PATTERNS = [(re.compile(pattern), days) for pattern, days in KEYWORD_RULES]
+
+# Open Food Facts category tags (without the "en:" prefix) plus the legacy coarse categories
+CATEGORY_RULES: Dict[str, int] = {
+    "frozen-foods": 90,
+    "ice-creams": 90,
+    "canned-foods": 365,
+    "milks": 7,
+    "yogurts": 14,
+    "cheeses": 30,
+    "butters": 60,
+    "creams": 10,
+    "eggs": 28,
+    "dairies": 14,
+    "breads": 5,
+    "meats": 3,
+    "poultry": 2,
+    "poultries": 2,
+    "fishes": 2,
+    "seafood": 2,
+    "fresh-vegetables": 7,
+    "vegetables": 7,
+    "fresh-fruits": 7,
+    "fruits": 7,
+    "salads": 4,
+    "pastas": 365,
+    "rices": 365,
+    "cereals-and-their-products": 180,
+    "breakfast-cereals": 180,
+    "flours": 240,
+    "sugars": 365,
+    "biscuits-and-cakes": 60,
+    "biscuits": 90,
+    "chocolates": 270,
+    "confectioneries": 270,
+    "snacks": 60,
+    "salty-snacks": 60,
+    "sweet-snacks": 90,
+    "fruit-juices": 10,
+    "juices": 10,
+    "sodas": 270,
+    "waters": 365,
+    "coffees": 180,
+    "teas": 365,
+    "beverages": 180,
+    "condiments": 180,
+    "sauces": 180,
+    "spreads": 180,
+    "honeys": 365,
+    "jams": 180,
+    "vegetable-oils": 365,
+    "fats": 180,
+    "legumes": 365,
+    "nuts": 180,
+    # Legacy coarse categories
+    "fresh": 7,
+    "dairy": 14,
+    "meat": 5,
+    "pantry": 180,
+    "frozen": 90,
+    "bread": 5,
+}
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase, drop sizes/numbers and punctuation so "Milk 2% 4L" and "milk" share a key"""
+    name = (name or "").lower()
+    name = re.sub(r"\d+([.,]\d+)?\s*(%|kg|g|mg|l|ml|oz|lb|lbs|ct|pk|pack)?\b", " ", name)
+    name = re.sub(r"[^a-z\s]", " ", name)
+    return " ".join(name.split())
+
+
+def normalize_category(category: Optional[str]) -> str:
+    category = (category or "").strip().lower()
+    if ":" in category:
+        category = category.split(":", 1)[1]
+    return category.replace(" ", "-")
+
+
+def rule_days(name: Optional[str], category: Optional[str] = None) -> Optional[int]:
+    """Shelf life from the local rule table, or None if no rule matches"""
+    normalized = normalize_name(name)
+    for pattern, days in _KEYWORD_PATTERNS:
+        if pattern.search(normalized):
+            return days
+    return CATEGORY_RULES.get(normalize_category(category))
+
+
+def parse_days(text: str) -> Optional[int]:
+    if not text or text.startswith(UNAVAILABLE):
+        return None
+    match = re.search(r"\d+", text)
+    if not match:
+        return None
+    return _clamp(int(match.group()))
+
+
+def _clamp(days: int) -> int:
+    return max(1, min(days, MAX_SHELF_LIFE_DAYS))
+
+
+class ShelfLifeEstimator:
+    def __init__(self, complete: Callable[[str, str], Awaitable[str]], path: Optional[str] = None):
+        """`complete(prompt, system)` runs one LLM completion; `path` persists the memo table"""
+        self._complete = complete
+        self._memo: Dict[Tuple[str, str], int] = {}
+        self._lookups = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {"rule_hits": 0, "memo_hits": 0, "llm_calls": 0, "llm_items": 0, "defaults": 0}
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS shelf_life (
+                    name TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    days INTEGER NOT NULL,
+                    PRIMARY KEY (name, category)
+                )
+                """
+            )
+            for name, category, days in self._conn.execute("SELECT name, category, days FROM shelf_life"):
+                self._memo[(name, category)] = days
+
+    async def days(self, name: Optional[str], category: Optional[str] = None) -> int:
+        """Shelf life in days for one product"""
+        local = self._local_days(name, category)
+        if local is not None:
+            return local
+
+        key = self._key(name, category)
+        return await self._lookups.do(key, lambda: self._ask_one(name, category, key))
+
+    async def days_many(self, items: Iterable[Tuple[Optional[str], Optional[str]]]) -> List[int]:
+        """Shelf life for many (name, category) pairs, asking the LLM about unknowns in batches"""
+        items = list(items)
+        results: List[Optional[int]] = [self._local_days(name, category) for name, category in items]
+
+        unknown: Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]] = {}
+        for (name, category), days in zip(items, results):
+            if days is None:
+                unknown.setdefault(self._key(name, category), (name, category))
+
+        answers = await self._ask_batch(unknown) if unknown else {}
+        return [
+            days if days is not None else answers.get(self._key(name, category), DEFAULT_SHELF_LIFE_DAYS)
+            for (name, category), days in zip(items, results)
+        ]
+
+    def stats(self) -> dict:
+        return {**self._stats, "memo_entries": len(self._memo)}
+
+    def _key(self, name: Optional[str], category: Optional[str]) -> Tuple[str, str]:
+        return normalize_name(name), normalize_category(category)
+
+    def _local_days(self, name: Optional[str], category: Optional[str]) -> Optional[int]:
+        days = rule_days(name, category)
+        if days is not None:
+            self._stats["rule_hits"] += 1
+            return days
+        days = self._memo.get(self._key(name, category))
+        if days is not None:
+            self._stats["memo_hits"] += 1
+        return days
+
+    def _remember(self, key: Tuple[str, str], days: int):
+        with self._lock:
+            self._memo[key] = days
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO shelf_life (name, category, days) VALUES (?, ?, ?)",
+                    (key[0], key[1], days),
+                )
+
+    async def _ask_one(self, name: Optional[str], category: Optional[str], key: Tuple[str, str]) -> int:
+        prompt = f"""
+    Estimate the shelf life in days for: {name}
+    Category: {category or 'unknown'}
+
+    Consider typical storage conditions (pantry/fridge/freezer).
+    Return only a number representing days until expiry.
+    """
+        self._stats["llm_calls"] += 1
+        self._stats["llm_items"] += 1
+        days = parse_days(await self._complete(prompt, "You are a food safety expert. Return only the number of days."))
+        if days is None:
+            # Not memoized, so a later add retries the LLM
+            self._stats["defaults"] += 1
+            return DEFAULT_SHELF_LIFE_DAYS
+        self._remember(key, days)
+        return days
+
+    async def _ask_batch(self, unknown: Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]]) -> Dict[Tuple[str, str], int]:
+        pairs = list(unknown.items())
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def ask(chunk):
+            async with limit:
+                return await self._ask_chunk(dict(chunk))
+
+        answers: Dict[Tuple[str, str], int] = {}
+        for chunk_answers in await asyncio.gather(
+            *[ask(pairs[start:start + BATCH_SIZE]) for start in range(0, len(pairs), BATCH_SIZE)]
+        ):
+            answers.update(chunk_answers)
+        return answers
+
+    async def _ask_chunk(self, unknown: Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]]) -> Dict[Tuple[str, str], int]:
+        keys = list(unknown)
+        lines = "\n".join(
+            f"{n}. {name} (category: {category or 'unknown'})"
+            for n, (name, category) in enumerate(unknown.values(), 1)
+        )
+        prompt = f"""
+    Estimate the shelf life in days for each product below, assuming typical
+    storage conditions (pantry/fridge/freezer).
+
+    {lines}
+
+    Answer with one line per product in the form "<number>: <days>" and nothing else.
+    """
+        self._stats["llm_calls"] += 1
+        self._stats["llm_items"] += len(keys)
+        try:
+            text = await self._complete(prompt, "You are a food safety expert. Return only the numbered list of days.")
+        except Exception:
+            # Only this batch falls back to the default; the others keep their answers
+            text = UNAVAILABLE
+
+        answers: Dict[Tuple[str, str], int] = {}
+        if not text.startswith(UNAVAILABLE):
+            for match in re.finditer(r"^\s*(\d+)\s*[:.)-]\s*(\d+)", text, re.MULTILINE):
+                index = int(match.group(1)) - 1
+                if 0 <= index < len(keys):
+                    answers[keys[index]] = _clamp(int(match.group(2)))
+        for key, days in answers.items():
+            self._remember(key, days)
+        self._stats["defaults"] += len(keys) - len(answers)
+        return answers
@@ -0,0 +1,45 @@
+"""Request coalescing for concurrent identical lookups.
+
+While a call for some key is in flight, later callers for the same key await
+the same future instead of issuing their own upstream request.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn()` once per key at a time; concurrent callers share its result.
+
+        The shared call is shielded, so one caller being cancelled (e.g. its
+        client disconnected) doesn't fail the lookup for everyone else.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self.shared += 1
+        return await asyncio.shield(future)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": self.in_flight()}
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Nobody may be awaiting a future whose callers were all cancelled
+        if not future.cancelled():
+            future.exception()
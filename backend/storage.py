@@ -0,0 +1,617 @@
+"""SQLite-backed persistence for inventory, purchase history, meal usage and settings.
+
+The database runs in WAL mode so several uvicorn workers on one host can share
+it: readers never block the writer and every worker sees committed changes.
+Endpoints go through the repositories below instead of module-level lists.
+"""
+import dataclasses
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from aggregates import UNCATEGORIZED, SpendingAggregates, month_key
+from analytics import PurchaseColumns
+from inventory_index import InventoryIndex
+from models import InventoryItem, PurchaseRecord
+from records import InventoryRecord, pack_nutrition
+
+# Removed-item tombstones kept for /inventory/changes; older clients resync from a full list
+TOMBSTONES_KEPT = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventory (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    upc TEXT NOT NULL,
+    store TEXT,
+    category TEXT,
+    expiry TEXT,
+    purchase_date TEXT,
+    value REAL NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    created_version INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_inventory_upc ON inventory (upc);
+CREATE INDEX IF NOT EXISTS idx_inventory_expiry ON inventory (expiry);
+CREATE INDEX IF NOT EXISTS idx_inventory_store ON inventory (store);
+CREATE INDEX IF NOT EXISTS idx_inventory_version ON inventory (version);
+
+-- Inventory change counter: every write bumps it and stamps the rows it touches,
+-- and removed items leave a tombstone so clients can sync only what changed
+CREATE TABLE IF NOT EXISTS inventory_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    pruned_through INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO inventory_version (id, version) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS inventory_tombstones (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_inventory_tombstones_version ON inventory_tombstones (version);
+
+CREATE TABLE IF NOT EXISTS purchases (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    upc TEXT NOT NULL,
+    item_name TEXT NOT NULL,
+    price REAL NOT NULL,
+    store TEXT NOT NULL,
+    date TEXT NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_purchases_date ON purchases (date);
+CREATE INDEX IF NOT EXISTS idx_purchases_store ON purchases (store);
+CREATE INDEX IF NOT EXISTS idx_purchases_upc ON purchases (upc);
+
+CREATE TABLE IF NOT EXISTS spend_totals (
+    month TEXT NOT NULL,
+    store TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total REAL NOT NULL DEFAULT 0,
+    items INTEGER NOT NULL DEFAULT 0,
+    purchases INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, store, category)
+);
+
+CREATE TABLE IF NOT EXISTS meals (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    servings_made INTEGER NOT NULL DEFAULT 1,
+    notes TEXT,
+    total_cost REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS usage_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    meal_seq INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    item_name TEXT,
+    quantity_used REAL NOT NULL,
+    unit TEXT,
+    cost REAL NOT NULL DEFAULT 0,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_events_meal ON usage_events (meal_seq);
+CREATE INDEX IF NOT EXISTS idx_usage_events_item ON usage_events (item_id);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class Database:
+    """One SQLite connection per process, serialized by a lock"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+        self.rollbacks = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block of statements atomically; nested blocks join the outer transaction"""
+        with self._lock:
+            if self._conn.in_transaction:
+                yield self._conn
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self.rollbacks += 1
+                raise
+            self._conn.execute("COMMIT")
+
+    def query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _migrate(self):
+        """Bring databases created by older versions up to the current schema"""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(purchases)")}
+        if columns and "category" not in columns:
+            self._conn.execute("ALTER TABLE purchases ADD COLUMN category TEXT")
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(inventory)")}
+        for column in ("created_version", "version"):
+            if columns and column not in columns:
+                self._conn.execute(f"ALTER TABLE inventory ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
+    def data_version(self) -> tuple:
+        """Changes whenever another connection commits, or this one rolls back"""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0], self.rollbacks
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class InventoryRepository:
+    """Inventory rows in SQLite, served from an in-memory InventoryIndex.
+
+    Items are held and returned as compact InventoryRecords; convert with
+    `to_model()` at the API boundary. The index is rebuilt from the table whenever another worker has committed
+    (or a transaction here rolled back); otherwise writes update it in place.
+
+    Every write bumps the inventory version and stamps the rows it changed with
+    it; removed items leave tombstones (the newest TOMBSTONES_KEPT are kept), so
+    `changes(since)` can tell a client exactly what happened after the version
+    it last saw.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._index: Optional[InventoryIndex] = None
+        self._index_version: Optional[tuple] = None
+        self._version = 0
+        self._pruned_through = 0
+        # item id -> (record, its encoded API form); reused while the record is unchanged
+        self._encoded: Dict[str, Tuple[InventoryRecord, bytes]] = {}
+
+    def index(self) -> InventoryIndex:
+        version = self.db.data_version()
+        if self._index is None or version != self._index_version:
+            rows = self.db.query("SELECT data FROM inventory ORDER BY seq")
+            self._index = InventoryIndex(InventoryRecord.from_json(row["data"]) for row in rows)
+            counter = self.db.query_one("SELECT version, pruned_through FROM inventory_version WHERE id = 1")
+            self._version, self._pruned_through = counter["version"], counter["pruned_through"]
+            self._index_version = version
+        return self._index
+
+    def version(self) -> int:
+        """Inventory version; changes with every write"""
+        self.index()
+        return self._version
+
+    def _bump(self, conn: sqlite3.Connection) -> int:
+        self._version = conn.execute(
+            "UPDATE inventory_version SET version = version + 1 WHERE id = 1 RETURNING version"
+        ).fetchone()[0]
+        return self._version
+
+    def add(self, item: Union[InventoryItem, InventoryRecord]) -> InventoryRecord:
+        if isinstance(item, InventoryItem):
+            item = InventoryRecord.from_model(item)
+        with self.db.transaction() as conn:
+            index = self.index()
+            version = self._bump(conn)
+            conn.execute(
+                """
+                INSERT INTO inventory (id, upc, store, category, expiry, purchase_date, value, data, created_version, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                self._columns(item) + (version, version),
+            )
+            conn.execute("DELETE FROM inventory_tombstones WHERE id = ?", (item.id,))
+            index.add(item)
+        return item
+
+    def get(self, item_id: str) -> Optional[InventoryRecord]:
+        return self.index().get(item_id)
+
+    def list(self) -> List[InventoryRecord]:
+        return list(self.index())
+
+    def page(self, after: int, limit: int) -> Tuple[List[InventoryRecord], Optional[int]]:
+        """Up to `limit` items added after cursor `after`, oldest first, and the cursor for the next page"""
+        index = self.index()
+        rows = self.db.query("SELECT seq, id FROM inventory WHERE seq > ? ORDER BY seq LIMIT ?", (after, limit + 1))
+        next_cursor = rows[limit - 1]["seq"] if len(rows) > limit else None
+        items = [index.get(row["id"]) for row in rows[:limit]]
+        return [item for item in items if item is not None], next_cursor
+
+    def changes(self, since: int) -> Optional[Tuple[List[InventoryRecord], List[InventoryRecord], List[str]]]:
+        """(added, updated, removed ids) after version `since`; None when tombstones that old are gone"""
+        index = self.index()
+        if since < self._pruned_through or since > self._version:
+            return None
+        added, updated = [], []
+        for row in self.db.query("SELECT id, created_version FROM inventory WHERE version > ? ORDER BY seq", (since,)):
+            item = index.get(row["id"])
+            if item is not None:
+                (added if row["created_version"] > since else updated).append(item)
+        removed = [
+            row["id"] for row in self.db.query(
+                "SELECT id FROM inventory_tombstones WHERE version > ? ORDER BY version", (since,)
+            )
+        ]
+        return added, updated, removed
+
+    def count(self) -> int:
+        return len(self.index())
+
+    def total_value(self) -> float:
+        return self.index().total_value
+
+    def expiring_within(self, days: int) -> List[InventoryRecord]:
+        return self.index().expiring_within(days)
+
+    def by_expiry(self) -> List[InventoryRecord]:
+        return self.index().by_expiry()
+
+    def update(self, item_id: str, **fields: Any) -> Optional[InventoryRecord]:
+        """Patch fields of one item; returns the updated item or None if it no longer exists"""
+        if "nutrition" in fields:
+            fields["nutrition"] = pack_nutrition(fields["nutrition"])
+        with self.db.transaction() as conn:
+            # Read inside the write transaction so a patch from another worker is merged, not overwritten
+            index = self.index()
+            current = index.get(item_id)
+            if current is None:
+                return None
+            item = dataclasses.replace(current, **fields)
+            version = self._bump(conn)
+            conn.execute(
+                """
+                UPDATE inventory SET upc = ?, store = ?, category = ?, expiry = ?, purchase_date = ?, value = ?, data = ?,
+                    version = ?
+                WHERE id = ?
+                """,
+                self._columns(item)[1:] + (version, item_id),
+            )
+            index.replace(item)
+        return item
+
+    def remove(self, item_id: str) -> Optional[InventoryRecord]:
+        with self.db.transaction() as conn:
+            index = self.index()
+            if index.get(item_id) is None:
+                return None
+            self._tombstone(conn, "WHERE id = ?", (item_id,))
+            conn.execute("DELETE FROM inventory WHERE id = ?", (item_id,))
+            return index.remove(item_id)
+
+    def remove_by_upc(self, upc: str, quantity: int) -> int:
+        """Remove up to `quantity` items matching `upc`, oldest first"""
+        with self.db.transaction() as conn:
+            index = self.index()
+            ids = index.ids_for_upc(upc, quantity)
+            if not ids:
+                return 0
+            self._tombstone(conn, f"WHERE id IN ({','.join('?' * len(ids))})", tuple(ids))
+            conn.executemany("DELETE FROM inventory WHERE id = ?", [(item_id,) for item_id in ids])
+            for item_id in ids:
+                index.remove(item_id)
+        return len(ids)
+
+    def clear(self):
+        with self.db.transaction() as conn:
+            index = self.index()
+            self._tombstone(conn, "", ())
+            conn.execute("DELETE FROM inventory")
+            index.clear()
+
+    def _tombstone(self, conn: sqlite3.Connection, where: str, params: tuple):
+        """Record the inventory rows matching `where` as removed at a new version, then prune old tombstones"""
+        version = self._bump(conn)
+        conn.execute(f"INSERT OR REPLACE INTO inventory_tombstones (id, version) SELECT id, ? FROM inventory {where}", (version, *params))
+        oldest_kept = conn.execute(
+            "SELECT version FROM inventory_tombstones ORDER BY version DESC LIMIT 1 OFFSET ?", (TOMBSTONES_KEPT,)
+        ).fetchone()
+        if oldest_kept is not None:
+            # Whole versions go at once, so a client either gets all of a version's removals or a reset
+            conn.execute("DELETE FROM inventory_tombstones WHERE version <= ?", (oldest_kept[0],))
+            conn.execute("UPDATE inventory_version SET pruned_through = ? WHERE id = 1", (oldest_kept[0],))
+            self._pruned_through = oldest_kept[0]
+
+    def encode(self, items: Iterable[InventoryRecord]) -> bytes:
+        """The items' API form as a JSON array, re-encoding only items changed since the last call"""
+        encoded = self._encoded
+        parts = []
+        for item in items:
+            cached = encoded.get(item.id)
+            if cached is None or cached[0] is not item:
+                cached = encoded[item.id] = (item, json.dumps(item.to_dict(), separators=(",", ":")).encode())
+            parts.append(cached[1])
+        # Drop encodings of removed items once they outnumber the live ones
+        live = self.index()
+        if len(encoded) > 2 * len(live) + 64:
+            self._encoded = {item_id: value for item_id, value in encoded.items() if live.get(item_id) is value[0]}
+        return b"[" + b",".join(parts) + b"]"
+
+    @staticmethod
+    def _columns(item: InventoryRecord) -> tuple:
+        return (
+            item.id,
+            item.upc,
+            item.store,
+            item.category,
+            _iso(item.expiry),
+            _iso(item.purchase_date),
+            (item.purchase_price or 0) * item.quantity,
+            item.to_json(),
+        )
+
+
+class PurchaseRepository:
+    """Append-only purchase history plus running spend totals.
+
+    Each purchase also upserts its (month, store, category) row in
+    spend_totals inside the same transaction, and the in-memory
+    SpendingAggregates is rebuilt from that small table only when another
+    worker has committed.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._aggregates: Optional[SpendingAggregates] = None
+        self._aggregates_version: Optional[tuple] = None
+        self._backfilled = False
+        self._columns = PurchaseColumns()
+
+    def aggregates(self) -> SpendingAggregates:
+        version = self.db.data_version()
+        if self._aggregates is None or version != self._aggregates_version:
+            if not self._backfilled:
+                self._backfill_totals()
+                self._backfilled = True
+            aggregates = SpendingAggregates()
+            for row in self.db.query("SELECT * FROM spend_totals"):
+                aggregates.add(row["month"], row["store"], row["category"], row["total"], row["items"], row["purchases"])
+            self._aggregates = aggregates
+            self._aggregates_version = self.db.data_version()
+        return self._aggregates
+
+    def add(self, record: PurchaseRecord) -> PurchaseRecord:
+        aggregates = self.aggregates()
+        month = month_key(record.date)
+        category = record.category or UNCATEGORIZED
+        amount = record.price * record.quantity
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO purchases (upc, item_name, price, store, date, quantity, category) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record.upc, record.item_name, record.price, record.store, _iso(record.date), record.quantity, record.category),
+            )
+            conn.execute(
+                """
+                INSERT INTO spend_totals (month, store, category, total, items, purchases) VALUES (?, ?, ?, ?, ?, 1)
+                ON CONFLICT(month, store, category) DO UPDATE SET
+                    total = total + excluded.total,
+                    items = items + excluded.items,
+                    purchases = purchases + 1
+                """,
+                (month, record.store, category, amount, record.quantity),
+            )
+            aggregates.add(month, record.store, category, amount, record.quantity)
+        return record
+
+    def columns(self) -> PurchaseColumns:
+        """The history in columnar form, topped up with purchases added since the last call"""
+        # A primary-key range scan, so checking for new rows is cheap even when there are none
+        self._columns.append(self.db.query(
+            "SELECT seq, upc, item_name, price, store, date, quantity, category FROM purchases WHERE seq > ? ORDER BY seq",
+            (self._columns.last_seq,),
+        ))
+        return self._columns
+
+    def list(self) -> List[PurchaseRecord]:
+        return [self._record(row) for row in self.db.query("SELECT * FROM purchases ORDER BY seq")]
+
+    def recent(self, limit: int) -> List[PurchaseRecord]:
+        """The last `limit` purchases, oldest first"""
+        rows = self.db.query("SELECT * FROM purchases ORDER BY seq DESC LIMIT ?", (limit,))
+        return [self._record(row) for row in reversed(rows)]
+
+    def count(self) -> int:
+        return self.aggregates().purchases
+
+    def spent_in_month(self, when: datetime) -> float:
+        return self.aggregates().spent_in(month_key(when))
+
+    def by_store(self, month: Optional[datetime] = None) -> Dict[str, Dict[str, float]]:
+        return self.aggregates().by_store(month_key(month) if month else None)
+
+    def by_category(self, month: Optional[datetime] = None) -> Dict[str, Dict[str, float]]:
+        return self.aggregates().by_category(month_key(month) if month else None)
+
+    def _backfill_totals(self):
+        """Build spend_totals from the raw history for databases that predate it"""
+        with self.db.transaction() as conn:
+            if conn.execute("SELECT 1 FROM spend_totals LIMIT 1").fetchone():
+                return
+            conn.execute(
+                """
+                INSERT INTO spend_totals (month, store, category, total, items, purchases)
+                SELECT substr(date, 1, 7), store, COALESCE(category, ?), SUM(price * quantity), SUM(quantity), COUNT(*)
+                FROM purchases GROUP BY 1, 2, 3
+                """,
+                (UNCATEGORIZED,),
+            )
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> PurchaseRecord:
+        return PurchaseRecord(
+            upc=row["upc"],
+            item_name=row["item_name"],
+            price=row["price"],
+            store=row["store"],
+            date=datetime.fromisoformat(row["date"]),
+            quantity=row["quantity"],
+            category=row["category"],
+        )
+
+
+class InsufficientQuantity(Exception):
+    """Raised when a portion uses more of an item than is left"""
+
+
+class UsageRepository:
+    """Append-only log of portions used, grouped into meals.
+
+    Recording a portion appends one meal row and one usage event and
+    decrements the item's remaining_quantity in the same transaction, so the
+    inventory always reflects the log without replaying it. Meal history is
+    paged newest first by the meals table's sequence number, so a page reads
+    only its own rows and their events.
+    """
+
+    def __init__(self, db: Database, inventory: InventoryRepository):
+        self.db = db
+        self.inventory = inventory
+
+    def record(
+        self,
+        item_id: str,
+        quantity_used: float,
+        meal_name: str,
+        servings_made: int = 1,
+        notes: Optional[str] = None,
+        when: Optional[datetime] = None,
+    ) -> Optional[dict]:
+        """Log a portion of one item as a meal; None if the item does not exist.
+
+        Raises InsufficientQuantity when more is used than remains.
+        """
+        when = when or datetime.utcnow()
+        meal_id = f"meal_{uuid.uuid4().hex[:12]}"
+        with self.db.transaction() as conn:
+            # Read inside the write transaction so concurrent workers cannot both spend the same stock
+            item = self.inventory.get(item_id)
+            if item is None:
+                return None
+            remaining = item.remaining_quantity if item.remaining_quantity is not None else item.quantity
+            if quantity_used > remaining + 1e-9:
+                raise InsufficientQuantity(f"Only {remaining:g} {item.unit} of {item.name or item.upc} left")
+            cost = round((item.purchase_price or 0) * quantity_used, 2)
+            meal_seq = conn.execute(
+                "INSERT INTO meals (id, name, date, servings_made, notes, total_cost) VALUES (?, ?, ?, ?, ?, ?)",
+                (meal_id, meal_name, _iso(when), servings_made, notes, cost),
+            ).lastrowid
+            conn.execute(
+                """
+                INSERT INTO usage_events (meal_seq, item_id, item_name, quantity_used, unit, cost, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (meal_seq, item.id, item.name, quantity_used, item.unit, cost, _iso(when)),
+            )
+            self.inventory.update(item_id, remaining_quantity=round(max(remaining - quantity_used, 0), 4))
+        return {
+            "id": meal_id,
+            "name": meal_name,
+            "date": _iso(when),
+            "portions_used": [
+                {"item_id": item.id, "item_name": item.name, "quantity_used": quantity_used, "unit": item.unit, "cost": cost}
+            ],
+            "total_cost": cost,
+            "servings_made": servings_made,
+            "notes": notes,
+            "cursor": meal_seq,
+        }
+
+    def history(self, before: Optional[int] = None, limit: int = 20) -> Tuple[List[dict], Optional[int]]:
+        """Meals newest first, older than cursor `before`; returns (meals, next cursor or None)"""
+        rows = self.db.query(
+            "SELECT * FROM meals WHERE seq < ? ORDER BY seq DESC LIMIT ?",
+            (before if before is not None else 2**63 - 1, limit + 1),
+        )
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return [], None
+        portions: Dict[int, List[dict]] = {row["seq"]: [] for row in rows}
+        events = self.db.query(
+            f"SELECT * FROM usage_events WHERE meal_seq IN ({','.join('?' * len(portions))}) ORDER BY seq",
+            tuple(portions),
+        )
+        for event in events:
+            portions[event["meal_seq"]].append({
+                "item_id": event["item_id"],
+                "item_name": event["item_name"],
+                "quantity_used": event["quantity_used"],
+                "unit": event["unit"],
+                "cost": event["cost"],
+            })
+        meals = [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "date": row["date"],
+                "portions_used": portions[row["seq"]],
+                "total_cost": row["total_cost"],
+                "servings_made": row["servings_made"],
+                "notes": row["notes"],
+                "cursor": row["seq"],
+            }
+            for row in rows
+        ]
+        return meals, rows[-1]["seq"] if more else None
+
+
+class SettingsRepository:
+    """Small JSON documents such as the budget and the user's location"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def get(self, key: str, default: Optional[dict] = None) -> dict:
+        row = self.db.query_one("SELECT value FROM settings WHERE key = ?", (key,))
+        if row is None:
+            return dict(default or {})
+        return {**(default or {}), **json.loads(row["value"])}
+
+    def set(self, key: str, value: dict) -> dict:
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value)),
+            )
+        return value
+
+
+class Storage:
+    def __init__(self, path: str):
+        self.db = Database(path)
+        self.inventory = InventoryRepository(self.db)
+        self.purchases = PurchaseRepository(self.db)
+        self.usage = UsageRepository(self.db, self.inventory)
+        self.settings = SettingsRepository(self.db)
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,270 @@
+"""Store locator: a store catalogue with a grid index for nearby queries.
+
+Stores are bucketed into a fixed latitude/longitude grid (cells of
+`cell_deg` degrees, like a geohash prefix). A query looks at the cell around
+the point and then expanding rings of cells, computing haversine distances
+with NumPy only for stores in those cells, and stops as soon as no unvisited
+cell can hold anything closer. Type and price filters are bit masks and small
+integers evaluated on the same candidate arrays. The catalogue is loaded from
+a CSV or GeoJSON file; without one, a small built-in Toronto list is served.
+"""
+import csv
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Rings searched before a query falls back to scanning every store
+MAX_RINGS = 16
+
+
+@dataclass(slots=True)
+class Store:
+    id: str
+    name: str
+    address: str
+    lat: float
+    lng: float
+    rating: Optional[float] = None
+    price_level: str = ""
+    types: Tuple[str, ...] = ()
+    hours: str = ""
+    phone: str = ""
+
+    def to_dict(self, distance_km: Optional[float] = None) -> dict:
+        result = {
+            "id": self.id,
+            "name": self.name,
+            "address": self.address,
+            "rating": self.rating,
+            "price_level": self.price_level,
+            "types": list(self.types),
+            "position": {"lat": self.lat, "lng": self.lng},
+            "hours": self.hours,
+            "phone": self.phone,
+        }
+        if distance_km is not None:
+            result["distance"] = f"{distance_km:.1f} km"
+            result["distance_km"] = round(distance_km, 3)
+        return result
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km; works on floats and NumPy arrays (degrees)"""
+    lat1, lng1, lat2, lng2 = np.radians(lat1), np.radians(lng1), np.radians(lat2), np.radians(lng2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class StoreIndex:
+    def __init__(self, stores: Iterable[Store], cell_deg: float = 0.05):
+        self.stores: List[Store] = list(stores)
+        self.cell_deg = cell_deg
+        self.lat = np.array([s.lat for s in self.stores], dtype=np.float64)
+        self.lng = np.array([s.lng for s in self.stores], dtype=np.float64)
+        self.price = np.array([len(s.price_level) for s in self.stores], dtype=np.int8)
+        # One bit per store type
+        self.type_bits: Dict[str, int] = {}
+        for s in self.stores:
+            for t in s.types:
+                self.type_bits.setdefault(t, len(self.type_bits))
+        if len(self.type_bits) > 63:
+            raise ValueError("At most 63 distinct store types are supported")
+        self.type_mask = np.array(
+            [sum(1 << self.type_bits[t] for t in set(s.types)) for s in self.stores], dtype=np.int64
+        )
+        rows = np.floor(self.lat / cell_deg).astype(np.int64)
+        cols = np.floor(self.lng / cell_deg).astype(np.int64)
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        if self.stores:
+            order = np.lexsort((cols, rows))
+            keys = np.stack((rows[order], cols[order]), axis=1)
+            starts = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+            for chunk in np.split(order, starts):
+                self._cells[(int(rows[chunk[0]]), int(cols[chunk[0]]))] = chunk
+            self._row_span = (int(rows.min()), int(rows.max()))
+            self._col_span = (int(cols.min()), int(cols.max()))
+
+    def __len__(self) -> int:
+        return len(self.stores)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 10,
+        max_km: Optional[float] = None,
+        types: Optional[Sequence[str]] = None,
+        price_levels: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[Store, float]]:
+        """Up to `k` (store, km) pairs nearest to the point, closest first.
+
+        `types` keeps stores having any of the given types; `price_levels`
+        keeps stores whose price level ("$", "$$", ...) is one of those given.
+        """
+        keep = self._filter(types, price_levels)
+        if keep is False or not self.stores:
+            return []
+        limit = max_km if max_km is not None else math.inf
+        row, col = math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+        ids: List[np.ndarray] = []
+        dists: List[np.ndarray] = []
+        found = 0
+        for ring in range(MAX_RINGS + 1):
+            cells = self._ring(row, col, ring)
+            if cells:
+                candidates = np.concatenate(cells)
+                if keep is not None:
+                    candidates = candidates[keep(candidates)]
+                if len(candidates):
+                    d = haversine_km(lat, lng, self.lat[candidates], self.lng[candidates])
+                    ids.append(candidates)
+                    dists.append(d)
+                    found += len(candidates)
+            # Anything outside rings 0..ring is at least this far away
+            bound = self._ring_bound(lat, ring)
+            if self._covers_all(row, col, ring) or bound >= limit:
+                break
+            if found >= k and np.partition(np.concatenate(dists), k - 1)[k - 1] <= bound:
+                break
+        else:
+            # Sparse area: the rings did not settle it, so measure every store
+            candidates = np.arange(len(self.stores))
+            if keep is not None:
+                candidates = candidates[keep(candidates)]
+            ids, dists = [candidates], [haversine_km(lat, lng, self.lat[candidates], self.lng[candidates])]
+        return self._top(ids, dists, k, limit)
+
+    def within(self, lat: float, lng: float, radius_km: float, **filters) -> List[Tuple[Store, float]]:
+        """Every store within `radius_km` of the point, closest first"""
+        return self.nearest(lat, lng, k=len(self.stores), max_km=radius_km, **filters)
+
+    def _filter(self, types, price_levels):
+        """A function selecting matching candidate indices, None for no filter, False if nothing can match"""
+        mask = 0
+        if types:
+            bits = [self.type_bits[t] for t in types if t in self.type_bits]
+            if not bits:
+                return False
+            mask = sum(1 << b for b in bits)
+        prices = np.array(sorted({len(p) for p in price_levels}), dtype=np.int8) if price_levels else None
+        if not mask and prices is None:
+            return None
+
+        def keep(candidates: np.ndarray) -> np.ndarray:
+            ok = np.ones(len(candidates), dtype=bool)
+            if mask:
+                ok &= (self.type_mask[candidates] & mask) != 0
+            if prices is not None:
+                ok &= np.isin(self.price[candidates], prices)
+            return ok
+
+        return keep
+
+    def _ring(self, row: int, col: int, ring: int) -> List[np.ndarray]:
+        if ring == 0:
+            cell = self._cells.get((row, col))
+            return [cell] if cell is not None else []
+        cells = []
+        for c in range(col - ring, col + ring + 1):
+            for r in (row - ring, row + ring):
+                cell = self._cells.get((r, c))
+                if cell is not None:
+                    cells.append(cell)
+        for r in range(row - ring + 1, row + ring):
+            for c in (col - ring, col + ring):
+                cell = self._cells.get((r, c))
+                if cell is not None:
+                    cells.append(cell)
+        return cells
+
+    def _ring_bound(self, lat: float, ring: int) -> float:
+        """Shortest possible distance from the point to a cell outside rings 0..ring"""
+        span = ring * self.cell_deg
+        # Distance to the nearest parallel `span` degrees away, and to the nearest such meridian
+        along_meridian = span * KM_PER_DEGREE
+        to_meridian = EARTH_RADIUS_KM * math.asin(math.cos(math.radians(lat)) * math.sin(math.radians(min(span, 90.0))))
+        return min(along_meridian, to_meridian)
+
+    def _covers_all(self, row: int, col: int, ring: int) -> bool:
+        return (
+            row - ring <= self._row_span[0] and row + ring >= self._row_span[1]
+            and col - ring <= self._col_span[0] and col + ring >= self._col_span[1]
+        )
+
+    def _top(self, ids, dists, k, limit) -> List[Tuple[Store, float]]:
+        if not ids:
+            return []
+        ids, dists = np.concatenate(ids), np.concatenate(dists)
+        inside = dists <= limit
+        ids, dists = ids[inside], dists[inside]
+        if len(ids) > k:
+            part = np.argpartition(dists, k - 1)[:k]
+            ids, dists = ids[part], dists[part]
+        order = np.argsort(dists, kind="stable")
+        return [(self.stores[i], float(d)) for i, d in zip(ids[order], dists[order])]
+
+
+def _types(value) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = value.replace(";", ",").split(",")
+    return tuple(t.strip() for t in value or () if t.strip())
+
+
+def _store(i: int, raw: dict, lat: float, lng: float) -> Store:
+    rating = raw.get("rating")
+    return Store(
+        id=str(raw.get("id") or i + 1),
+        name=raw.get("name") or "Store",
+        address=raw.get("address") or "",
+        lat=float(lat),
+        lng=float(lng),
+        rating=float(rating) if rating not in (None, "") else None,
+        price_level=raw.get("price_level") or "",
+        types=_types(raw.get("types")),
+        hours=raw.get("hours") or "",
+        phone=raw.get("phone") or "",
+    )
+
+
+def load_stores(path: str) -> List[Store]:
+    """Stores from a CSV (lat/lng columns, `types` separated by ";") or a GeoJSON FeatureCollection of points"""
+    if path.endswith((".json", ".geojson")):
+        with open(path) as f:
+            features = json.load(f).get("features", [])
+        return [
+            _store(i, feature.get("properties") or {}, feature["geometry"]["coordinates"][1], feature["geometry"]["coordinates"][0])
+            for i, feature in enumerate(features)
+            if (feature.get("geometry") or {}).get("type") == "Point"
+        ]
+    with open(path, newline="") as f:
+        return [_store(i, row, row["lat"], row["lng"]) for i, row in enumerate(csv.DictReader(f))]
+
+
+# Served when no catalogue file is configured
+DEFAULT_STORES = [
+    Store("1", "Loblaws", "123 Queen St W, Toronto, ON", 43.6632, -79.3732, 4.2, "$$",
+          ("grocery_store", "supermarket"), "7:00 AM - 11:00 PM", "(416) 555-1234"),
+    Store("2", "Sobeys", "456 Yonge St, Toronto, ON", 43.6452, -79.3682, 4.5, "$$",
+          ("grocery_store",), "7:00 AM - 10:00 PM", "(416) 555-2345"),
+    Store("3", "No Frills", "789 Dundas St W, Toronto, ON", 43.6652, -79.3882, 4.0, "$",
+          ("grocery_store", "discount_store"), "8:00 AM - 9:00 PM", "(416) 555-3456"),
+    Store("4", "Walmart Supercenter", "321 Dufferin St, Toronto, ON", 43.6382, -79.3932, 4.3, "$$",
+          ("department_store", "grocery_store"), "8:00 AM - 10:00 PM", "(416) 555-4567"),
+    Store("5", "Whole Foods Market", "654 Avenue Rd, Toronto, ON", 43.6712, -79.3632, 4.7, "$$$",
+          ("grocery_store", "organic_store"), "7:00 AM - 10:00 PM", "(416) 555-5678"),
+    Store("6", "FreshCo", "987 Bloor St W, Toronto, ON", 43.6782, -79.3982, 4.1, "$",
+          ("grocery_store", "supermarket"), "7:00 AM - 11:00 PM", "(416) 555-6789"),
+]
+
+
+def load_store_index(path: Optional[str], cell_deg: float = 0.05) -> StoreIndex:
+    """Index over the catalogue at `path`, or over DEFAULT_STORES when there is none"""
+    if path and os.path.exists(path):
+        return StoreIndex(load_stores(path), cell_deg)
+    return StoreIndex(DEFAULT_STORES, cell_deg)
@@ -0,0 +1,120 @@
+"""Per-household state.
+
+Each household (tenant) has its own SQLite shard, so households never share
+an inventory, a budget or a write lock, and any worker process can serve any
+household: shards are opened on demand and kept coherent across workers by
+WAL mode (see storage.py). A proxy may still pin households to workers by
+hashing the household id, which keeps each shard's in-memory index warm in
+one place. Open tenants hold their Storage (connection plus in-memory
+indexes) and an asyncio.Lock that serializes that household's writes; tenants
+idle for longer than `idle_ttl` are closed, leaving only their shard on disk.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional
+
+from storage import Storage
+
+DEFAULT_HOUSEHOLD = "default"
+_VALID_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class InvalidHousehold(ValueError):
+    """Raised for household ids that cannot name a shard"""
+
+
+@dataclass
+class Tenant:
+    id: str
+    storage: Storage
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    active: int = 0
+
+
+class TenantRegistry:
+    def __init__(self, directory: str, default_path: str, idle_ttl: float = 600, max_open: int = 256):
+        self.directory = directory
+        self.default_path = default_path
+        self.idle_ttl = idle_ttl
+        self.max_open = max_open
+        self._tenants: "OrderedDict[str, Tenant]" = OrderedDict()
+        self._stats = {"opened": 0, "evicted": 0}
+
+    @staticmethod
+    def validate(household_id: str) -> str:
+        if not _VALID_ID.match(household_id or ""):
+            raise InvalidHousehold("Household id must be 1-64 letters, digits, '-' or '_'")
+        return household_id
+
+    def shard_path(self, household_id: str) -> str:
+        """The household's database file; the default household keeps the original single-pantry database"""
+        if household_id == DEFAULT_HOUSEHOLD:
+            return self.default_path
+        # Two-level fan-out keeps directories small with many households
+        bucket = hashlib.sha1(household_id.encode()).hexdigest()[:2]
+        return os.path.join(self.directory, bucket, f"{household_id}.db")
+
+    def _open(self, household_id: str) -> Tenant:
+        tenant = self._tenants.get(household_id)
+        if tenant is None:
+            path = self.shard_path(household_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tenant = Tenant(household_id, Storage(path))
+            self._tenants[household_id] = tenant
+            self._stats["opened"] += 1
+            self._evict_over_capacity()
+        self._tenants.move_to_end(household_id)
+        return tenant
+
+    @asynccontextmanager
+    async def session(self, household_id: str) -> AsyncIterator[Tenant]:
+        """The household's open tenant, kept open (not evictable) for the duration of the block"""
+        tenant = self._open(self.validate(household_id))
+        tenant.active += 1
+        try:
+            yield tenant
+        finally:
+            tenant.active -= 1
+            tenant.last_used = time.monotonic()
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Close tenants unused for `idle_ttl` seconds; returns how many were closed"""
+        now = now if now is not None else time.monotonic()
+        idle = [t for t in self._tenants.values() if not t.active and now - t.last_used >= self.idle_ttl]
+        for tenant in idle:
+            self._close(tenant)
+        return len(idle)
+
+    def _evict_over_capacity(self):
+        # Least recently used first; tenants serving a request stay open even over the cap
+        for tenant in list(self._tenants.values()):
+            if len(self._tenants) <= self.max_open:
+                break
+            if not tenant.active:
+                self._close(tenant)
+
+    def _close(self, tenant: Tenant):
+        del self._tenants[tenant.id]
+        tenant.storage.close()
+        self._stats["evicted"] += 1
+
+    async def run_evictions(self, interval: float = 60):
+        """Evict idle tenants every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def close(self):
+        for tenant in list(self._tenants.values()):
+            tenant.storage.close()
+        self._tenants.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "open": len(self._tenants), "active": sum(1 for t in self._tenants.values() if t.active)}
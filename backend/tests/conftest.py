@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Modules live flat in backend/; config reads the environment at import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="kitchenhelper-tests-"))
@@ -0,0 +1,21 @@
+from aggregates import SpendingAggregates
+from analytics import PurchaseColumns, breakdown, ranked_totals
+
+ROWS = [
+    {"seq": 1, "upc": "1", "item_name": "Milk", "price": 4.5, "store": "Loblaws", "date": "2026-01-03", "quantity": 2, "category": "dairy"},
+    {"seq": 2, "upc": "2", "item_name": "Bread", "price": 3.0, "store": "Metro", "date": "2026-01-10", "quantity": 1, "category": "bakery"},
+    {"seq": 3, "upc": "3", "item_name": "Apples", "price": 1.25, "store": "Metro", "date": "2026-02-01", "quantity": 4, "category": None},
+    {"seq": 4, "upc": "1", "item_name": "Milk", "price": 4.75, "store": "No Frills", "date": "2026-02-14", "quantity": 1, "category": "dairy"},
+]
+
+
+def test_ranked_totals_match_the_columnar_breakdown():
+    columns = PurchaseColumns()
+    columns.append(ROWS)
+    aggregates = SpendingAggregates()
+    for row in ROWS:
+        aggregates.add(row["date"][:7], row["store"], row["category"], row["price"] * row["quantity"], row["quantity"])
+
+    assert ranked_totals(aggregates.by_store(), "store") == breakdown(columns, "store")
+    assert ranked_totals(aggregates.by_category(), "category") == breakdown(columns, "category")
+    assert ranked_totals(aggregates.by_store(), "store", top=1) == breakdown(columns, "store", top=1)
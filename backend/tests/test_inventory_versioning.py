@@ -0,0 +1,179 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import storage
+from records import InventoryRecord
+from storage import Storage
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+def record(item_id, name="Milk"):
+    return InventoryRecord(
+        id=item_id,
+        upc="0" * 12,
+        name=name,
+        purchase_price=3.5,
+        store="Metro",
+        quantity=1,
+        unit="count",
+        remaining_quantity=None,
+        expiry=NOW + timedelta(days=7),
+        category="dairy",
+        purchase_date=NOW,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = Storage(str(tmp_path / "kitchen.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def open_household(client):
+    """A fresh household's inventory repository and the headers that select it"""
+    household_id = f"test-{uuid.uuid4().hex[:8]}"
+
+    async def open_tenant():
+        async with main.tenants.session(household_id) as tenant:
+            return tenant
+
+    tenant = client.portal.call(open_tenant)
+    return tenant.storage.inventory, {"X-Household-Id": household_id}
+
+
+@pytest.fixture
+def household(client):
+    return open_household(client)
+
+
+def test_every_write_bumps_the_version(store):
+    inventory = store.inventory
+    versions = [inventory.version()]
+    inventory.add(record("a"))
+    versions.append(inventory.version())
+    inventory.update("a", remaining_quantity=0.5)
+    versions.append(inventory.version())
+    inventory.remove("a")
+    versions.append(inventory.version())
+    inventory.add(record("b"))
+    inventory.clear()
+    versions.append(inventory.version())
+
+    assert versions == sorted(set(versions))
+    # A second handle on the same database sees the same version
+    other = Storage(store.db.path)
+    assert other.inventory.version() == versions[-1]
+    other.close()
+
+
+def test_changes_since_lists_upserts_and_removals(store):
+    inventory = store.inventory
+    inventory.add(record("kept"))
+    inventory.add(record("edited"))
+    inventory.add(record("gone"))
+    since = inventory.version()
+
+    inventory.update("edited", remaining_quantity=0.25)
+    inventory.remove("gone")
+    inventory.add(record("new", "Bread"))
+
+    added, updated, removed = inventory.changes(since)
+    assert [item.id for item in added] == ["new"]
+    assert [item.id for item in updated] == ["edited"]
+    assert removed == ["gone"]
+    assert inventory.changes(inventory.version()) == ([], [], [])
+    assert inventory.changes(inventory.version() + 1) is None
+
+
+def test_pruned_tombstones_force_a_reset(store, monkeypatch):
+    monkeypatch.setattr(storage, "TOMBSTONES_KEPT", 2)
+    inventory = store.inventory
+    for i in range(4):
+        inventory.add(record(f"item-{i}"))
+    since = inventory.version()
+
+    for i in range(4):
+        inventory.remove(f"item-{i}")
+
+    assert inventory.changes(since) is None
+    _, _, removed = inventory.changes(inventory.version() - 2)
+    assert removed == ["item-2", "item-3"]
+
+
+def test_inventory_get_revalidates_with_etag(client, household):
+    inventory, headers = household
+    inventory.add(record("a"))
+
+    first = client.get("/inventory", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["x-inventory-version"] == str(inventory.version())
+
+    cached = client.get("/inventory", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    inventory.update("a", remaining_quantity=0.5)
+    changed = client.get("/inventory", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[0]["remaining_quantity"] == 0.5
+
+
+def test_households_at_the_same_version_have_different_etags(client):
+    first, first_headers = open_household(client)
+    second, second_headers = open_household(client)
+    first.add(record("a"))
+    second.add(record("b", "Bread"))
+    assert first.version() == second.version()
+
+    first_response = client.get("/inventory", headers=first_headers)
+    second_response = client.get("/inventory", headers=second_headers)
+    assert first_response.headers["etag"] != second_response.headers["etag"]
+    assert "X-Household-Id" in first_response.headers["vary"]
+
+    # Switching households must not revalidate the other household's cached list
+    switched = client.get("/inventory", headers={**second_headers, "If-None-Match": first_response.headers["etag"]})
+    assert switched.status_code == 200
+    assert [item["id"] for item in switched.json()] == ["b"]
+
+    revalidated = client.get("/inventory", headers={**second_headers, "If-None-Match": second_response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert "X-Household-Id" in revalidated.headers["vary"]
+
+
+def test_changes_endpoint(client, household, monkeypatch):
+    inventory, headers = household
+    inventory.add(record("a"))
+    inventory.add(record("b"))
+    since = int(client.get("/inventory", headers=headers).headers["x-inventory-version"])
+
+    inventory.update("a", remaining_quantity=0.5)
+    assert client.delete("/inventory/b", headers=headers).status_code == 200
+    inventory.add(record("c", "Bread"))
+
+    body = client.get("/inventory/changes", headers=headers, params={"since": since}).json()
+    assert body["reset"] is False
+    assert body["version"] == inventory.version()
+    assert [item["id"] for item in body["added"]] == ["c"]
+    assert [item["id"] for item in body["updated"]] == ["a"]
+    assert body["removed"] == ["b"]
+
+    monkeypatch.setattr(storage, "TOMBSTONES_KEPT", 1)
+    client.delete("/inventory/a", headers=headers)
+    client.delete("/inventory/c", headers=headers)
+    reset = client.get("/inventory/changes", headers=headers, params={"since": since}).json()
+    assert reset["reset"] is True
+    assert reset["removed"] == []
@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from planner import MEALS, plan_meals, servings_per_unit
+from records import InventoryRecord
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+def item(item_id, name, quantity=1, expires_in=None, price=None, remaining=None, category=None):
+    return InventoryRecord(
+        id=item_id,
+        upc=item_id,
+        name=name,
+        purchase_price=price,
+        store=None,
+        quantity=quantity,
+        unit="count",
+        remaining_quantity=remaining,
+        expiry=NOW + timedelta(days=expires_in) if expires_in is not None else None,
+        category=category,
+        purchase_date=NOW,
+    )
+
+
+def used_servings(plan):
+    used = defaultdict(int)
+    for slot in plan.slots:
+        for portion in slot.portions:
+            used[portion.item_id] += portion.servings
+    return used
+
+
+def test_portions_never_exceed_stock():
+    items = [
+        item("eggs", "Eggs", quantity=6),
+        item("bread", "Bread", quantity=1),
+        item("rice", "Rice", remaining=0.5),
+        item("chicken", "Chicken breast", quantity=2, expires_in=3),
+        item("apples", "Apple", quantity=4, expires_in=10),
+    ]
+    plan = plan_meals(items, days=5, members=4, now=NOW)
+
+    used = used_servings(plan)
+    for record in items:
+        units = record.remaining_quantity if record.remaining_quantity is not None else record.quantity
+        assert used[record.id] <= int(units * servings_per_unit(record))
+    for slot in plan.slots:
+        assert slot.servings <= slot.servings_needed
+    leftovers = {left["item_id"]: left["servings"] for left in plan.leftovers}
+    for record in items:
+        units = record.remaining_quantity if record.remaining_quantity is not None else record.quantity
+        assert used[record.id] + leftovers.get(record.id, 0) == int(units * servings_per_unit(record))
+
+
+def test_expiring_items_are_used_first():
+    items = [
+        item("late", "Pasta", quantity=1, expires_in=30),
+        item("soon", "Spaghetti", quantity=1, expires_in=1),
+    ]
+    plan = plan_meals(items, days=3, members=2, now=NOW)
+
+    first = plan.slots[0]
+    assert [p.item_id for p in first.portions] == ["soon"]
+    used = used_servings(plan)
+    assert used["soon"] == 8
+
+
+def test_items_are_not_used_after_they_expire():
+    plan = plan_meals([item("milk", "Milk", expires_in=0)], days=3, members=1, now=NOW)
+
+    for slot in plan.slots:
+        if slot.day > 1:
+            assert slot.portions == []
+
+
+def test_uncovered_meals_are_reported():
+    items = [item("eggs", "Eggs", quantity=3)]
+    plan = plan_meals(items, days=2, members=2, now=NOW)
+
+    assert len(plan.slots) == 2 * len(MEALS)
+    short = [slot for slot in plan.slots if slot.servings < slot.servings_needed]
+    assert short
+    assert sum(slot.servings for slot in plan.slots) == 3
+    as_dict = plan.to_dict()["slots"]
+    assert all(s["servings_needed"] == 2 for s in as_dict)
+    assert sum(s["servings_needed"] - s["servings"] for s in as_dict) == 2 * len(MEALS) * 2 - 3
+
+
+def test_unused_expiring_items_are_at_risk():
+    items = [
+        item("spinach", "Spinach", quantity=10, expires_in=1),
+        item("rice", "Rice", quantity=1),
+    ]
+    plan = plan_meals(items, days=3, members=1, now=NOW)
+
+    at_risk = {entry["item_id"] for entry in plan.at_risk}
+    assert at_risk == {"spinach"}
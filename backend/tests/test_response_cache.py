@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+import main
+from llm import UNAVAILABLE
+
+
+def streamed(prompt, deltas, monkeypatch):
+    async def stream(prompt, system, request=None):
+        for delta in deltas:
+            yield delta
+
+    monkeypatch.setattr(main.llm, "stream", stream)
+
+    async def body():
+        response = main.stream_completion(prompt, "system", None)
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(body())
+
+
+def test_streamed_answers_are_cached(monkeypatch):
+    streamed("plan a week", ["Oat", "meal"], monkeypatch)
+    assert main.response_cache.get(main.response_cache.fingerprint("system", "plan a week")) == "Oatmeal"
+
+
+@pytest.mark.parametrize("deltas", [[], ["  ", "\n"]])
+def test_empty_streamed_answers_are_not_cached(monkeypatch, deltas):
+    prompt = f"empty {len(deltas)}"
+    streamed(prompt, deltas, monkeypatch)
+    assert main.response_cache.get(main.response_cache.fingerprint("system", prompt)) is None
+
+
+def test_failed_answers_are_not_cached(monkeypatch):
+    async def call_openai(prompt, system, request=None):
+        return f"{UNAVAILABLE}: timed out"
+
+    monkeypatch.setattr(main, "call_openai", call_openai)
+    assert asyncio.run(main.call_openai_cached("tips", "system")).startswith(UNAVAILABLE)
+    assert main.response_cache.get(main.response_cache.fingerprint("system", "tips")) is None
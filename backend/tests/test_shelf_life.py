@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from shelf_life import BATCH_SIZE, DEFAULT_SHELF_LIFE_DAYS, ShelfLifeEstimator, rule_days
+
+
+@pytest.mark.parametrize(
+    "name, days",
+    [
+        ("Chocolate milk", 7),
+        ("Strawberry Milk 1L", 7),
+        ("Milk chocolate bar", 270),
+        ("Whole milk 2L", 7),
+        ("Cream cheese", 10),
+        ("Philadelphia Cream Cheese 250g", 10),
+        ("Sour cream", 10),
+        ("Aged cheddar", 30),
+        ("Buttermilk", 14),
+        ("Salted butter", 60),
+        ("Peanut butter", 180),
+        ("Ice cream", 90),
+        ("Canned tuna", 365),
+    ],
+)
+def test_more_specific_names_win(name, days):
+    assert rule_days(name) == days
+
+
+def test_category_used_when_no_name_rule_matches():
+    assert rule_days("Mystery snack", "en:yogurts") == 14
+    assert rule_days("Mystery snack", None) is None
+
+
+def test_unknown_names_are_asked_in_bounded_batches():
+    prompts = []
+
+    async def complete(prompt, system):
+        prompts.append(prompt)
+        if "Gizmo fa (" in prompt:
+            raise RuntimeError("upstream error")
+        count = sum(1 for line in prompt.splitlines() if "(category:" in line)
+        return "\n".join(f"{n}: 12" for n in range(1, count + 1))
+
+    estimator = ShelfLifeEstimator(complete)
+    names = [f"Gizmo {a}{b}" for a in "abcdefghijkl" for b in "abcdefghij"]
+    days = asyncio.run(estimator.days_many((name, None) for name in names))
+
+    assert len(prompts) == 3
+    assert all(sum("(category:" in line for line in p.splitlines()) <= BATCH_SIZE for p in prompts)
+    # Only the batch whose call failed falls back to the default
+    failed = set(range(BATCH_SIZE, 2 * BATCH_SIZE))
+    assert [d for i, d in enumerate(days) if i in failed] == [DEFAULT_SHELF_LIFE_DAYS] * BATCH_SIZE
+    assert [d for i, d in enumerate(days) if i not in failed] == [12] * (len(names) - BATCH_SIZE)
@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from records import InventoryRecord
+from storage import Storage
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+def record(item_id, upc="0" * 12, quantity=2):
+    return InventoryRecord(
+        id=item_id,
+        upc=upc,
+        name="Milk",
+        purchase_price=3.5,
+        store="Metro",
+        quantity=quantity,
+        unit="count",
+        remaining_quantity=None,
+        expiry=NOW + timedelta(days=7),
+        category="dairy",
+        purchase_date=NOW,
+    )
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two handles on one database, as two server processes would have"""
+    path = str(tmp_path / "kitchen.db")
+    first, second = Storage(path), Storage(path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_update_merges_a_write_from_another_worker(workers, monkeypatch):
+    first, second = workers
+    first.inventory.add(record("milk"))
+    assert first.inventory.get("milk") is not None
+
+    # The other worker commits a portion just before this one's write transaction begins
+    transaction = first.db.transaction
+
+    @contextmanager
+    def racing_transaction():
+        monkeypatch.setattr(first.db, "transaction", transaction)
+        second.usage.record("milk", 0.5, "Cereal")
+        with transaction() as conn:
+            yield conn
+
+    monkeypatch.setattr(first.db, "transaction", racing_transaction)
+    expiry = NOW + timedelta(days=3)
+    first.inventory.update("milk", expiry=expiry)
+
+    for store in workers:
+        item = store.inventory.get("milk")
+        assert item.remaining_quantity == 1.5
+        assert item.expiry == expiry
+
+
+def test_remove_sees_items_added_by_another_worker(workers):
+    first, second = workers
+    assert first.inventory.list() == []
+    second.inventory.add(record("a", upc="1" * 12))
+    second.inventory.add(record("b", upc="1" * 12))
+
+    assert first.inventory.remove("a") is not None
+    assert first.inventory.remove_by_upc("1" * 12, 5) == 1
+    assert second.inventory.list() == []
@@ -0,0 +1,164 @@
+"""Food label image analysis off the event loop.
+
+The pipeline's process pool also runs other per-image CPU work (barcode
+decoding) through submit() and map(). Uploaded photos are decoded, downscaled and run through Tesseract in a process
+pool, so OCR never blocks other requests and throughput scales with cores.
+Work is admitted through a bounded queue (callers get PipelineBusy when it is
+full) and results are cached by a perceptual difference hash (dHash): a
+re-upload of the same label, even re-encoded or slightly resized, is answered
+without another OCR pass.
+"""
+import asyncio
+import io
+import multiprocessing
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+from PIL import Image, ImageOps
+
+from singleflight import SingleFlight
+
+# dHash grid: (HASH_SIZE + 1) x HASH_SIZE grayscale pixels -> HASH_SIZE**2 bits
+HASH_SIZE = 8
+# Longest side fed to Tesseract; phone photos are far larger than OCR needs
+OCR_MAX_SIDE = 1600
+
+T = TypeVar("T")
+
+_UPC_PATTERN = re.compile(r"(?<!\d)(\d{13}|\d{12}|\d{8})(?!\d)")
+
+
+class PipelineBusy(Exception):
+    """Raised when the analysis queue is full"""
+
+
+def image_hash(data: bytes) -> int:
+    """Perceptual dHash of an encoded image (runs in a worker process).
+
+    JPEGs are decoded at reduced scale via draft mode, so this is much
+    cheaper than a full decode.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("L", (HASH_SIZE * 4, HASH_SIZE * 4))
+        image = ImageOps.exif_transpose(image).convert("L")
+        small = image.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def read_label(data: bytes, max_side: int = OCR_MAX_SIDE) -> dict:
+    """Decode, downscale and OCR an encoded image (runs in a worker process)"""
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("L", (max_side, max_side))
+        image = ImageOps.exif_transpose(image).convert("L")
+    image.thumbnail((max_side, max_side))
+    image = ImageOps.autocontrast(image)
+    try:
+        import pytesseract
+
+        text = pytesseract.image_to_string(image)
+        ocr = True
+    except Exception:
+        # Tesseract missing (see README_TESSERACT.md): no text, callers fall back
+        text, ocr = "", False
+    return {"text": " ".join(text.split()), "ocr": ocr, "size": list(image.size)}
+
+
+def barcode_numbers(text: str) -> List[str]:
+    """UPC/EAN-looking digit runs printed in label text (spaces inside are ignored)"""
+    return _UPC_PATTERN.findall(re.sub(r"(?<=\d) (?=\d)", "", text))
+
+
+class VisionPipeline:
+    def __init__(self, workers: int, max_pending: int = 32, cache_size: int = 512, match_distance: int = 4):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.match_distance = match_distance
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._cache: "OrderedDict[int, dict]" = OrderedDict()
+        self._flights = SingleFlight()
+        self._stats = {"analyzed": 0, "cache_hits": 0, "rejected": 0}
+
+    async def start(self):
+        if self._pool is None:
+            # spawn: forking a process that already runs threads and SQLite connections is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def aclose(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    @asynccontextmanager
+    async def _admit(self, jobs: int = 1):
+        """Reserve queue room for `jobs` images, or raise PipelineBusy"""
+        if self._pending + jobs > self.max_pending:
+            self._stats["rejected"] += 1
+            raise PipelineBusy()
+        await self.start()
+        self._pending += jobs
+        try:
+            yield
+        finally:
+            self._pending -= jobs
+
+    async def submit(self, fn: Callable[..., T], *args) -> T:
+        """Run `fn(*args)` in the worker pool under the same queue bound as analyze()"""
+        async with self._admit():
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def map(self, fn: Callable[[bytes], T], items: Sequence[bytes]) -> List[T]:
+        """`fn` over every item in parallel; the whole batch is admitted or rejected at once"""
+        async with self._admit(len(items)):
+            loop = asyncio.get_running_loop()
+            return list(await asyncio.gather(*[loop.run_in_executor(self._pool, fn, item) for item in items]))
+
+    async def analyze(self, data: bytes) -> dict:
+        """OCR result for an encoded image: text, whether OCR ran, perceptual hash and cache status.
+
+        Raises PipelineBusy when `max_pending` images are already queued or
+        being processed.
+        """
+        async with self._admit():
+            loop = asyncio.get_running_loop()
+            phash = await loop.run_in_executor(self._pool, image_hash, data)
+            cached = self._lookup(phash)
+            if cached is not None:
+                self._stats["cache_hits"] += 1
+                return {**cached, "hash": f"{phash:016x}", "cached": True}
+            result = await self._flights.do(phash, lambda: self._read(data, phash))
+            return {**result, "hash": f"{phash:016x}", "cached": False}
+
+    async def _read(self, data: bytes, phash: int) -> dict:
+        result = await asyncio.get_running_loop().run_in_executor(self._pool, read_label, data)
+        self._stats["analyzed"] += 1
+        if result["ocr"]:
+            self._cache[phash] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _lookup(self, phash: int) -> Optional[dict]:
+        """Cached result for this hash or one within `match_distance` bits of it"""
+        result = self._cache.get(phash)
+        if result is None:
+            for key, value in self._cache.items():
+                if (key ^ phash).bit_count() <= self.match_distance:
+                    phash, result = key, value
+                    break
+        if result is not None:
+            self._cache.move_to_end(phash)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "pending": self._pending, "cached": len(self._cache), "workers": self.workers}
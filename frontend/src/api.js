@@ -1,5 +1,59 @@
 import axios from "axios";
 
+export const API_BASE_URL = "http://localhost:8000";
+
+// Which household's pantry to use; without one the backend serves its default pantry
+const householdId = window.localStorage.getItem("householdId");
+const householdHeaders = householdId ? { "X-Household-Id": householdId } : {};
+
 export default axios.create({
-  baseURL: "http://localhost:8000",
+  baseURL: API_BASE_URL,
+  headers: householdHeaders,
 });
+
+// Read a server-sent event stream from the backend. `onText` receives the
+// accumulated text after every delta; the full text is returned at the end.
+export async function streamCompletion(path, { method = "GET", body, onText, signal } = {}) {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method,
+    headers: body ? { ...householdHeaders, "Content-Type": "application/json" } : householdHeaders,
+    body: body ? JSON.stringify(body) : undefined,
+    signal,
+  });
+  if (!response.ok) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let text = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) >= 0) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === "delta") {
+        text += payload.text;
+        if (onText) onText(text);
+      } else if (event === "error") {
+        throw new Error(payload.message);
+      }
+    }
+  }
+  return text;
+}
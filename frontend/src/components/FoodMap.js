@@ -37,8 +37,10 @@ export default function FoodMap() {
         coords = await getCurrentPosition();
       } catch (err) {
         console.log('Geolocation failed, using backend location:', err);
-        // Use coordinates from backend location
-        if (location.zip_code) {
+        // Use coordinates from backend location (geocoded server-side)
+        if (location.lat != null && location.lng != null) {
+          coords = { lat: location.lat, lng: location.lng };
+        } else if (location.zip_code) {
           coords = await getCoordinatesFromZipCode(location.zip_code);
         } else if (location.city) {
           coords = await getCoordinatesFromCity(location.city);
@@ -92,7 +94,7 @@ export default function FoodMap() {
   const fetchNearbyStores = async (coords) => {
     try {
       // Fetch nearby stores from backend API
-      const response = await api.get('/nearby-stores');
+      const response = await api.get('/nearby-stores', { params: { lat: coords.lat, lng: coords.lng } });
       const data = response.data;
       
       if (data.stores && data.stores.length > 0) {
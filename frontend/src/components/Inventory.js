@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import api from "../api";
 import FullScreenBarcodeScanner from "./FullScreenBarcodeScanner";
 
@@ -17,10 +17,30 @@ export default function Inventory({ refreshKey }) {
     category: "food"
   });
 
+  // Inventory version of the items on screen; later refreshes fetch only what changed since
+  const versionRef = useRef(null);
+
   const fetchInventory = async () => {
     try {
+      if (versionRef.current !== null) {
+        const resp = await api.get("/inventory/changes", { params: { since: versionRef.current } });
+        const { version, reset, added, updated, removed } = resp.data;
+        if (!reset) {
+          // Keyed by id: a change can be sent again on the next sync, and must replace rather than duplicate
+          const gone = new Set(removed);
+          setItems((current) => {
+            const merged = new Map(current.filter((item) => !gone.has(item.id)).map((item) => [item.id, item]));
+            [...updated, ...added].forEach((item) => merged.set(item.id, item));
+            return [...merged.values()];
+          });
+          versionRef.current = version;
+          return;
+        }
+      }
       const resp = await api.get("/inventory");
       setItems(resp.data);
+      const version = resp.headers["x-inventory-version"];
+      versionRef.current = version ? Number(version) : null;
     } catch (e) {
       console.error("Failed to fetch inventory:", e);
     }
@@ -44,7 +44,7 @@ export default function LocationSetter({ onLocationSet }) {
       if (locationData && locationData.postal_code) {
         setZipCode(locationData.postal_code);
         setCity(locationData.city);
-        await saveLocation(locationData.postal_code, locationData.city);
+        await saveLocation(locationData.postal_code, locationData.city, { lat: latitude, lng: longitude });
         setLocationStatus("Location detected automatically! ✅");
       } else {
         throw new Error("Could not get address from coordinates");
@@ -129,9 +129,10 @@ export default function LocationSetter({ onLocationSet }) {
     }
   };
 
-  const saveLocation = async (zip, cityName) => {
+  const saveLocation = async (zip, cityName, coords = {}) => {
     try {
-      await api.post("/location", { zip_code: zip, city: cityName });
+      // Without coordinates the backend geocodes the postal code itself
+      await api.post("/location", { zip_code: zip, city: cityName, ...coords });
       setLocationStatus("Location saved! ✅");
       onLocationSet();
     } catch (e) {
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import api from "../api";
+import { streamCompletion } from "../api";
 
 // Typing effect component
 const TypingText = ({ text, speed = 30 }) => {
@@ -161,25 +161,21 @@ export default function MealPlan() {
     setIsTyping(false);
     
     try {
-      const resp = await api.post("/mealplan", { days, members });
-      console.log("Full API response:", resp.data);
-      
-      // Handle different response structures
-      let rawPlan;
-      if (resp.data.meal_plan) {
-        rawPlan = resp.data.meal_plan;
-      } else if (resp.data) {
-        rawPlan = resp.data;
-      } else {
+      // Stream the plan so it renders from the first token instead of after the whole completion
+      const rawPlan = await streamCompletion("/mealplan/stream", {
+        method: "POST",
+        body: { days, members },
+        onText: (text) => {
+          setIsLoading(false);
+          setFormattedPlan(text);
+        },
+      });
+      if (!rawPlan) {
         throw new Error("No meal plan data received");
       }
       
       setPlan(rawPlan);
-      
-      // Format the plan
-      const formatted = formatMealPlan(rawPlan);
-      setFormattedPlan(formatted);
-      setIsTyping(true);
+      setFormattedPlan(formatMealPlan(rawPlan));
     } catch (e) {
       console.error("Failed to fetch meal plan:", e);
       console.error("Error details:", e.response?.data || e.message);
@@ -4,6 +4,7 @@ import api from "../api";
 export default function SpendingAnalysis({ refreshKey }) {
   const [budgetData, setBudgetData] = useState({});
   const [analysis, setAnalysis] = useState("");
+  const [trends, setTrends] = useState(null);
   const [loading, setLoading] = useState(false);
 
   useEffect(() => {
@@ -12,8 +13,12 @@ export default function SpendingAnalysis({ refreshKey }) {
 
   const fetchBudgetData = async () => {
     try {
-      const resp = await api.get("/budget");
-      setBudgetData(resp.data);
+      const [budgetResp, analyticsResp] = await Promise.all([
+        api.get("/budget"),
+        api.get("/analytics", { params: { months: 6, top: 5 } }),
+      ]);
+      setBudgetData(budgetResp.data);
+      setTrends(analyticsResp.data);
     } catch (e) {
       console.error("Failed to fetch budget data:", e);
     }
@@ -95,6 +100,34 @@ export default function SpendingAnalysis({ refreshKey }) {
               </small>
             </div>
 
+            {trends && trends.monthly.length > 0 && (
+              <div style={{ marginTop: '15px' }}>
+                <h4 style={{ margin: '0 0 8px 0' }}>Monthly Trend</h4>
+                {trends.monthly.map((m) => (
+                  <div key={m.month} style={{ display: 'flex', justifyContent: 'space-between', fontSize: '0.9rem' }}>
+                    <span>{m.month}</span>
+                    <span>
+                      ${m.total.toFixed(2)}
+                      {m.change_pct !== null && (
+                        <small style={{ marginLeft: '8px', color: m.change_pct > 0 ? '#dc3545' : '#28a745' }}>
+                          {m.change_pct > 0 ? '+' : ''}{m.change_pct}%
+                        </small>
+                      )}
+                    </span>
+                  </div>
+                ))}
+                <small style={{ color: '#6c757d' }}>
+                  Rolling average: ${trends.monthly[trends.monthly.length - 1].rolling_avg.toFixed(2)}/month
+                </small>
+                {trends.by_category.length > 0 && (
+                  <div style={{ marginTop: '10px', fontSize: '0.9rem' }}>
+                    <strong>Top Categories:</strong>{' '}
+                    {trends.by_category.map((c) => `${c.category} (${c.share_pct}%)`).join(', ')}
+                  </div>
+                )}
+              </div>
+            )}
+
             <button 
               onClick={fetchAnalysis}
               disabled={loading}
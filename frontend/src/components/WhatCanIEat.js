@@ -1,23 +1,43 @@
 import React, { useState } from "react";
-import api from "../api";
+import api, { streamCompletion } from "../api";
 
 export default function WhatCanIEat(props) {
+  const [recipes, setRecipes] = useState(null);
   const [options, setOptions] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [isAsking, setIsAsking] = useState(false);
 
-  const fetchOptions = async () => {
+  // Matched locally on the server, so this is quick and works without the AI
+  const fetchRecipes = async () => {
     setIsLoading(true);
     try {
-      const resp = await api.get("/whatcanieat");
-      setOptions(resp.data.options);
+      const response = await api.get("/recipes");
+      setRecipes(response.data.recipes || []);
     } catch (e) {
-      console.error("Failed to fetch options:", e);
+      console.error("Failed to fetch recipes:", e);
       alert("Failed to fetch meal options. Please try again.");
     } finally {
       setIsLoading(false);
     }
   };
 
+  const fetchOptions = async () => {
+    setIsAsking(true);
+    try {
+      await streamCompletion("/whatcanieat/stream", {
+        onText: (text) => {
+          setIsAsking(false);
+          setOptions(text);
+        },
+      });
+    } catch (e) {
+      console.error("Failed to fetch options:", e);
+      alert("Failed to fetch meal options. Please try again.");
+    } finally {
+      setIsAsking(false);
+    }
+  };
+
   return (
     <div className="card">
       <h2 className="card-title">🍴 What Can I Eat?</h2>
@@ -25,21 +45,63 @@ export default function WhatCanIEat(props) {
         <p style={{ marginBottom: '1.5rem', color: '#666' }}>
           Discover meals you can make with your current inventory and get recipe suggestions.
         </p>
-        
-        <button 
-          onClick={fetchOptions} 
-          className="save-btn"
-          disabled={isLoading}
-          style={{ marginBottom: '1.5rem' }}
-        >
-          {isLoading ? "Finding meals..." : "Find Meals I Can Make"}
-        </button>
-        
+
+        <div style={{ display: 'flex', gap: '0.75rem', marginBottom: '1.5rem' }}>
+          <button
+            onClick={fetchRecipes}
+            className="save-btn"
+            disabled={isLoading}
+          >
+            {isLoading ? "Finding meals..." : "Find Meals I Can Make"}
+          </button>
+          <button
+            onClick={fetchOptions}
+            className="save-btn"
+            disabled={isAsking}
+          >
+            {isAsking ? "Asking the chef..." : "Ask the AI Chef"}
+          </button>
+        </div>
+
+        {recipes && recipes.length === 0 && (
+          <p style={{ color: '#666' }}>No recipes match your inventory yet. Add a few more groceries!</p>
+        )}
+
+        {recipes && recipes.map((recipe) => (
+          <div key={recipe.id} style={{
+            padding: '1rem 1.5rem',
+            marginBottom: '0.75rem',
+            background: '#f8f9fa',
+            borderRadius: '12px',
+            border: '1px solid #e9ecef',
+            color: '#495057'
+          }}>
+            <h4 style={{ margin: '0 0 0.5rem 0' }}>
+              {recipe.name}
+              {recipe.minutes ? <span style={{ fontWeight: 'normal', color: '#888' }}> · {recipe.minutes} min</span> : null}
+            </h4>
+            <div>
+              Uses: {recipe.uses.map((use) => (
+                <span key={use.item_id + use.ingredient} style={{ marginRight: '0.5rem' }}>
+                  {use.item || use.ingredient}
+                  {use.days_left !== null && use.days_left <= 3 ? " ⏰" : ""}
+                </span>
+              ))}
+            </div>
+            {recipe.missing.length > 0 && (
+              <div style={{ color: '#888' }}>Also needs: {recipe.missing.join(", ")}</div>
+            )}
+            {recipe.instructions && (
+              <p style={{ margin: '0.5rem 0 0 0', lineHeight: '1.6' }}>{recipe.instructions}</p>
+            )}
+          </div>
+        ))}
+
         {options && (
-          <div style={{ 
-            padding: '1.5rem', 
-            background: '#f8f9fa', 
-            borderRadius: '12px', 
+          <div style={{
+            padding: '1.5rem',
+            background: '#f8f9fa',
+            borderRadius: '12px',
             border: '1px solid #e9ecef',
             whiteSpace: 'pre-line',
             lineHeight: '1.6',